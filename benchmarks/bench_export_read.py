@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出读取阶段基准测试：比较不同线程数下读取、解码全部源文件的耗时
+
+用法:
+  python benchmarks/bench_export_read.py                      # 生成合成项目并测试
+  python benchmarks/bench_export_read.py --dir /mnt/nfs/proj  # 测试真实目录（如网络存储）
+  python benchmarks/bench_export_read.py --latency-ms 2       # 为每次读取模拟 I/O 等待
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat4code.core import reader  # noqa: E402
+
+
+def _create_tree(root, file_count, file_size):
+    """生成合成源码目录"""
+    line = "int value = compute(42); // synthetic source line\n"
+    body = line * max(1, file_size // len(line))
+    for i in range(file_count):
+        sub_dir = os.path.join(root, f"mod{i % 50}")
+        os.makedirs(sub_dir, exist_ok=True)
+        with open(os.path.join(sub_dir, f"file{i}.cpp"), 'w', encoding='utf-8') as f:
+            f.write(body)
+
+
+def _collect(root):
+    paths = []
+    for dir_path, _, files in os.walk(root):
+        for name in files:
+            paths.append(os.path.join(dir_path, name))
+    return paths
+
+
+def _run(paths, jobs):
+    start = time.perf_counter()
+    total = 0
+    for result in reader.iter_read_files(paths, jobs):
+        total += len(result.content)
+    return time.perf_counter() - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出读取阶段基准测试")
+    parser.add_argument('--dir', help='要读取的目录（默认生成合成项目）')
+    parser.add_argument('--files', type=int, default=2000, help='合成项目的文件数')
+    parser.add_argument('--size', type=int, default=8192, help='合成文件大小（字节）')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='为每个文件模拟的读取等待（毫秒）')
+    parser.add_argument('--jobs', type=int, nargs='*', default=[1, 4, 16], help='要测试的线程数')
+    args = parser.parse_args()
+
+    if args.latency_ms > 0:
+        # 模拟网络存储：每次读取前等待固定时间（释放 GIL，与真实 I/O 等待相同）
+        original_read = reader.read_source_file
+
+        def slow_read(file_path):
+            time.sleep(args.latency_ms / 1000.0)
+            return original_read(file_path)
+
+        reader.read_source_file = slow_read
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = args.dir
+        if root is None:
+            root = tmp_dir
+            _create_tree(root, args.files, args.size)
+        paths = _collect(root)
+
+        print(f"文件数: {len(paths)}, 模拟延迟: {args.latency_ms} ms")
+        print(f"{'jobs':>6} {'耗时(s)':>10} {'加速比':>8}")
+        baseline = None
+        for jobs in args.jobs:
+            elapsed, _ = _run(paths, jobs)
+            if baseline is None:
+                baseline = elapsed
+            print(f"{jobs:>6} {elapsed:>10.3f} {baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应解析基准测试：用病态输入验证解析时间随输入大小线性增长
+
+每种语料按 --sizes 指定的大小生成，对标准解析、灵活解析和格式验证计时，
+输入大小翻倍时耗时也应只翻倍左右（"增长" 列接近 2.0x），而不是 4 倍
+
+用法:
+  python benchmarks/bench_parser.py                      # 默认 1、2、4、8 MB
+  python benchmarks/bench_parser.py --sizes 0.5 1 2      # 指定大小（MB）
+  python benchmarks/bench_parser.py --legacy             # 同时测试旧的正则表达式（输入按 1/1024 缩小）
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat4code.core.parser import ResponseParser  # noqa: E402
+from chat4code.core.validator import ResponseValidator  # noqa: E402
+
+# 旧的正则表达式单次耗时超过该值后不再测试更大的输入
+LEGACY_MAX_SECONDS = 5.0
+
+# 旧版本的灵活解析和代码块统计使用的正则表达式，用于对比
+_LEGACY_FLEXIBLE_RE = re.compile(r'##\s+([^\n]+?)\s*\n\s*\n\s*```(\w*)\s*\n(.*?)\s*\n\s*```', re.DOTALL)
+_LEGACY_CODE_BLOCK_RE = re.compile(r'```(\w*)\n(.*?)\n\s*```', re.DOTALL)
+
+
+def _repeat(unit, size):
+    """重复 unit 直到达到 size 字节（unit 中的 {i} 替换为序号）"""
+    parts = []
+    total = 0
+    i = 0
+    while total < size:
+        part = unit.format(i=i)
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return ''.join(parts)
+
+
+def _unterminated_openers(size):
+    """大量没有结束标记的代码块（旧的 .*? 正则表达式对每个开始标记都扫描到文本末尾）"""
+    return _repeat("## src/file{i}.py\n\n```python\nvalue = compute({i})\n", size)
+
+
+def _single_unterminated_block(size):
+    """一个文件标题之后是没有结束的巨大代码块"""
+    return "## src/big.py\n\n```python\n" + _repeat("x = [1, 2, 3]  # 数据\n", size)
+
+
+def _inline_fences(size):
+    """行中间的 ```（不是标记行）：旧的代码块正则表达式从每一处都扫描到文本末尾"""
+    return _repeat("说明中的 ```\n", size)
+
+
+def _blank_run(size):
+    """文件标题之后是大段空行：旧的灵活解析正则表达式在空白上反复回溯"""
+    return "## src/a.py\n" + "\n" * size
+
+
+def _headings_only(size):
+    """只有文件标题和说明文字，没有代码块"""
+    return _repeat("## src/file{i}.py\n\n这里是对文件的说明，但没有给出代码。\n\n", size)
+
+
+def _unbalanced_nesting(size):
+    """代码中带语言标识的标记行从不成对（嵌套识别在文本结束后回退）"""
+    return _repeat("## src/file{i}.md\n```markdown\n```python\nx = {i}\n", size) + "```\n"
+
+
+def _well_formed(size):
+    """正常的响应：每个文件一个代码块"""
+    return _repeat("## src/file{i}.py\n\n```python\ndef f{i}():\n    return {i}\n```\n\n", size)
+
+
+CORPORA = [
+    ('unterminated_openers', _unterminated_openers),
+    ('single_unterminated', _single_unterminated_block),
+    ('inline_fences', _inline_fences),
+    ('blank_run', _blank_run),
+    ('headings_only', _headings_only),
+    ('unbalanced_nesting', _unbalanced_nesting),
+    ('well_formed', _well_formed),
+]
+
+
+def _legacy_parse(content):
+    _LEGACY_FLEXIBLE_RE.findall(content)
+    _LEGACY_CODE_BLOCK_RE.findall(content)
+
+
+def _timed(func, content):
+    start = time.perf_counter()
+    func(content)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应解析基准测试")
+    parser.add_argument('--sizes', type=float, nargs='*', default=[1, 2, 4, 8], help='输入大小（MB）')
+    parser.add_argument('--legacy', action='store_true', help='同时测试旧的正则表达式（输入大小按 1/1024 缩小）')
+    args = parser.parse_args()
+
+    response_parser = ResponseParser()
+    validator = ResponseValidator()
+    methods = [
+        ('standard', response_parser.extract_files_standard),
+        ('flexible', response_parser.extract_files_flexible),
+        ('validate', validator.validate),
+    ]
+    if args.legacy:
+        methods.append(('legacy_regex', _legacy_parse))
+
+    print(f"{'语料':<22} {'方法':<13} {'大小(KB)':>9} {'耗时(s)':>9} {'增长':>7}")
+    for name, generate in CORPORA:
+        for method_name, method in methods:
+            previous = None
+            for size_mb in args.sizes:
+                if method_name == 'legacy_regex':
+                    if previous is not None and previous > LEGACY_MAX_SECONDS:
+                        print(f"{name:<22} {method_name:<13} {'-':>9} {'跳过':>9} {'-':>7}")
+                        continue
+                    size_mb /= 1024
+                content = generate(int(size_mb * 1024 * 1024))
+                elapsed = _timed(method, content)
+                growth = f"{elapsed / previous:.1f}x" if previous else '-'
+                previous = elapsed
+                print(f"{name:<22} {method_name:<13} {len(content) / 1024:>9.0f} {elapsed:>9.3f} {growth:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录遍历基准测试：比较原有的 os.walk + 逐文件 os.stat 与基于 os.scandir 的扫描器
+
+用法:
+  python benchmarks/bench_walker.py                   # 生成 20 万个文件的合成目录并测试
+  python benchmarks/bench_walker.py --files 50000     # 指定合成文件数
+  python benchmarks/bench_walker.py --dir ~/src/proj  # 测试真实目录
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat4code.core.scanner import DirectoryScanner  # noqa: E402
+
+
+def _create_tree(root, file_count, files_per_dir):
+    """生成合成目录：每个目录 files_per_dir 个文件，目录按两级分布，并带一个应被剪枝的目录"""
+    dir_count = max(1, file_count // files_per_dir)
+    for d in range(dir_count):
+        sub_dir = os.path.join(root, f"pkg{d % 64}", f"mod{d}")
+        os.makedirs(sub_dir, exist_ok=True)
+        for i in range(files_per_dir):
+            ext = '.cpp' if i % 4 else '.o'
+            open(os.path.join(sub_dir, f"file{i}{ext}"), 'w').close()
+    os.makedirs(os.path.join(root, 'build'), exist_ok=True)
+    for i in range(files_per_dir):
+        open(os.path.join(root, 'build', f"out{i}.o"), 'w').close()
+
+
+def _should_exclude(rel_path):
+    return rel_path.endswith('.o')
+
+
+def _should_prune(rel_dir):
+    return rel_dir == 'build'
+
+
+def _legacy_walk(src_dir):
+    """原有实现：os.walk 后对每个文件再调用 os.stat"""
+    results = []
+    for root, dirs, files in os.walk(src_dir):
+        rel_root = os.path.relpath(root, src_dir)
+        if rel_root == os.curdir:
+            rel_root = ''
+        dirs[:] = [d for d in dirs if not _should_prune(os.path.join(rel_root, d) if rel_root else d)]
+        for file in files:
+            file_path = os.path.join(root, file)
+            rel_path = os.path.join(rel_root, file) if rel_root else file
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                stat_result = None
+            results.append((rel_path, stat_result, _should_exclude(rel_path)))
+    return results
+
+
+def _scandir_walk(src_dir):
+    return DirectoryScanner(_should_exclude, _should_prune).scan_dir(src_dir)
+
+
+def _best_of(func, src_dir, repeat):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(func(src_dir))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="目录遍历基准测试")
+    parser.add_argument('--dir', help='要遍历的目录（默认生成合成目录）')
+    parser.add_argument('--files', type=int, default=200000, help='合成目录的文件数')
+    parser.add_argument('--per-dir', type=int, default=40, help='合成目录中每个目录的文件数')
+    parser.add_argument('--repeat', type=int, default=3, help='每种实现运行的次数（取最快一次）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = args.dir
+        if root is None:
+            root = tmp_dir
+            print(f"生成 {args.files} 个文件...")
+            _create_tree(root, args.files, args.per_dir)
+
+        legacy_time, legacy_count = _best_of(_legacy_walk, root, args.repeat)
+        scandir_time, scandir_count = _best_of(_scandir_walk, root, args.repeat)
+
+        print(f"{'实现':<20} {'文件数':>8} {'耗时(s)':>10}")
+        print(f"{'os.walk + os.stat':<20} {legacy_count:>8} {legacy_time:>10.3f}")
+        print(f"{'os.scandir':<20} {scandir_count:>8} {scandir_time:>10.3f}")
+        print(f"加速比: {legacy_time / scandir_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,14 @@
 
 import os
 
+from ..core.export_options import ExportOptions
+
 
 def process(args, helper):
     """处理导出动作"""
+    incremental = args.incremental
+    if args.diff_context is not None and not incremental:
+        incremental = True
     if len(args.paths) < 1:
         _show_export_usage()
         return
@@ -29,13 +34,38 @@ def process(args, helper):
         # 执行导出
         helper.export_to_markdown(
             src_dirs, output_file, extensions, args.task,
-            args.incremental, args.since_time,
-            include_task_prompt, task_content
+            incremental, args.since_time,
+            include_task_prompt, task_content,
+            options=_build_export_options(args)
         )
     except Exception as e:
         print(f"❌ 导出失败: {e}")
 
 
+def _build_export_options(args):
+    """根据命令行参数构建导出选项"""
+    return ExportOptions(
+        jobs=args.jobs,
+        use_gitignore=args.gitignore,
+        baseline=args.baseline,
+        dry_run=args.dry_run,
+        max_tokens=args.max_tokens,
+        max_bytes=args.max_bytes,
+        stats=args.stats,
+        stats_json=args.stats_json,
+        diff_context=args.diff_context,
+        outline=args.outline,
+        expand=args.expand,
+        closure=args.closure,
+        depth=args.depth,
+        impacted_by=args.impacted_by,
+        top_k=args.top_k,
+        relevance_budget=args.relevance_budget,
+        symbols=args.symbol,
+        with_callers=args.with_callers
+    )
+
+
 def _show_export_usage():
     """显示导出用法"""
     print("❌ 错误: export操作需要指定源目录")
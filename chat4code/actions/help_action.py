@@ -20,10 +20,30 @@ def show_help(helper):
         "2. 增量导出: ",
         "   python -m chat4code export ./my_project changes.md --incremental",
         "   python -m chat4code export ./my_project changes.md --since 2024-01-01",
+        "   python -m chat4code export ./my_project changes.md --incremental=git  # 由 git 获取未提交的变更",
+        "   python -m chat4code export ./my_project changes.md --incremental=git:main  # 相对于 main 分支的变更",
+        "   python -m chat4code export ./my_project release.md --baseline release-1.2  # 保存为命名基线",
+        "   python -m chat4code export ./my_project changes.md --incremental --baseline release-1.2",
+        "   python -m chat4code --list-baselines  # 列出已保存的导出基线",
+        "   python -m chat4code export ./my_project --incremental --dry-run  # 按目录预览变更，不写入文件",
+        "   python -m chat4code export ./my_project changes.md --diff-context 3  # 已修改的文件只导出差异",
+        "   python -m chat4code export ./my_project req.md --max-tokens 100000  # 按预算拆分为 req1.md、req2.md ...",
+        "   python -m chat4code export ./my_project project.md --stats  # 显示各目录和文件的 token 开销",
+        "   python -m chat4code export ./my_project project.md --jobs 16  # 并发读取文件",
+        "   python -m chat4code export ./my_project project.md --gitignore  # 跳过 .gitignore 忽略的文件",
+        "   python -m chat4code export ./my_project project.md --no-gitignore  # 本次导出不使用 .gitignore（覆盖配置）",
+        "   python -m chat4code export ./src tu.md --closure net/socket.cpp  # 只导出该文件及其包含的头文件",
+        "   python -m chat4code export ./pkg ctx.md --closure pkg/cli.py  # Python 模块及其导入的项目内模块",
+        "   python -m chat4code export ./pkg fix.md --impacted-by pkg/utils.py  # 导出所有直接或间接导入它的模块",
+        "   python -m chat4code export ./my_project req.md --task add_feature --task-content \"连接池超时重连\" --top-k 20  # 只导出最相关的文件",
+        "   python -m chat4code export ./my_project pool.md --symbol ConnectionPool --with-callers  # 定义和引用该符号的文件",
+        "   python -m chat4code export ./my_project outline.md --outline  # 只导出骨架，函数体替换为行号标记",
+        "   python -m chat4code export ./my_project body.md --expand src/net.cpp:120-168  # 取回指定的函数体",
         " ",
         "3. 将AI生成的Markdown应用到本地: ",
         "   python -m chat4code apply response.md ./updated_project",
         "   python -m chat4code apply response.md ./updated_project --show-diff",
+        "   cat response.md | python -m chat4code apply - ./updated_project  # 从标准输入读取，边接收边写入",
         " ",
         "4. 任务提示处理: ",
         "   python -m chat4code export ./my_project project.md --task analyze  # 任务提示显示在屏幕",
@@ -69,6 +89,12 @@ def show_help(helper):
         "13. 调试解析: ",
         "    python -m chat4code debug-parse response.md",
         " ",
+        "14. 导出快照: ",
+        "    python -m chat4code snapshot list                      # 列出每次导出记录的快照",
+        "    python -m chat4code snapshot show 3                    # 显示快照中的文件清单",
+        "    python -m chat4code snapshot render 3 old.md           # 从快照重新生成导出文档",
+        "    python -m chat4code snapshot restore 3 ./restored      # 将快照中的文件恢复到目录",
+        " ",
         "支持的文件类型: ",
         ", ".join(helper.list_supported_extensions()),
         " "
@@ -94,6 +120,19 @@ def show_extensions(helper):
         print(f"  {ext}")
 
 
+def show_baselines(helper):
+    """显示已保存的导出基线"""
+    baselines = helper.list_baselines()
+    if not baselines:
+        print("ℹ️  没有导出基线")
+        return
+    print("=== 导出基线 ===")
+    for baseline in baselines:
+        print(f"{baseline['name']}  {baseline['export_time']}  {baseline['file_count']} 个文件  "
+              f"{baseline['output_file'] or ''}")
+        print(f"  源目录: {', '.join(baseline['source_dirs'])}")
+
+
 def show_task_format(helper, task_format):
     """显示任务格式要求"""
     print(helper.task_manager.show_task_format(task_format))
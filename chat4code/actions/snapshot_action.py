@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出快照动作处理器
+"""
+
+
+def process(args, helper):
+    """处理快照动作"""
+    if len(args.paths) < 1:
+        _show_snapshot_usage()
+        return
+
+    sub_action = args.paths[0]
+    action_handlers = {
+        'list': lambda: _handle_list(helper),
+        'show': lambda: _handle_show(args, helper),
+        'render': lambda: _handle_render(args, helper),
+        'restore': lambda: _handle_restore(args, helper)
+    }
+
+    handler = action_handlers.get(sub_action)
+    if handler:
+        handler()
+    else:
+        print(f"❌ 未知的 snapshot 子命令: {sub_action}")
+
+
+def _show_snapshot_usage():
+    """显示快照用法"""
+    print("❌ 错误: snapshot 操作需要指定子命令")
+    print("用法: python -m chat4code snapshot list")
+    print("     python -m chat4code snapshot show [编号]")
+    print("     python -m chat4code snapshot render [编号] [输出文件]")
+    print("     python -m chat4code snapshot restore <编号> <目标目录>")
+
+
+def _load_snapshot(helper, snapshot_arg):
+    """按编号读取快照（未指定时为最新的快照），不存在时输出错误并返回 None"""
+    snapshot_id = None
+    if snapshot_arg is not None:
+        try:
+            snapshot_id = int(snapshot_arg.lstrip('#'))
+        except ValueError:
+            print(f"❌ 错误: 无效的快照编号: {snapshot_arg}")
+            return None
+    snapshot = helper.load_snapshot(snapshot_id)
+    if snapshot is None:
+        print(f"❌ 错误: 未找到快照{' #' + str(snapshot_id) if snapshot_id is not None else ''}")
+    return snapshot
+
+
+def _handle_list(helper):
+    """列出所有快照"""
+    snapshots = helper.list_snapshots()
+    if not snapshots:
+        print("ℹ️  没有导出快照")
+        return
+    print("=== 导出快照 ===")
+    for snapshot in snapshots:
+        output_file = snapshot['output_file'] or '(控制台)'
+        print(f"#{snapshot['id']}  {snapshot['created']}  {snapshot['file_count']} 个文件  {output_file}")
+
+
+def _handle_show(args, helper):
+    """显示快照中的文件清单"""
+    snapshot = _load_snapshot(helper, args.paths[1] if len(args.paths) > 1 else None)
+    if snapshot is None:
+        return
+    print(f"📁 源目录: {', '.join(snapshot.source_dirs)}")
+    print(f"   输出文件: {snapshot.output_file or '(控制台)'}")
+    for snapshot_file in snapshot.files:
+        print(f"   {snapshot_file.blob[:12]}  {snapshot_file.kind:<7}  {snapshot_file.rel_path}")
+
+
+def _handle_render(args, helper):
+    """重新生成快照对应的导出文档"""
+    snapshot_arg = args.paths[1] if len(args.paths) > 1 else None
+    output_file = args.paths[2] if len(args.paths) > 2 else None
+    snapshot = _load_snapshot(helper, snapshot_arg)
+    if snapshot is None:
+        return
+    helper.render_snapshot(snapshot, output_file)
+    if output_file:
+        print(f"✅ 快照已生成到: {output_file}")
+
+
+def _handle_restore(args, helper):
+    """将快照中的文件恢复到目标目录"""
+    if len(args.paths) < 3:
+        print("❌ 错误: 需要指定快照编号和目标目录")
+        return
+    snapshot = _load_snapshot(helper, args.paths[1])
+    if snapshot is None:
+        return
+    restored, skipped = helper.restore_snapshot(snapshot, args.paths[2])
+    print(f"✅ 已恢复 {restored} 个文件到: {args.paths[2]}")
+    for rel_path in skipped:
+        print(f"⚠️  跳过未保存完整内容的文件: {rel_path}")
@@ -13,10 +13,7 @@ def process(args, helper):
 
     markdown_file = args.paths[0]
     try:
-        with open(markdown_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        validation_result = helper.validate_response_format(content, args.verbose)
+        validation_result = helper.validate_response_file(markdown_file, args.verbose)
 
         _display_validation_result(validation_result, args.verbose)
 
@@ -33,8 +30,10 @@ def _display_validation_result(validation_result, verbose):
 
     if validation_result['files']:
         print(f"  文件列表: ")
+        file_status = validation_result.get('file_status', {})
+        status_labels = {'existing': ' (已有文件)', 'new': ' (新文件)'}
         for file in validation_result['files']:
-            print(f"    - {file}")
+            print(f"    - {file}{status_labels.get(file_status.get(file), '')}")
 
     if validation_result['warnings']:
         print(f"  ⚠️  警告: ")
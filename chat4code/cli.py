@@ -15,6 +15,7 @@ from .actions import (
     validate_action,
     session_action,
     feature_action,
+    snapshot_action,
     config_action,
     debug_action,
     help_action
@@ -50,6 +51,10 @@ def main():
         help_action.show_tasks(helper)
         return
 
+    if args.list_baselines:
+        help_action.show_baselines(helper)
+        return
+
     if args.list_extensions:
         help_action.show_extensions(helper)
         return
@@ -65,6 +70,7 @@ def main():
         'validate': lambda: validate_action.process(args, helper),
         'session': lambda: session_action.process(args, session_manager),
         'feature': lambda: feature_action.process(args, feature_manager),
+        'snapshot': lambda: snapshot_action.process(args, helper),
         'config': lambda: config_action.process(args, helper),
         'debug-parse': lambda: debug_action.process(args, helper),
         'help': lambda: help_action.show_help(helper),
@@ -0,0 +1,158 @@
+"""
+chat4code 分块导出模块
+按 token / 字节预算把导出文件装箱到多个请求文件中：
+尽量让同一目录（及其子目录）的文件留在同一个分块里，并用降序首次适应法减少分块数量
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .repo_index import estimate_tokens_by_size
+
+
+class PackItem:
+    """装箱的最小单位：一个目录子树、一个目录中的直接文件，或单个文件"""
+
+    __slots__ = ('indices', 'size', 'tokens')
+
+    def __init__(self, indices: List[int], size: int, tokens: int):
+        self.indices = indices
+        self.size = size
+        self.tokens = tokens
+
+
+class _TreeNode:
+    __slots__ = ('name', 'depth', 'files', 'dirs', 'line_size', 'line_tokens')
+
+    def __init__(self, name: str, depth: int, line_size: int, line_tokens: int):
+        self.name = name
+        self.depth = depth
+        self.files: List[int] = []
+        self.dirs: Dict[str, '_TreeNode'] = {}
+        # 该目录在目录树中那一行的开销（根节点为 0）
+        self.line_size = line_size
+        self.line_tokens = line_tokens
+
+
+class ChunkPlanner:
+    """
+    分块规划器
+    file_costs 为每个导出文件的 (相对路径, 代码块字节数, 代码块 token 数)，按导出顺序排列；
+    base_size / base_tokens 为每个分块都会重复的头部（任务提示、目录树标题等）开销；
+    目录树中每个文件和目录所占的行由规划器自行计入
+    """
+
+    def __init__(self, max_size: Optional[int] = None, max_tokens: Optional[int] = None,
+                 base_size: int = 0, base_tokens: int = 0,
+                 estimate_tokens: Callable[[int], int] = estimate_tokens_by_size,
+                 dir_line_extra: int = 0):
+        self.max_size = max_size
+        self.max_tokens = max_tokens
+        self.cap_size = max_size - base_size if max_size else None
+        self.cap_tokens = max_tokens - base_tokens if max_tokens else None
+        self.estimate_tokens = estimate_tokens
+        # 目录项的额外开销（如目录树中的文件数和 token 数标注）
+        self.dir_line_extra = dir_line_extra
+        # 单个文件就超出预算的文件（仍会单独放入一个分块）
+        self.oversized: List[int] = []
+
+    def _fits(self, size: int, tokens: int) -> bool:
+        if self.cap_size is not None and size > self.cap_size:
+            return False
+        if self.cap_tokens is not None and tokens > self.cap_tokens:
+            return False
+        return True
+
+    def _weight(self, item: PackItem) -> float:
+        weight = 0.0
+        if self.cap_size:
+            weight = max(weight, item.size / self.cap_size)
+        if self.cap_tokens:
+            weight = max(weight, item.tokens / self.cap_tokens)
+        return weight
+
+    def _line_cost(self, depth: int, name: str, is_file: bool) -> Tuple[int, int]:
+        # 与目录树的格式一致："- `name`    " 或 "- name    "，加换行符
+        size = 4 * depth + len(name.encode('utf-8')) + (9 if is_file else 7 + self.dir_line_extra)
+        return size, self.estimate_tokens(size)
+
+    def plan(self, file_costs: Sequence[Tuple[str, int, int]]) -> List[List[int]]:
+        """返回分块列表，每个分块为导出文件的下标列表（保持原有导出顺序）"""
+        self.oversized = []
+        if not file_costs:
+            return []
+
+        root = _TreeNode('', -1, 0, 0)
+        file_cost: Dict[int, Tuple[int, int]] = {}
+        for index, (rel_path, size, tokens) in enumerate(file_costs):
+            parts = rel_path.replace('\\', '/').split('/')
+            node = root
+            for part in parts[:-1]:
+                child = node.dirs.get(part)
+                if child is None:
+                    child = _TreeNode(part, node.depth + 1, *self._line_cost(node.depth + 1, part, False))
+                    node.dirs[part] = child
+                node = child
+            node.files.append(index)
+            line_size, line_tokens = self._line_cost(len(parts) - 1, parts[-1], True)
+            file_cost[index] = (size + line_size, tokens + line_tokens)
+
+        items: List[PackItem] = []
+        self._collect_items(root, 0, 0, file_cost, items)
+        return self._pack(items)
+
+    def _subtree_cost(self, node: _TreeNode, file_cost: Dict[int, Tuple[int, int]]) -> Tuple[List[int], int, int]:
+        indices = list(node.files)
+        size = node.line_size + sum(file_cost[i][0] for i in node.files)
+        tokens = node.line_tokens + sum(file_cost[i][1] for i in node.files)
+        for child in node.dirs.values():
+            child_indices, child_size, child_tokens = self._subtree_cost(child, file_cost)
+            indices.extend(child_indices)
+            size += child_size
+            tokens += child_tokens
+        return indices, size, tokens
+
+    def _collect_items(self, node: _TreeNode, chain_size: int, chain_tokens: int,
+                       file_cost: Dict[int, Tuple[int, int]], items: List[PackItem]):
+        """
+        自顶向下拆分：整个子树放得下就作为一项；否则把目录中的直接文件作为一项，
+        再分别处理各个子目录。chain 为上级目录在目录树中的行开销
+        """
+        indices, size, tokens = self._subtree_cost(node, file_cost)
+        if self._fits(size + chain_size, tokens + chain_tokens):
+            items.append(PackItem(indices, size + chain_size, tokens + chain_tokens))
+            return
+
+        chain_size += node.line_size
+        chain_tokens += node.line_tokens
+        if node.files:
+            group_size = chain_size + sum(file_cost[i][0] for i in node.files)
+            group_tokens = chain_tokens + sum(file_cost[i][1] for i in node.files)
+            if self._fits(group_size, group_tokens):
+                items.append(PackItem(list(node.files), group_size, group_tokens))
+            else:
+                for i in node.files:
+                    items.append(PackItem([i], chain_size + file_cost[i][0], chain_tokens + file_cost[i][1]))
+        for child in node.dirs.values():
+            self._collect_items(child, chain_size, chain_tokens, file_cost, items)
+
+    def _pack(self, items: List[PackItem]) -> List[List[int]]:
+        """降序首次适应装箱；分块内和分块之间都按原有导出顺序排列"""
+        bins: List[PackItem] = []
+        oversized_chunks: List[List[int]] = []
+        for item in sorted(items, key=self._weight, reverse=True):
+            if not self._fits(item.size, item.tokens):
+                self.oversized.extend(item.indices)
+                oversized_chunks.append(item.indices)
+                continue
+            for chunk in bins:
+                if self._fits(chunk.size + item.size, chunk.tokens + item.tokens):
+                    chunk.indices.extend(item.indices)
+                    chunk.size += item.size
+                    chunk.tokens += item.tokens
+                    break
+            else:
+                bins.append(PackItem(list(item.indices), item.size, item.tokens))
+
+        chunks = [sorted(chunk.indices) for chunk in bins] + [sorted(indices) for indices in oversized_chunks]
+        chunks.sort(key=lambda indices: indices[0])
+        return chunks
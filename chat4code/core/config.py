@@ -34,7 +34,23 @@ class ConfigManager:
             "export_filename_pattern": "req.md",
             "import_filename_pattern": "resp.md",
             "export_output_dir": "./exports",
-            "import_output_dir": "./imports"
+            "import_output_dir": "./imports",
+            # 导出时并发读取文件的线程数
+            "export_jobs": 4,
+            # 遍历源目录时是否应用 .gitignore 规则
+            "use_gitignore": False,
+            "follow_symlinks": False,
+            # token 估算器：heuristic（默认）或 bpe（需要配置词表文件）
+            "token_estimator": "heuristic",
+            "token_vocab_file": None,
+            # 导出目录树：折叠只有单个子目录的目录链、为目录标注文件数和 token 数
+            "file_tree_collapse": False,
+            "file_tree_annotate": False,
+            "store_baseline_contents": False,
+            "record_snapshots": False,
+            "snapshot_limit": 100,
+            # 解析 #include "..." 时在包含文件所在目录之后依次尝试的目录（之后还会尝试各个源目录）
+            "include_roots": []
         }
         self.config = self.load_config()
 
@@ -133,6 +149,61 @@ class ConfigManager:
         """获取导入文件输出目录"""
         return self.config.get("import_output_dir", self.default_config["import_output_dir"])
 
+    def get_export_jobs(self) -> int:
+        """获取导出时并发读取文件的线程数"""
+        jobs = self.config.get("export_jobs", self.default_config["export_jobs"])
+        try:
+            return max(1, int(jobs))
+        except (TypeError, ValueError):
+            return self.default_config["export_jobs"]
+
+    def get_use_gitignore(self) -> bool:
+        """检查遍历源目录时是否应用 .gitignore 规则"""
+        return bool(self.config.get("use_gitignore", self.default_config["use_gitignore"]))
+
+    def get_follow_symlinks(self) -> bool:
+        """检查遍历源目录时是否进入指向目录的符号链接"""
+        return bool(self.config.get("follow_symlinks", self.default_config["follow_symlinks"]))
+
+    def get_token_estimator(self) -> str:
+        """获取 token 估算器名称"""
+        return self.config.get("token_estimator", self.default_config["token_estimator"])
+
+    def get_token_vocab_file(self) -> Optional[str]:
+        """获取 BPE 估算器使用的词表文件路径"""
+        return self.config.get("token_vocab_file", self.default_config["token_vocab_file"])
+
+    def get_file_tree_collapse(self) -> bool:
+        """检查导出目录树是否折叠单子目录链"""
+        return bool(self.config.get("file_tree_collapse", self.default_config["file_tree_collapse"]))
+
+    def get_file_tree_annotate(self) -> bool:
+        """检查导出目录树是否为目录标注文件数和 token 数"""
+        return bool(self.config.get("file_tree_annotate", self.default_config["file_tree_annotate"]))
+
+    def get_store_baseline_contents(self) -> bool:
+        """检查完整导出时是否在基线中保存文件内容（用于 --diff-context）"""
+        return bool(self.config.get("store_baseline_contents", self.default_config["store_baseline_contents"]))
+
+    def get_record_snapshots(self) -> bool:
+        """检查是否把每次导出记录为快照（默认关闭）"""
+        return bool(self.config.get("record_snapshots", self.default_config["record_snapshots"]))
+
+    def get_snapshot_limit(self) -> int:
+        """获取保留的导出快照数量（0 表示不限制）"""
+        limit = self.config.get("snapshot_limit", self.default_config["snapshot_limit"])
+        try:
+            return max(0, int(limit))
+        except (TypeError, ValueError):
+            return self.default_config["snapshot_limit"]
+
+    def get_include_roots(self) -> List[str]:
+        """获取解析 #include 使用的目录列表"""
+        roots = self.config.get("include_roots", self.default_config["include_roots"])
+        if isinstance(roots, str):
+            return [roots]
+        return list(roots or [])
+
     def init_config_file(self):
         """初始化配置文件和示例提示词文件"""
         if not os.path.exists(self.config_file):
@@ -0,0 +1,231 @@
+"""
+chat4code 依赖图模块
+从源文件中提取依赖（C/C++ 中用引号包含的 #include，Python 的 import），按文件缓存在元数据目录中，
+只有签名（大小、mtime_ns、inode）变化的文件才重新读取；
+导出时把依赖解析为扫描到的文件之间的边，求指定文件的传递闭包，或反向求依赖于指定文件的所有文件
+"""
+
+import ast
+import json
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from .docstore import find_stale, read_stale
+from .outline import C_FAMILY_EXTENSIONS, PYTHON_EXTENSIONS
+from .scanner import FileEntry
+
+DEPGRAPH_FILENAME = "dependency_graph.json"
+DEPGRAPH_VERSION = 1
+
+# 引号形式的 #include（尖括号形式视为系统或第三方头文件，不解析）
+_QUOTED_INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*"([^"\n]+)"', re.M)
+
+
+def supports_dependencies(ext: str) -> bool:
+    """是否能从该扩展名的文件中提取依赖"""
+    ext = ext.lower()
+    return ext in C_FAMILY_EXTENSIONS or ext in PYTHON_EXTENSIONS
+
+
+def extract_dependencies(content: str, ext: str) -> List[str]:
+    """提取文件中声明的依赖（未解析的原始写法，按出现顺序去重）"""
+    ext = ext.lower()
+    if ext in C_FAMILY_EXTENSIONS:
+        names = _QUOTED_INCLUDE_RE.findall(content)
+    elif ext in PYTHON_EXTENSIONS:
+        names = _python_imports(content)
+    else:
+        return []
+    return list(dict.fromkeys(name.strip() for name in names))
+
+
+def _python_imports(content: str) -> List[str]:
+    """
+    提取 Python 导入的模块名，相对导入以点开头（如 ..utils）
+    from 包 import 名称 同时记录 包 和 包.名称（名称可能是子模块）；语法错误时返回空列表
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = '.' * node.level + (node.module or '')
+            names.append(module)
+            separator = '' if module.endswith('.') else '.'
+            names.extend(module + separator + alias.name for alias in node.names if alias.name != '*')
+    return names
+
+
+class DependencyCache:
+    """
+    按文件缓存提取出的依赖，以文件的绝对路径为键
+    与仓库索引一样用 stat 签名判断文件是否变化，晚于上次保存时间修改的文件会重新读取
+    """
+
+    def __init__(self, metadata_dir: str):
+        self.metadata_dir = metadata_dir
+        self.cache_file = os.path.join(metadata_dir, DEPGRAPH_FILENAME)
+        # {绝对路径: [大小, mtime_ns, inode, [依赖, ...]]}
+        self.files: Dict[str, list] = {}
+        self.saved_ns = 0
+        self.dirty = False
+        self._synced = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != DEPGRAPH_VERSION:
+                return
+            self.saved_ns = data.get('saved_ns', 0)
+            self.files = data.get('files', {})
+        except Exception as e:
+            print(f"⚠️  加载依赖图缓存失败 {self.cache_file}: {e}，将重新建立")
+            self.files = {}
+
+    def save(self):
+        """保存缓存（没有变化时不写入）"""
+        if not self.dirty:
+            return
+        if not os.path.exists(self.metadata_dir):
+            os.makedirs(self.metadata_dir)
+        self.saved_ns = time.time_ns()
+        data = {'version': DEPGRAPH_VERSION, 'saved_ns': self.saved_ns, 'files': self.files}
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, self.cache_file)
+        self.dirty = False
+
+    def update(self, src_dirs: List[str], entries: Iterable[FileEntry], jobs: int = 1) -> int:
+        """
+        用一次扫描的结果更新缓存：只读取新增或签名变化的文件，
+        源目录中已不存在的文件从缓存中移除；返回重新读取的文件数
+        """
+        indexed = {key: cached[:3] for key, cached in self.files.items()}
+        stale, removed = find_stale(indexed, entries, src_dirs, self.saved_ns, self._synced)
+        for key, entry, content, signature in read_stale(stale, jobs):
+            self.files[key] = list(signature) + [extract_dependencies(content, entry.ext)]
+            self._synced.add(key)
+            self.dirty = True
+
+        for key in removed:
+            del self.files[key]
+        if removed:
+            self.dirty = True
+        return len(stale)
+
+    def dependencies(self, file_path: str) -> List[str]:
+        cached = self.files.get(os.path.abspath(file_path))
+        return cached[3] if cached else []
+
+
+class DependencyGraph:
+    """
+    文件之间的依赖图（以绝对路径表示文件）
+    known_files 为扫描到的所有文件，只有解析到其中的依赖才成为图中的边；
+    include_roots 为解析 #include 时依次尝试的目录（在包含文件所在目录之后），
+    也是解析 Python 绝对导入时尝试的目录（在文件所属顶层包的上级目录之后）
+    """
+
+    def __init__(self, cache: DependencyCache, known_files: Set[str], include_roots: List[str]):
+        self.cache = cache
+        self.known_files = known_files
+        self.include_roots = [os.path.abspath(root) for root in include_roots]
+        self._edges: Dict[str, List[str]] = {}
+        self._reverse: Optional[Dict[str, List[str]]] = None
+        self._package_roots: Dict[str, str] = {}
+
+    def _resolve_include(self, file_path: str, name: str) -> Optional[str]:
+        for base in [os.path.dirname(file_path)] + self.include_roots:
+            candidate = os.path.normpath(os.path.join(base, name))
+            if candidate in self.known_files:
+                return candidate
+        return None
+
+    def _package_root(self, dir_path: str) -> str:
+        """目录所属顶层包的上级目录（目录本身不是包时为目录本身）"""
+        root = self._package_roots.get(dir_path)
+        if root is None:
+            parent = os.path.dirname(dir_path)
+            if parent != dir_path and os.path.join(dir_path, '__init__.py') in self.known_files:
+                root = self._package_root(parent)
+            else:
+                root = dir_path
+            self._package_roots[dir_path] = root
+        return root
+
+    def _resolve_module(self, file_path: str, name: str) -> Optional[str]:
+        module = name.lstrip('.')
+        level = len(name) - len(module)
+        if level:
+            base = os.path.dirname(file_path)
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+            bases = [base]
+        else:
+            bases = [self._package_root(os.path.dirname(file_path))] + self.include_roots
+        parts = module.split('.') if module else []
+        for base in bases:
+            module_path = os.path.join(base, *parts)
+            for candidate in (module_path + '.py', os.path.join(module_path, '__init__.py')):
+                if candidate in self.known_files:
+                    return candidate
+        return None
+
+    def edges(self, file_path: str) -> List[str]:
+        """文件直接依赖的文件（已解析）"""
+        file_path = os.path.abspath(file_path)
+        resolved = self._edges.get(file_path)
+        if resolved is None:
+            resolved = []
+            resolve = (self._resolve_module if file_path.lower().endswith(PYTHON_EXTENSIONS)
+                       else self._resolve_include)
+            for name in self.cache.dependencies(file_path):
+                target = resolve(file_path, name)
+                if target is not None and target != file_path and target not in resolved:
+                    resolved.append(target)
+            self._edges[file_path] = resolved
+        return resolved
+
+    def closure(self, start_files: Iterable[str], depth: int = None) -> Set[str]:
+        """从起始文件出发（广度优先）的传递闭包，depth 限制依赖的层数（None 表示不限制）"""
+        return _breadth_first([os.path.abspath(path) for path in start_files], self.edges, depth)
+
+    def dependents(self, file_path: str) -> List[str]:
+        """直接依赖于该文件的文件（首次调用时建立反向边）"""
+        if self._reverse is None:
+            self._reverse = {}
+            for source in self.cache.files:
+                if source in self.known_files:
+                    for target in self.edges(source):
+                        self._reverse.setdefault(target, []).append(source)
+        return self._reverse.get(os.path.abspath(file_path), [])
+
+    def impacted_by(self, changed_files: Iterable[str], depth: int = None) -> Set[str]:
+        """直接或间接依赖于指定文件的所有文件（包括这些文件本身）"""
+        return _breadth_first([os.path.abspath(path) for path in changed_files], self.dependents, depth)
+
+
+def _breadth_first(start_files: List[str], neighbours, depth: Optional[int]) -> Set[str]:
+    visited = set(start_files)
+    queue = deque((path, 0) for path in start_files)
+    while queue:
+        path, level = queue.popleft()
+        if depth is not None and level >= depth:
+            continue
+        for target in neighbours(path):
+            if target not in visited:
+                visited.add(target)
+                queue.append((target, level + 1))
+    return visited
@@ -0,0 +1,154 @@
+"""
+chat4code 文档存储模块
+按文件 stat 签名（大小、mtime_ns、inode）增量维护的索引的公共部分：
+比较扫描结果找出需要重新读取和已经删除的文件、读取它们的内容，
+以及保存在元数据目录 SQLite 数据库中的文档索引基类（符号索引、相关性索引），
+子类只提供自己的表和保存单个文件提取结果的方法
+"""
+
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .reader import UNDECODABLE_CONTENT, iter_read_files
+from .scanner import FileEntry
+
+# (大小, mtime_ns, inode)
+Signature = Tuple[int, int, int]
+
+# 数据库结构的版本（保存在 PRAGMA user_version 中），不一致时丢弃旧的数据库重新建立索引
+DOCUMENT_INDEX_VERSION = 1
+
+_DOCS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+"""
+
+
+def find_stale(indexed: Dict[str, Signature], entries: Iterable[FileEntry], src_dirs: List[str],
+               saved_ns: int, synced: set) -> Tuple[List[Tuple[str, FileEntry]], List[str]]:
+    """
+    比较一次扫描的结果和已索引文件的签名 {绝对路径: 签名}，
+    返回 (需要重新读取的 [(绝对路径, 条目)], 源目录中已不存在的绝对路径)
+    签名相同但不早于上次保存时间修改的文件也重新读取（同一时间戳内的修改不改变签名），本进程中已读取过的除外
+    """
+    seen = set()
+    stale = []
+    for entry in entries:
+        key = os.path.abspath(entry.path)
+        seen.add(key)
+        signature = indexed.get(key)
+        if signature is not None and tuple(signature) == (entry.size, entry.mtime_ns, entry.inode) and \
+                (entry.mtime_ns < saved_ns or key in synced):
+            continue
+        stale.append((key, entry))
+
+    prefixes = tuple(os.path.join(os.path.abspath(src_dir), '') for src_dir in src_dirs)
+    removed = [key for key in indexed if key.startswith(prefixes) and key not in seen]
+    return stale, removed
+
+
+def read_stale(stale: List[Tuple[str, FileEntry]], jobs: int = 1
+               ) -> Iterator[Tuple[str, FileEntry, str, Signature]]:
+    """
+    按顺序读取需要重新索引的文件，产生 (绝对路径, 条目, 内容, 签名)
+    无法读取或解码的文件内容为空字符串；签名取读取时的 stat，没有时使用扫描时的签名
+    """
+    for (key, entry), read_result in zip(stale, iter_read_files((entry.path for _, entry in stale), jobs)):
+        content = read_result.content
+        if not read_result.digest or content is UNDECODABLE_CONTENT:
+            content = ""
+        stat_result = read_result.stat
+        signature = ((stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino) if stat_result
+                     else (entry.size, entry.mtime_ns, entry.inode))
+        yield key, entry, content, signature
+
+
+class DocumentIndex(ABC):
+    """
+    以文件的绝对路径标识文档、保存在 SQLite 中的索引
+    子类提供数据库文件名 db_filename、自己的表 schema（以 doc 列引用 docs.id）、
+    这些表的表名 doc_tables，以及保存单个文件提取结果的 _store()
+    """
+
+    db_filename = ""
+    schema = ""
+    doc_tables: Tuple[str, ...] = ()
+
+    def __init__(self, metadata_dir: str):
+        self.metadata_dir = metadata_dir
+        self.db_file = os.path.join(metadata_dir, self.db_filename)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._synced = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if not os.path.exists(self.metadata_dir):
+                os.makedirs(self.metadata_dir)
+            conn = sqlite3.connect(self.db_file)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != DOCUMENT_INDEX_VERSION:
+                # 新建的或旧版本的数据库：索引只是缓存，清空后重新建立
+                conn.close()
+                os.remove(self.db_file)
+                conn = sqlite3.connect(self.db_file)
+                conn.execute(f"PRAGMA user_version = {DOCUMENT_INDEX_VERSION}")
+            conn.executescript(_DOCS_SCHEMA + self.schema)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @abstractmethod
+    def _store(self, conn: sqlite3.Connection, doc_id: int, content: str, entry: FileEntry):
+        """从文件内容中提取数据并保存到子类的表中"""
+
+    def update(self, src_dirs: List[str], entries: Iterable[FileEntry], jobs: int = 1) -> int:
+        """
+        用一次扫描的结果更新索引：只读取新增或签名变化的文件，
+        源目录中已不在 entries 里的文件从索引中移除；返回重新索引的文件数
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'saved_ns'").fetchone()
+        saved_ns = int(row[0]) if row else 0
+        doc_ids = {}
+        indexed = {}
+        rows = conn.execute("SELECT id, path, size, mtime_ns, inode FROM docs")
+        for doc_id, path, size, mtime_ns, inode in rows:
+            doc_ids[path] = doc_id
+            indexed[path] = (size, mtime_ns, inode)
+        stale, removed = find_stale(indexed, entries, src_dirs, saved_ns, self._synced)
+        if not stale and not removed:
+            return 0
+
+        with conn:
+            for key in removed:
+                self._delete_doc(conn, doc_ids[key])
+            for key, entry, content, signature in read_stale(stale, jobs):
+                if key in doc_ids:
+                    self._delete_doc(conn, doc_ids[key])
+                doc_id = conn.execute("INSERT INTO docs (path, size, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+                                      (key,) + signature).lastrowid
+                self._store(conn, doc_id, content, entry)
+                self._synced.add(key)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('saved_ns', ?)",
+                         (str(time.time_ns()),))
+        return len(stale)
+
+    def _delete_doc(self, conn: sqlite3.Connection, doc_id: int):
+        for table in self.doc_tables:
+            conn.execute(f"DELETE FROM {table} WHERE doc = ?", (doc_id,))
+        conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
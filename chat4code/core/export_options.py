@@ -0,0 +1,79 @@
+"""
+chat4code 导出选项模块
+命令行中导出的可选功能（并发、基线、分块、统计、差异、骨架、依赖闭包、相关性、符号等）集中在一个对象中传递
+"""
+
+from typing import List, Optional
+
+
+class ExportOptions:
+    """
+    导出选项，未指定的项使用默认值或配置：
+    jobs              并发读取文件的线程数（默认使用配置 export_jobs）
+    use_gitignore     是否跳过 .gitignore 忽略的文件（None 表示使用配置 use_gitignore）
+    baseline          增量比较和保存元数据使用的命名基线（默认 default）
+    dry_run           只输出将要导出的文件摘要（增量导出时按目录列出变更），不写入文件和元数据
+    max_tokens        单个导出文件的 token 预算，超出时按目录装箱拆分为多个序列化文件（如 req1.md、req2.md）
+    max_bytes         单个导出文件的字节预算，拆分方式同 max_tokens
+    stats             输出按文件和目录汇总的 token 统计表
+    stats_json        同时把 token 统计保存为该 JSON 文件
+    diff_context      增量导出时基线中保存了内容的已修改文件只导出相对于基线的 unified diff，值为上下文行数
+    outline           Python 和 C/C++ 文件只导出骨架，函数体替换为带行号范围的标记
+    expand            "文件:起始行-结束行" 列表（文件相对于源目录），只导出这些文件中指定的行
+    closure           起始文件列表，只导出它们及其传递依赖（#include、import）
+    impacted_by       只导出直接或间接依赖于这些文件的文件
+    depth             closure / impacted_by 跟随依赖的最大层数
+    top_k             按 BM25 相关性对任务内容排序，只导出最相关的 N 个文件（最相关的排在前面）
+    relevance_budget  按相关性选择文件，估算的 token 总数不超过该值
+    symbols           只导出定义这些符号的文件
+    with_callers      symbols 同时导出引用这些符号的文件
+    """
+
+    __slots__ = ('jobs', 'use_gitignore', 'baseline', 'dry_run', 'max_tokens', 'max_bytes', 'stats',
+                 'stats_json', 'diff_context', 'outline', 'expand', 'closure', 'impacted_by', 'depth',
+                 'top_k', 'relevance_budget', 'symbols', 'with_callers')
+
+    def __init__(self, jobs: int = None, use_gitignore: bool = None, baseline: str = None,
+                 dry_run: bool = False, max_tokens: int = None, max_bytes: int = None,
+                 stats: bool = False, stats_json: str = None, diff_context: int = None,
+                 outline: bool = False, expand: List[str] = None, closure: List[str] = None,
+                 impacted_by: List[str] = None, depth: int = None, top_k: int = None,
+                 relevance_budget: int = None, symbols: List[str] = None, with_callers: bool = False):
+        self.jobs: Optional[int] = jobs
+        self.use_gitignore: Optional[bool] = use_gitignore
+        self.baseline: Optional[str] = baseline
+        self.dry_run = dry_run
+        self.max_tokens: Optional[int] = max_tokens
+        self.max_bytes: Optional[int] = max_bytes
+        self.stats = stats
+        self.stats_json: Optional[str] = stats_json
+        self.diff_context: Optional[int] = diff_context
+        self.outline = outline
+        self.expand: Optional[List[str]] = expand
+        self.closure: Optional[List[str]] = closure
+        self.impacted_by: Optional[List[str]] = impacted_by
+        self.depth: Optional[int] = depth
+        self.top_k: Optional[int] = top_k
+        self.relevance_budget: Optional[int] = relevance_budget
+        self.symbols: Optional[List[str]] = symbols
+        self.with_callers = with_callers
+
+    def copy(self) -> 'ExportOptions':
+        options = ExportOptions()
+        for name in self.__slots__:
+            setattr(options, name, getattr(self, name))
+        return options
+
+    @property
+    def chunked(self) -> bool:
+        """是否按预算拆分为多个文件"""
+        return bool(self.max_tokens or self.max_bytes)
+
+    @property
+    def ranked(self) -> bool:
+        """是否按相关性选择文件"""
+        return bool(self.top_k or self.relevance_budget)
+
+    @property
+    def wants_stats(self) -> bool:
+        return bool(self.stats or self.stats_json)
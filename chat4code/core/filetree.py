@@ -0,0 +1,114 @@
+"""
+chat4code 目录树模块
+用前缀树构建导出文件的目录结构，一次遍历生成 Markdown 列表；
+支持折叠只有单个子目录的目录链，以及为目录标注文件数和 token 总数
+"""
+
+from typing import Dict, List, Optional
+
+
+class TreeNode:
+    """前缀树节点：目录或文件"""
+
+    __slots__ = ('name', 'children', 'is_file', 'file_count', 'tokens')
+
+    def __init__(self, name: str, is_file: bool = False):
+        self.name = name
+        # 子节点以排序键为键：文件为文件名，目录为目录名加 '/'，
+        # 按键排序即与按完整路径字符串排序的结果一致，同名的文件和目录也不会冲突
+        self.children: Optional[Dict[str, 'TreeNode']] = None if is_file else {}
+        self.is_file = is_file
+        # 目录：子树中的文件数；文件：同一路径出现的次数（多个源目录中可能有相同的相对路径）
+        self.file_count = 0
+        self.tokens = 0
+
+
+class FileTree:
+    """导出文件的目录前缀树"""
+
+    def __init__(self):
+        self.root = TreeNode('')
+        # 目录路径到节点的映射，同一目录下的后续文件无需再逐级查找
+        self._dirs: Dict[str, TreeNode] = {'': self.root}
+        self._counted = True
+
+    def _dir_node(self, dir_path: str) -> TreeNode:
+        node = self._dirs.get(dir_path)
+        if node is None:
+            parent_path, _, name = dir_path.rpartition('/')
+            parent = self._dir_node(parent_path)
+            key = name + '/'
+            node = parent.children.get(key)
+            if node is None:
+                node = parent.children[key] = TreeNode(name)
+            self._dirs[dir_path] = node
+        return node
+
+    def add(self, rel_path: str, tokens: int = 0):
+        """添加一个文件（路径分隔符可以是 / 或 \\）"""
+        if '\\' in rel_path:
+            rel_path = rel_path.replace('\\', '/')
+        dir_path, _, name = rel_path.rpartition('/')
+        node = self._dir_node(dir_path)
+        leaf = node.children.get(name)
+        if leaf is None:
+            leaf = node.children[name] = TreeNode(name, is_file=True)
+        leaf.file_count += 1
+        leaf.tokens += tokens
+        self._counted = False
+
+    def add_all(self, rel_paths, file_tokens: Dict[str, int] = None):
+        """批量添加文件，file_tokens 为 {路径: token 数}"""
+        for rel_path in rel_paths:
+            self.add(rel_path, file_tokens.get(rel_path, 0) if file_tokens else 0)
+
+    def _count(self):
+        """按需汇总每个目录的文件数和 token 数（后序遍历）"""
+        if self._counted:
+            return
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for child in node.children.values() if not child.is_file)
+        for node in reversed(order):
+            node.file_count = 0
+            node.tokens = 0
+            for child in node.children.values():
+                node.file_count += child.file_count
+                node.tokens += child.tokens
+        self._counted = True
+
+    def render(self, collapse: bool = False, annotate: bool = False) -> List[str]:
+        """
+        生成目录树的列表项（不含标题）
+        collapse 为 True 时把只有一个子目录、没有文件的目录链合并为一项（如 src/main/java）
+        annotate 为 True 时在目录项后标注文件数和 token 总数
+        """
+        if annotate:
+            self._count()
+        lines = []
+        # 栈中保存 (节点, 深度)，子节点逆序入栈以保证按名称顺序输出
+        stack = [(self.root.children[key], 0) for key in sorted(self.root.children, reverse=True)]
+        while stack:
+            node, depth = stack.pop()
+            indent = "    " * depth
+            if node.is_file:
+                lines.extend([f"{indent}- `{node.name}`    "] * node.file_count)
+                continue
+
+            name = node.name
+            if collapse:
+                while len(node.children) == 1:
+                    only_child = next(iter(node.children.values()))
+                    if only_child.is_file:
+                        break
+                    node = only_child
+                    name = f"{name}/{node.name}"
+            if annotate:
+                lines.append(f"{indent}- {name} ({node.file_count} 个文件, ~{node.tokens:,} tokens)    ")
+            else:
+                lines.append(f"{indent}- {name}    ")
+            stack.extend((node.children[key], depth + 1) for key in sorted(node.children, reverse=True))
+        return lines
@@ -0,0 +1,144 @@
+"""
+chat4code git 变更检测模块
+在 git 仓库中直接向本地仓库查询变更文件，不需要导出基线，也不需要计算文件哈希：
+- 相对于 HEAD：一次 git status --porcelain -z（已暂存、未暂存和未跟踪的文件）
+- 相对于指定版本：git diff --name-status -z <rev>，再加上未跟踪的文件
+"""
+
+import os
+import subprocess
+from typing import List, Optional, Tuple
+
+from .gitignore import find_repo_root
+
+GIT_MODE = "git"
+
+
+class GitChangeError(Exception):
+    """无法通过 git 获取变更（不是 git 仓库、git 不可用或版本不存在）"""
+
+
+def parse_incremental_value(value: str):
+    """
+    检查命令行中 --incremental=VALUE 的取值（命令行和交互模式共用）
+    空字符串（单独的 --incremental）返回 True，git 或 git:REV 原样返回，其他取值抛出 ValueError
+    """
+    if value == '':
+        return True
+    if value == GIT_MODE or value.startswith(GIT_MODE + ':'):
+        return value
+    raise ValueError(f"无效的取值 '{value}'（应为 git 或 git:REV）")
+
+
+def parse_incremental_mode(incremental) -> Tuple[bool, Optional[str]]:
+    """
+    解析 --incremental 的取值
+    返回 (是否使用 git 模式, 比较的版本)；"git" 比较 HEAD 和工作区，"git:<rev>" 比较指定版本
+    """
+    if not isinstance(incremental, str):
+        return False, None
+    mode, _, rev = incremental.partition(':')
+    if mode != GIT_MODE:
+        return False, None
+    return True, rev or None
+
+
+def _run_git(repo_root: str, args: List[str]) -> bytes:
+    try:
+        result = subprocess.run(['git', '-C', repo_root] + args,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except OSError as e:
+        raise GitChangeError(f"无法运行 git: {e}")
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip()
+        raise GitChangeError(message or f"git {args[0]} 失败")
+    return result.stdout
+
+
+def _split_z(output: bytes) -> List[str]:
+    return [os.fsdecode(item) for item in output.split(b'\0') if item]
+
+
+class GitChanges:
+    """git 报告的变更文件（相对于源目录、以系统分隔符连接的路径）"""
+
+    __slots__ = ('added', 'modified', 'deleted')
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.modified: List[str] = []
+        self.deleted: List[str] = []
+
+    def _add(self, status: str, path: str):
+        if status in ('?', 'A'):
+            self.added.append(path)
+        elif status == 'D':
+            self.deleted.append(path)
+        else:
+            self.modified.append(path)
+
+
+def _parse_status(output: bytes) -> GitChanges:
+    """解析 git status --porcelain -z（已禁用重命名检测，每项为 "XY 路径"）"""
+    changes = GitChanges()
+    for item in _split_z(output):
+        status, path = item[:2], item[3:]
+        if 'D' in status:
+            changes._add('D', path)
+        elif status == '??' or 'A' in status:
+            changes._add('A', path)
+        else:
+            changes._add('M', path)
+    return changes
+
+
+def _parse_name_status(output: bytes) -> GitChanges:
+    """解析 git diff --name-status -z（已禁用重命名检测，每项为 状态、路径 两个字段）"""
+    changes = GitChanges()
+    items = _split_z(output)
+    for i in range(0, len(items) - 1, 2):
+        changes._add(items[i][:1], items[i + 1])
+    return changes
+
+
+def git_changed_files(src_dir: str, rev: str = None) -> GitChanges:
+    """
+    获取源目录中相对于 rev（默认 HEAD）变更的文件
+    .gitignore 忽略的未跟踪文件不包括在内
+    """
+    repo_root = find_repo_root(src_dir)
+    if repo_root is None:
+        raise GitChangeError(f"{src_dir} 不在 git 仓库中")
+
+    prefix = os.path.relpath(os.path.abspath(src_dir), repo_root).replace(os.sep, '/')
+    pathspec = '.' if prefix == os.curdir else prefix
+
+    if rev is None:
+        changes = _parse_status(_run_git(
+            repo_root, ['status', '--porcelain', '-z', '--untracked-files=all', '--no-renames',
+                        '--', pathspec]))
+    else:
+        changes = _parse_name_status(_run_git(
+            repo_root, ['diff', '--name-status', '-z', '--no-renames', rev, '--', pathspec]))
+        # git diff <rev> 不报告未跟踪的文件，也没有只读的 git 命令能在一次调用中同时比较版本和列出未跟踪文件，
+        # 因此再调用一次 ls-files（不能用 git add -N 之类会修改索引的方法）
+        changes.added.extend(_split_z(_run_git(
+            repo_root, ['ls-files', '--others', '--exclude-standard', '-z', '--', pathspec])))
+
+    changes.added = _relative_to(changes.added, pathspec)
+    changes.modified = _relative_to(changes.modified, pathspec)
+    changes.deleted = _relative_to(changes.deleted, pathspec)
+    return changes
+
+
+def _relative_to(paths: List[str], pathspec: str) -> List[str]:
+    """将相对于仓库根目录的路径转换为相对于源目录的路径"""
+    result = set()
+    for path in paths:
+        path = path.rstrip('/')
+        if pathspec != '.':
+            if not path.startswith(pathspec + '/'):
+                continue
+            path = path[len(pathspec) + 1:]
+        result.add(path.replace('/', os.sep))
+    return sorted(result)
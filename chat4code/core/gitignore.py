@@ -0,0 +1,231 @@
+"""
+chat4code .gitignore 支持模块
+读取仓库根目录及子目录中的 .gitignore 和 .git/info/exclude，
+按 git 的语义（否定、锚定、目录规则、**）判断路径是否被忽略
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+class GitIgnoreRule:
+    """单条忽略规则，正则匹配相对于仓库根目录、以 / 分隔的路径"""
+
+    __slots__ = ('pattern', 'regex', 'negate', 'dir_only')
+
+    def __init__(self, pattern: str, regex, negate: bool, dir_only: bool):
+        self.pattern = pattern
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+    def __repr__(self):
+        return f"GitIgnoreRule({self.pattern!r})"
+
+
+def _translate_glob(pattern: str) -> str:
+    """将 gitignore 通配符转换为正则（* 和 ? 不匹配 /，** 跨目录）"""
+    i, n = 0, len(pattern)
+    result = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/') and \
+                    (i + 2 == n or pattern[i + 2] == '/'):
+                if i + 2 == n:
+                    # 末尾的 /** 匹配目录下的所有内容
+                    result.append('.*')
+                    i += 2
+                else:
+                    # **/ 匹配零个或多个目录
+                    result.append('(?:.*/)?')
+                    i += 3
+                continue
+            while i < n and pattern[i] == '*':
+                i += 1
+            result.append('[^/]*')
+            continue
+        if c == '?':
+            result.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                # 没有闭合的 [ 按普通字符处理
+                result.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                result.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return ''.join(result)
+
+
+def parse_gitignore_line(line: str, base: str) -> Optional[GitIgnoreRule]:
+    """
+    解析一行 gitignore 规则
+    base 为规则文件所在目录（相对于仓库根目录，根目录为空字符串）
+    """
+    line = line.rstrip('\n').rstrip('\r')
+    # 去掉未转义的行尾空格
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+
+    negate = False
+    if line.startswith('!'):
+        negate = True
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = False
+    if line.endswith('/'):
+        dir_only = True
+        line = line.rstrip('/')
+    if not line:
+        return None
+
+    # 开头或中间包含 / 的规则相对于 .gitignore 所在目录锚定，否则匹配任意层级
+    anchored = '/' in line
+    if line.startswith('/'):
+        line = line[1:]
+
+    prefix = re.escape(base + '/') if base else ''
+    body = _translate_glob(line)
+    if not anchored:
+        body = '(?:.*/)?' + body
+    regex = re.compile(prefix + body + r'\Z', re.DOTALL)
+    return GitIgnoreRule(('!' if negate else '') + line + ('/' if dir_only else ''),
+                         regex, negate, dir_only)
+
+
+def find_repo_root(path: str) -> Optional[str]:
+    """向上查找包含 .git 的目录"""
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _git_dir(repo_root: str) -> Optional[str]:
+    """获取 git 目录（支持 worktree 中的 .git 文件）"""
+    git_path = os.path.join(repo_root, '.git')
+    if os.path.isdir(git_path):
+        return git_path
+    try:
+        with open(git_path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if content.startswith('gitdir:'):
+            git_dir = content[len('gitdir:'):].strip()
+            return os.path.normpath(os.path.join(repo_root, git_dir))
+    except OSError:
+        pass
+    return None
+
+
+class GitIgnoreMatcher:
+    """
+    仓库级别的忽略规则集合
+    每个目录的有效规则 = 上级目录的规则 + 本目录 .gitignore 的规则，按需加载并缓存；
+    判断时从后往前查找，最后一条匹配的规则决定结果（更深的 .gitignore 优先）
+    """
+
+    def __init__(self, root: str, load_info_exclude: bool = True):
+        self.root = os.path.abspath(root)
+        self._dir_rules: Dict[str, Tuple[GitIgnoreRule, ...]] = {}
+
+        base_rules: List[GitIgnoreRule] = []
+        if load_info_exclude:
+            git_dir = _git_dir(self.root)
+            if git_dir:
+                base_rules.extend(self._read_rules(os.path.join(git_dir, 'info', 'exclude'), ''))
+        self._base_rules = tuple(base_rules)
+
+    @classmethod
+    def for_path(cls, path: str) -> 'GitIgnoreMatcher':
+        """为某个目录创建匹配器：优先使用所在 git 仓库的根目录"""
+        root = find_repo_root(path)
+        return cls(root if root else path)
+
+    def relative_path(self, path: str) -> Optional[str]:
+        """将路径转换为相对于仓库根目录、以 / 分隔的形式；不在仓库内时返回 None"""
+        rel_path = os.path.relpath(os.path.abspath(path), self.root)
+        if rel_path == os.curdir:
+            return ''
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return None
+        return rel_path.replace(os.sep, '/')
+
+    @staticmethod
+    def _read_rules(file_path: str, base: str) -> List[GitIgnoreRule]:
+        rules = []
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    rule = parse_gitignore_line(line, base)
+                    if rule is not None:
+                        rules.append(rule)
+        except OSError:
+            pass
+        return rules
+
+    def rules_for_dir(self, rel_dir: str) -> Tuple[GitIgnoreRule, ...]:
+        """获取目录内路径适用的所有规则（按优先级从低到高）"""
+        rules = self._dir_rules.get(rel_dir)
+        if rules is not None:
+            return rules
+        if rel_dir:
+            parent = rel_dir.rsplit('/', 1)[0] if '/' in rel_dir else ''
+            inherited = self.rules_for_dir(parent)
+            gitignore_file = os.path.join(self.root, *rel_dir.split('/'), '.gitignore')
+        else:
+            inherited = self._base_rules
+            gitignore_file = os.path.join(self.root, '.gitignore')
+        own_rules = self._read_rules(gitignore_file, rel_dir)
+        rules = inherited + tuple(own_rules) if own_rules else inherited
+        self._dir_rules[rel_dir] = rules
+        return rules
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        判断路径本身是否被忽略（不检查上级目录，遍历时上级目录已被剪枝）
+        rel_path 为相对于仓库根目录、以 / 分隔的路径
+        """
+        if is_dir and (rel_path == '.git' or rel_path.endswith('/.git')):
+            return True
+        parent = rel_path.rsplit('/', 1)[0] if '/' in rel_path else ''
+        for rule in reversed(self.rules_for_dir(parent)):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path):
+                return not rule.negate
+        return False
+
+    def is_path_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """判断路径是否被忽略，包括任一上级目录被忽略的情况"""
+        parts = rel_path.split('/')
+        for i in range(1, len(parts)):
+            if self.is_ignored('/'.join(parts[:i]), True):
+                return True
+        return self.is_ignored(rel_path, is_dir)
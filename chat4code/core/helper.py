@@ -3,18 +3,45 @@
 chat4code 核心模块
 """
 
+import difflib
 import os
-import json
-import hashlib
+import sys
+import time
 import re
 from datetime import datetime
-from typing import List, Tuple, Dict, Optional, Set
+from typing import List, Tuple, Dict, Optional, Set, Iterable, Iterator, Union
 from .tasks import TaskManager
-from .parser import ResponseParser
+from .parser import (ParsedFile, PrefixedLineFinder, ResponseParser, StreamingResponseParser, iter_chunks,
+                     map_response, open_response)
 from .validator import ResponseValidator
 from .config import ConfigManager
 from .features import FeatureManager
-import fnmatch
+from .scanner import DirectoryScanner, FileEntry, FileInventory
+from .reader import UNDECODABLE_CONTENT, iter_read_files
+from .matcher import ExcludeMatcher
+from .repo_index import RepoIndex
+from .chunker import ChunkPlanner
+from .export_options import ExportOptions
+from .filetree import FileTree
+from .tokens import TokenEstimator, TokenStats, create_token_estimator
+from .metadata_store import MetadataStore, DEFAULT_BASELINE
+from .objects import ObjectStore
+from .snapshots import KIND_DIFF, KIND_FILE, KIND_NOTE, KIND_OUTLINE, SNAPSHOT_DB_FILENAME, SnapshotBuilder, SnapshotStore
+from .gitchanges import GitChangeError, git_changed_files, parse_incremental_mode
+from .merkle import MerkleDiff, build_tree, compute_digests, compute_stat_digests, diff_tree, iter_nodes
+from .outline import extract_line_ranges, outline_source, parse_expand_specs
+from .depgraph import DependencyCache, DependencyGraph, supports_dependencies
+from .relevance import RelevanceIndex
+from .symbols import SymbolIndex, supports_symbols
+
+# 未读取内容、只按大小和修改时间记录的文件指纹前缀
+STAT_FINGERPRINT_PREFIX = "stat:"
+
+# 分块规划时每个文件内容的最小开销（无法读取的文件会写入一行提示文字）
+CHUNK_MIN_CONTENT_SIZE = 64
+# 目录树标注文件数和 token 数时，每个目录项增加的最大字节数
+CHUNK_TREE_ANNOTATION_SIZE = 48
+
 
 class CodeProjectAIHelper:
     def __init__(self):
@@ -26,6 +53,15 @@ class CodeProjectAIHelper:
         self.default_extensions = self.config_manager.get_extensions()
         self.metadata_dir = self.config_manager.get_metadata_dir()
         self.exclude_patterns = self.config_manager.get_exclude_patterns()
+        self._exclude_matchers: Dict[tuple, ExcludeMatcher] = {}
+        self._repo_index: Optional[RepoIndex] = None
+        self._metadata_store: Optional[MetadataStore] = None
+        self._object_store: Optional[ObjectStore] = None
+        self._snapshot_store: Optional[SnapshotStore] = None
+        self._dependency_cache: Optional[DependencyCache] = None
+        self._relevance_index: Optional[RelevanceIndex] = None
+        self._symbol_index: Optional[SymbolIndex] = None
+        self._token_estimator: Optional[TokenEstimator] = None
 
         # 初始化子模块（传递配置中的提示词文件路径）
         prompts_file = self.config_manager.get("prompts_file", None)
@@ -56,21 +92,17 @@ class CodeProjectAIHelper:
         # 分离文件名和扩展名
         base_name, ext = os.path.splitext(pattern)
 
-        # 获取目录中已有的文件
-        existing_files = []
-        if os.path.exists(output_dir):
-            for file in os.listdir(output_dir):
-                if file.startswith(base_name) and file.endswith(ext):
-                    existing_files.append(file)
-
-        # 找到最大的序列号
+        # 在目录中已有的文件里找到最大的序列号（匹配 req1.md, req2.md 这样的模式）
+        pattern_re = re.compile(rf'{re.escape(base_name)}(\d+){re.escape(ext)}')
         max_num = 0
-        for file in existing_files:
-            # 匹配 req1.md, req2.md 这样的模式
-            match = re.match(rf'{re.escape(base_name)}(\d+){re.escape(ext)}', file)
-            if match:
-                num = int(match.group(1))
-                max_num = max(max_num, num)
+        try:
+            with os.scandir(output_dir) as it:
+                for dir_entry in it:
+                    match = pattern_re.match(dir_entry.name)
+                    if match and dir_entry.name.endswith(ext):
+                        max_num = max(max_num, int(match.group(1)))
+        except OSError:
+            pass
 
         # 生成下一个序列号
         next_num = max_num + 1
@@ -116,58 +148,55 @@ class CodeProjectAIHelper:
 
         return matched_dirs
 
-    def _generate_file_tree(self, exported_files: List[str]) -> List[str]:
+    def _generate_file_tree(self, exported_files: List[str],
+                            file_tokens: Dict[str, int] = None) -> List[str]:
         """
         根据导出的文件列表生成目录结构的 Markdown 列表。
+        使用前缀树构建，一次遍历输出；可通过配置折叠单子目录链、为目录标注文件数和 token 数
+        file_tokens 为 {相对路径: token 数}，仅在标注目录时使用
         """
         if not exported_files:
             return []
 
         tree_lines = ["# 项目文件组织结构", "", "*此目录结构列出了本次导出包含的所有文件*", ""]
 
-        # 对文件路径进行排序以确保一致的输出
-        sorted_files = sorted(exported_files)
-
-        # 用于跟踪上一个处理的路径，以优化缩进计算
-        previous_parts = []
-
-        for file_path in sorted_files:
-            # 将路径拆分为组件
-            parts = file_path.replace('\\', '/').split('/')  # 统一使用 '/' 作为分隔符
-            current_path = ""
-
-            # 遍历路径的每个部分
-            for i, part in enumerate(parts):
-                current_path = '/'.join(parts[:i + 1])  # 构建当前路径
-                is_last_part = (i == len(parts) - 1)  # 检查是否是最后一个部分（文件名）
-
-                # 计算当前部分的缩进
-                indent = "    " * i
-
-                # 构造列表项
-                list_item = f"{indent}- {part}    " if not is_last_part else f"{indent}- `{part}`    "
-
-                # 检查该项是否已经添加过（避免重复的目录项）
-                # 我们只在它是文件（最后一部分）或者是一个新目录时添加
-                if is_last_part or current_path not in ['/'.join(previous_parts[:j + 1]) for j in range(i + 1)]:
-                    tree_lines.append(list_item)
-
-            # 更新 previous_parts 为当前路径的组件
-            previous_parts = parts
+        tree = FileTree()
+        tree.add_all(exported_files, file_tokens)
+        tree_lines.extend(tree.render(collapse=self.config_manager.get_file_tree_collapse(),
+                                      annotate=self.config_manager.get_file_tree_annotate()))
 
         tree_lines.append("    ")  # 在末尾添加一个空行
         return tree_lines
 
+    def _tree_file_tokens(self, export_entries: List[Tuple[str, str]],
+                          repo_index: RepoIndex) -> Optional[Dict[str, int]]:
+        """
+        目录树标注 token 数时使用的 {相对路径: token 数}
+        目录树在读取文件之前写出，因此使用索引中缓存的 token 数（未导出过的文件按大小估算）
+        """
+        if not self.config_manager.get_file_tree_annotate():
+            return None
+        file_tokens = {}
+        for file_path, rel_path in export_entries:
+            indexed = repo_index.get(file_path)
+            if indexed is not None:
+                file_tokens[rel_path] = file_tokens.get(rel_path, 0) + indexed.tokens
+        return file_tokens
+
     def export_to_markdown(self, src_dirs: List[str] = None, output_file: str = None,
                            extensions: tuple = None, task: str = None,
-                           incremental: bool = False, since_time: str = None,
+                           incremental: Union[bool, str] = False, since_time: str = None,
                            include_task_prompt: bool = False,
-                           custom_task_content: str = None) -> str:
+                           custom_task_content: str = None,
+                           options: ExportOptions = None) -> str:
         """
         导出代码到Markdown，支持增量导出和智能任务提示
+        incremental 为 "git" 或 "git:<rev>" 时通过本地 git 仓库获取变更文件（相对于 HEAD 或指定版本），
+        不需要导出基线，也不计算文件哈希
         默认任务提示显示在屏幕上，使用 --task-prompt 时包含在导出文件中
         支持多个源目录和模式匹配
         添加了 custom_task_content 参数用于自定义任务内容
+        options 为其余的导出选项（ExportOptions）；分块导出时返回第一个分块的文件名，预演时返回 None
         """
         # 使用配置中的默认值
         if src_dirs is None:
@@ -179,32 +208,94 @@ class CodeProjectAIHelper:
         if extensions is None:
             extensions = self.default_extensions
 
+        options = options.copy() if options is not None else ExportOptions()
+        if options.jobs is None:
+            options.jobs = self.config_manager.get_export_jobs()
+
+        if not options.baseline:
+            options.baseline = DEFAULT_BASELINE
+
+        expand_ranges = parse_expand_specs(options.expand) if options.expand else None
+
         # 检查所有源目录是否存在
         for src_dir in matched_src_dirs:
             if not os.path.exists(src_dir):
                 raise FileNotFoundError(f"源目录不存在: {src_dir}")
 
+        # 分块导出时，每个分块按序列化文件名依次命名（指定了输出文件时以它为模板）
+        chunk_pattern = chunk_dir = None
+        if options.chunked and not options.dry_run:
+            if output_file:
+                chunk_pattern = os.path.basename(output_file)
+                chunk_dir = os.path.dirname(output_file) or "."
+            else:
+                chunk_pattern = self.config_manager.get_export_filename_pattern()
+                chunk_dir = self.config_manager.get_export_output_dir()
+            output_file = self.get_next_sequential_filename(chunk_pattern, chunk_dir)
+
         # 如果没有指定输出文件，使用序列化文件名
-        if output_file is None:
+        if output_file is None and not options.dry_run:
             export_pattern = self.config_manager.get_export_filename_pattern()
             export_dir = self.config_manager.get_export_output_dir()
             output_file = self.get_next_sequential_filename(export_pattern, export_dir)
             print(f"ℹ️  使用自动序列化文件名: {output_file}")
 
         # 确保输出目录存在
-        output_dir = os.path.dirname(output_file)
-        if output_dir and not os.path.exists(output_dir):
+        output_dir = os.path.dirname(output_file) if output_file else ''
+        if output_dir and not options.dry_run and not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
+        # 只遍历一次源目录，后续的类型检测、增量比较、导出和元数据保存都复用这份清单
+        inventory = self._scan_source_dirs(matched_src_dirs, use_gitignore=options.use_gitignore)
+        repo_index = self._sync_repo_index(matched_src_dirs, inventory)
+
         # 检测 项目类型（支持配置强制指定）
-        project_type = self._detect_project_type_multi(matched_src_dirs, extensions)
+        project_type = self._detect_project_type_multi(matched_src_dirs, extensions, inventory)
 
         # 如果是增量导出，获取变更的文件
         changed_files = None
+        change_reports = {}
+        git_mode, git_rev = parse_incremental_mode(incremental)
         if incremental:
-            changed_files = self._get_changed_files_multi(matched_src_dirs, since_time)
-
-        markdown_lines = []
+            changed_files = self._get_changed_files_multi(matched_src_dirs, since_time, inventory,
+                                                          extensions, options.baseline, change_reports,
+                                                          git_mode, git_rev)
+
+        # 依赖闭包、符号查找：只导出选出的文件
+        selected_files = None
+        if options.closure or options.impacted_by:
+            selected_files = self._resolve_closure_files(matched_src_dirs, inventory, options.closure,
+                                                         options.impacted_by, options.depth, options.jobs)
+        if options.symbols:
+            symbol_files = self._resolve_symbol_files(matched_src_dirs, inventory, options.symbols,
+                                                      options.with_callers, options.jobs)
+            selected_files = symbol_files if selected_files is None else selected_files | symbol_files
+
+        if options.dry_run:
+            export_entries = self._collect_export_files(inventory, matched_src_dirs, extensions, changed_files,
+                                                        selected_files)
+            if expand_ranges:
+                export_entries = self._filter_expand_entries(export_entries, expand_ranges)
+            if options.ranked:
+                export_entries = self._rank_export_entries(export_entries, matched_src_dirs, inventory, extensions,
+                                                           custom_task_content, options.top_k,
+                                                           options.relevance_budget, repo_index, options.jobs)
+            self._print_dry_run_summary(matched_src_dirs, export_entries, extensions,
+                                        change_reports,
+                                        options.baseline if incremental and not since_time and not git_mode
+                                        else None)
+            if options.wants_stats:
+                # 预演时不读取文件，使用索引中缓存的 token 数（未导出过的文件按大小估算）
+                token_stats = self._new_token_stats()
+                for file_path, rel_path in export_entries:
+                    indexed = repo_index.get(file_path)
+                    if indexed is not None:
+                        token_stats.add(rel_path, indexed.size, indexed.tokens)
+                self._report_token_stats(token_stats, options.stats, options.stats_json)
+            repo_index.save()
+            return None
+
+        header_lines = []
 
         # 添加标题和基本信息
         #markdown_lines.append("# 项目代码导出")
@@ -228,11 +319,11 @@ class CodeProjectAIHelper:
             # 添加特性并获取ID
             feature_id = self.feature_manager.add_feature(custom_task_content, os.path.basename(output_file))
             self.feature_manager.update_feature_status(feature_id, "exported") # 导出时更新状态
-            markdown_lines.append(f"关联特性ID: {feature_id}")
+            header_lines.append(f"关联特性ID: {feature_id}")
         # --- 新增功能结束 ---
-        markdown_lines.append("    ")
-        markdown_lines.append("---")
-        markdown_lines.append("    ")
+        header_lines.append("    ")
+        header_lines.append("---")
+        header_lines.append("    ")
 
         # 如果有任务，处理任务提示
         task_info = None
@@ -251,108 +342,696 @@ class CodeProjectAIHelper:
 
             if include_task_prompt and task_info: # 确保 task_info 存在
                 # 在导出文件中包含任务提示
-                markdown_lines.append("## AI任务提示")
-                markdown_lines.append("    ")
-                markdown_lines.append(task_info['prompt']) # 使用可能被定制过的 prompt
-                markdown_lines.append("    ")
-                markdown_lines.append("---")
-                markdown_lines.append("    ")
+                header_lines.append("## AI任务提示")
+                header_lines.append("    ")
+                header_lines.append(task_info['prompt']) # 使用可能被定制过的 prompt
+                header_lines.append("    ")
+                header_lines.append("---")
+                header_lines.append("    ")
             elif task_info: # 确保 task_info 存在
                 # 只在屏幕上显示任务提示，不在导出文件中包含
                 print("请按照以下要求执行任务: ")
                 print(task_info['prompt']) # 使用可能被定制过的 prompt
 
-        # --- 新增功能：收集导出的文件路径 ---
-        exported_file_paths = []
-        # --- 新增功能结束 ---
-
-        # 遍历所有匹配的目录
-        file_count = 0
-        for src_dir in matched_src_dirs:
-            for root, _, files in os.walk(src_dir):
-                for file in files:
-                    if file.endswith(extensions):
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, src_dir)
-
-                        # 检查 是否应该排除此文件
-                        if self._should_exclude_file(rel_path, self.exclude_patterns):
-                            continue
-
-                        # 如果是增量导出，只处理变更的文件
-                        if incremental and changed_files is not None:
-                            if rel_path not in changed_files:
-                                continue
-
-                        # --- 新增功能：记录导出的文件路径 ---
-                        exported_file_paths.append(rel_path)
-                        # --- 新增功能结束 ---
-
-                        # 添加文件标题
-                        markdown_lines.append(f"## {rel_path}")
-                        markdown_lines.append("    ")
-
-                        # 确定代码语言
-                        lang = self._get_language_by_extension(file)
-                        markdown_lines.append(f"```{lang}")
-
-                        # 读取文件内容
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            markdown_lines.append(content)
-                        except UnicodeDecodeError:
-                            markdown_lines.append("[该文件无法读取，请检查编码或文件类型]")
-                        except Exception as e:
-                            markdown_lines.append(f"[读取文件时发生错误: {str(e)}]")
-
-                        markdown_lines.append("```")
-                        markdown_lines.append("    ")
-                        file_count += 1
-
-        if file_count == 0:
-            markdown_lines.append("## 未找到匹配的代码文件")
-            if incremental:
-                markdown_lines.append("自上次导出以来没有文件变更")
-            markdown_lines.append(f"请检查目录路径和文件扩展名: {', '.join(extensions)}")
-            markdown_lines.append("    ")
-
-        # --- 新增功能：生成并插入文件目录 ---
-        # 在任务提示之后（如果有的话）和文件内容之前插入目录
-        # 查找插入点：在最后一个    "---" 分隔线之后插入
-        insert_index = 0
-        for i in range(len(markdown_lines) - 1, -1, -1):
-            if markdown_lines[i].strip() == "---":
-                insert_index = i + 1
-                break
-
-        # 生成目录树内容
-        file_tree_lines = self._generate_file_tree(exported_file_paths)
-
-        # 在指定位置插入目录树
-        # 从后向前插入，避免索引偏移问题
-        for i in range(len(file_tree_lines) - 1, -1, -1):
-            markdown_lines.insert(insert_index, file_tree_lines[i])
-        # --- 新增功能结束 ---
-
-        markdown_content = "\n".join(markdown_lines)
-
-        # 如果指定了输出文件，则保存；否则打印到控制台
+        # 先确定要导出的文件列表，这样目录树可以在文件内容之前写出
+        export_entries = self._collect_export_files(inventory, matched_src_dirs, extensions,
+                                                    changed_files if incremental else None, selected_files)
+        if expand_ranges:
+            export_entries = self._filter_expand_entries(export_entries, expand_ranges)
+        if options.ranked:
+            export_entries = self._rank_export_entries(export_entries, matched_src_dirs, inventory, extensions,
+                                                       custom_task_content, options.top_k,
+                                                       options.relevance_budget, repo_index, options.jobs)
+        exported_file_paths = [rel_path for _, rel_path in export_entries]
+        file_count = len(export_entries)
+
+        token_stats = self._new_token_stats() if options.wants_stats else None
+
+        # 完整导出会更新基线，顺带保存文件内容；增量导出时按需与基线内容比较
+        # （只导出指定行时导出的不是完整的项目，也不更新基线）
+        update_baseline = not incremental and not expand_ranges
+        content_options = {
+            'store_contents': update_baseline and self.config_manager.get_store_baseline_contents(),
+            'diff_bases': None,
+            'expand_ranges': expand_ranges
+        }
+        if incremental and options.diff_context is not None:
+            if not self.config_manager.get_store_baseline_contents():
+                print("ℹ️  未开启 store_baseline_contents，完整导出时不保存文件内容，"
+                      "基线中没有内容的已修改文件将导出完整内容")
+            content_options['diff_bases'] = self._baseline_diff_bases(matched_src_dirs, inventory,
+                                                                      export_entries, options.baseline)
+
+        if options.chunked:
+            chunk_files = self._write_export_chunks(header_lines, export_entries, extensions, incremental,
+                                                    options, repo_index, output_file, chunk_pattern, chunk_dir,
+                                                    token_stats, content_options, matched_src_dirs)
+            print(f"✅ 项目已分 {len(chunk_files)} 块导出到: {', '.join(chunk_files)}")
+            print(f"📁 包含 {file_count} 个代码文件")
+            if update_baseline:
+                self._save_export_metadata_multi(matched_src_dirs, output_file, inventory,
+                                                 extensions, options.baseline)
+            if token_stats is not None:
+                self._report_token_stats(token_stats, options.stats, options.stats_json)
+            repo_index.save()
+            return output_file
+
+        # 生成目录树内容（位于任务提示之后、文件内容之前）
+        file_tree_lines = self._generate_file_tree(exported_file_paths,
+                                                   self._tree_file_tokens(export_entries, repo_index))
+
+        snapshot = self._new_snapshot(matched_src_dirs, output_file)
+        markdown_lines = self._iter_export_lines(header_lines, file_tree_lines, export_entries,
+                                                 extensions, incremental, options, repo_index, token_stats,
+                                                 snapshot=snapshot, **content_options)
+
+        # 如果指定了输出文件，则边生成边写入；否则打印到控制台
         if output_file:
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+                self._write_lines(f, markdown_lines)
             print(f"✅ 项目已导出到: {output_file}")
             print(f"📁 包含 {file_count} 个代码文件")
+            snapshot_id = self._record_snapshot(snapshot)
+            if snapshot_id is not None:
+                print(f"ℹ️  已记录导出快照 #{snapshot_id}")
 
             # 保存导出元数据（用于增量导出）
-            if not incremental:
-                self._save_export_metadata_multi(matched_src_dirs, output_file)
+            if update_baseline:
+                self._save_export_metadata_multi(matched_src_dirs, output_file, inventory,
+                                                 extensions, options.baseline)
         else:
-            # 输出到控制台 
-            print(markdown_content)
+            # 输出到控制台
+            self._write_lines(sys.stdout, markdown_lines)
+            sys.stdout.write("\n")
+
+        if token_stats is not None:
+            self._report_token_stats(token_stats, options.stats, options.stats_json)
+
+        repo_index.save()
 
         return output_file # 返回实际使用的输出文件名
 
+    def _plan_export_chunks(self, header_lines: List[str], export_entries: List[Tuple[str, str]],
+                            repo_index: RepoIndex, max_tokens: int = None,
+                            max_bytes: int = None,
+                            section_costs: Dict[str, Tuple[int, int]] = None) -> List[List[int]]:
+        """
+        按预算规划分块，返回每个分块包含的导出文件下标
+        文件开销按索引中的大小和 token 估算加上代码块标记计算，读取文件前即可完成规划；
+        section_costs 为 {文件路径: (字节数, token 数)}，这些文件（导出为 diff 的文件）直接使用给定的开销
+        """
+        # 每个分块重复的内容：分块标记、头部（任务提示）和目录树的标题行
+        tree_frame = self._generate_file_tree(['x'])
+        base_lines = [self._chunk_label(999, 999)] + header_lines + tree_frame[:4] + tree_frame[-1:]
+        base_size = sum(len(line.encode('utf-8')) + 1 for line in base_lines)
+        estimator = self._get_token_estimator()
+
+        file_costs = []
+        for file_path, rel_path in export_entries:
+            if section_costs and file_path in section_costs:
+                file_costs.append((rel_path,) + section_costs[file_path])
+                continue
+            lang = self._get_language_by_extension(file_path)
+            wrapper_size = len(f"## {rel_path}\n    \n```{lang}\n\n```\n    \n".encode('utf-8'))
+            indexed = repo_index.get(file_path)
+            # 无法读取的文件会写入提示文字，按提示文字的长度兜底
+            content_size = max(indexed.size if indexed else 0, CHUNK_MIN_CONTENT_SIZE)
+            content_tokens = max(indexed.tokens if indexed else 0, estimator.estimate_size(CHUNK_MIN_CONTENT_SIZE))
+            file_costs.append((rel_path, wrapper_size + content_size,
+                               estimator.estimate_size(wrapper_size) + content_tokens))
+
+        planner = ChunkPlanner(max_bytes, max_tokens, base_size, estimator.estimate_text("\n".join(base_lines)),
+                               estimator.estimate_size,
+                               CHUNK_TREE_ANNOTATION_SIZE if self.config_manager.get_file_tree_annotate() else 0)
+        chunks = planner.plan(file_costs)
+        for index in planner.oversized:
+            print(f"⚠️  文件超出单个分块的预算，将单独放入一个分块: {export_entries[index][1]}")
+        return chunks
+
+    def _diff_section_costs(self, export_entries: List[Tuple[str, str]], diff_bases: Dict[str, str],
+                            diff_context: int, jobs: int = 1) -> Dict[str, Tuple[int, int]]:
+        """
+        读取有基线内容的文件并生成 diff，返回导出为差异段落的文件的 {文件路径: (字节数, token 数)}
+        整个文件改写时 diff 约为文件大小的两倍，分块规划不能按文件本身的大小估算
+        与 _iter_export_lines 的判断一致：内容未变、无法解码或基线内容不可用的文件仍导出完整内容，不包括在内
+        """
+        entries = [(file_path, rel_path) for file_path, rel_path in export_entries if file_path in diff_bases]
+        object_store = self._get_object_store()
+        estimator = self._get_token_estimator()
+        costs = {}
+        read_results = iter_read_files((file_path for file_path, _ in entries), jobs)
+        for (file_path, rel_path), read_result in zip(entries, read_results):
+            base_digest = diff_bases[file_path]
+            if not read_result.digest or read_result.content is UNDECODABLE_CONTENT or \
+                    base_digest == read_result.digest:
+                continue
+            base_content = object_store.get_text(base_digest)
+            if base_content is None:
+                continue
+            diff_text = "\n".join(self._unified_diff_lines(base_content, read_result.content,
+                                                           rel_path, diff_context))
+            if not diff_text:
+                continue
+            section = "\n".join(self._file_section_lines(rel_path, "diff", diff_text, diff_context)) + "\n"
+            costs[file_path] = (len(section.encode('utf-8')), estimator.estimate_text(section))
+        return costs
+
+    @staticmethod
+    def _chunk_label(number: int, total: int) -> str:
+        return f"导出分块: {number}/{total}"
+
+    def _write_export_chunks(self, header_lines: List[str], export_entries: List[Tuple[str, str]],
+                             extensions: tuple, incremental: bool, options: ExportOptions, repo_index: RepoIndex,
+                             first_file: str, chunk_pattern: str, chunk_dir: str,
+                             token_stats: TokenStats = None, content_options: Dict = None,
+                             src_dirs: List[str] = None) -> List[str]:
+        """逐个写出分块文件，每个分块包含分块标记、头部和本分块文件的目录树"""
+        content_options = content_options or {}
+        diff_bases = content_options.get('diff_bases')
+        section_costs = self._diff_section_costs(export_entries, diff_bases, options.diff_context or 0,
+                                                 options.jobs or 1) if diff_bases else None
+        chunks = self._plan_export_chunks(header_lines, export_entries, repo_index, options.max_tokens,
+                                          options.max_bytes, section_costs)
+        if not chunks:
+            # 没有匹配的文件时仍写出一个文件说明情况
+            chunks = [[]]
+
+        if not os.path.exists(chunk_dir):
+            os.makedirs(chunk_dir)
+
+        chunk_files = []
+        snapshot_ids = []
+        for number, indices in enumerate(chunks, 1):
+            chunk_file = first_file if number == 1 else self.get_next_sequential_filename(chunk_pattern, chunk_dir)
+            chunk_entries = [export_entries[i] for i in indices]
+            chunk_header = [self._chunk_label(number, len(chunks))] + header_lines
+            file_tree_lines = self._generate_file_tree([rel_path for _, rel_path in chunk_entries],
+                                                       self._tree_file_tokens(chunk_entries, repo_index))
+            snapshot = self._new_snapshot(src_dirs or [], chunk_file)
+            markdown_lines = self._iter_export_lines(chunk_header, file_tree_lines, chunk_entries,
+                                                     extensions, incremental, options, repo_index, token_stats,
+                                                     snapshot=snapshot, **content_options)
+            with open(chunk_file, 'w', encoding='utf-8') as f:
+                self._write_lines(f, markdown_lines)
+            snapshot_id = self._record_snapshot(snapshot)
+            if snapshot_id is not None:
+                snapshot_ids.append(snapshot_id)
+            chunk_files.append(chunk_file)
+        if snapshot_ids:
+            print(f"ℹ️  已记录导出快照 {', '.join(f'#{snapshot_id}' for snapshot_id in snapshot_ids)}")
+        return chunk_files
+
+    def _print_dry_run_summary(self, src_dirs: List[str], export_entries: List[Tuple[str, str]],
+                               extensions: tuple, change_reports: Dict[str, MerkleDiff],
+                               baseline: str = None):
+        """输出导出预演摘要：增量导出时按目录列出新增、修改和删除的文件数"""
+        if baseline:
+            print(f"🔍 导出预演（与基线 {baseline} 比较，不写入文件）")
+        else:
+            print("🔍 导出预演（不写入文件）")
+
+        for src_dir in src_dirs:
+            diff = change_reports.get(src_dir)
+            if diff is None:
+                continue
+            print(f"📁 {src_dir}")
+            dir_counts = {}
+            for kind, rel_paths in enumerate((diff.added, diff.modified, diff.deleted)):
+                for rel_path in rel_paths:
+                    if rel_path.endswith(extensions):
+                        rel_dir = os.path.dirname(rel_path).replace(os.sep, '/')
+                        dir_counts.setdefault(rel_dir, [0, 0, 0])[kind] += 1
+            if not dir_counts:
+                print("   没有变更")
+            for rel_dir in sorted(dir_counts):
+                added, modified, deleted = dir_counts[rel_dir]
+                print(f"   {rel_dir or '.'}/  新增 {added}，修改 {modified}，删除 {deleted}")
+            if diff.visited_dirs or diff.skipped_dirs:
+                print(f"   比较了 {diff.visited_dirs} 个目录，跳过未变化的目录 {diff.skipped_dirs} 个")
+
+        print(f"📊 将导出 {len(export_entries)} 个代码文件")
+
+    def _scan_source_dirs(self, src_dirs: List[str], inventory: FileInventory = None,
+                          use_gitignore: bool = None) -> FileInventory:
+        """
+        扫描源目录，生成文件清单（包含 stat 信息、扩展名和排除结果）
+        传入已有清单时只补充其中缺少的目录
+        """
+        if use_gitignore is None:
+            use_gitignore = self.config_manager.get_use_gitignore()
+        matcher = self._get_exclude_matcher(self.exclude_patterns)
+        scanner = DirectoryScanner(matcher.is_excluded, matcher.excludes_dir, use_gitignore,
+                                   self.config_manager.get_follow_symlinks())
+        return scanner.scan(src_dirs, inventory)
+
+    def _get_repo_index(self) -> RepoIndex:
+        """获取持久化的仓库索引（首次使用时从元数据目录加载）"""
+        if self._repo_index is None:
+            self._repo_index = RepoIndex(self.metadata_dir, self.language_map,
+                                         self._get_token_estimator().name)
+        return self._repo_index
+
+    def _get_token_estimator(self) -> TokenEstimator:
+        """获取配置的 token 估算器（首次使用时创建，BPE 词表只加载一次）"""
+        if self._token_estimator is None:
+            self._token_estimator = create_token_estimator(self.config_manager.get_token_estimator(),
+                                                           self.config_manager.get_token_vocab_file())
+        return self._token_estimator
+
+    def _new_token_stats(self) -> TokenStats:
+        return TokenStats(self._get_token_estimator().name)
+
+    @staticmethod
+    def _report_token_stats(token_stats: TokenStats, show: bool, json_file: str = None):
+        """输出 token 统计表，并按需保存为 JSON"""
+        if show:
+            for line in token_stats.format_table():
+                print(line)
+        if json_file:
+            token_stats.save_json(json_file)
+            print(f"✅ token 统计已保存到: {json_file}")
+
+    def _get_metadata_store(self) -> MetadataStore:
+        """获取导出元数据存储（首次使用时打开数据库）"""
+        if self._metadata_store is None:
+            self._metadata_store = MetadataStore(self.metadata_dir)
+        return self._metadata_store
+
+    def _get_object_store(self) -> ObjectStore:
+        """获取保存基线文件内容的对象存储"""
+        if self._object_store is None:
+            self._object_store = ObjectStore(self.metadata_dir)
+        return self._object_store
+
+    def _get_snapshot_store(self) -> SnapshotStore:
+        """获取导出快照清单存储"""
+        if self._snapshot_store is None:
+            self._snapshot_store = SnapshotStore(self.metadata_dir)
+        return self._snapshot_store
+
+    def _new_snapshot(self, src_dirs: List[str], output_file: Optional[str]) -> Optional[SnapshotBuilder]:
+        """开启了快照记录时，为一次写入文件的导出创建快照清单（输出到控制台时不记录）"""
+        if not output_file or not self.config_manager.get_record_snapshots():
+            return None
+        return SnapshotBuilder(src_dirs, output_file)
+
+    def _record_snapshot(self, snapshot: Optional[SnapshotBuilder]) -> Optional[int]:
+        """保存快照清单，超出 snapshot_limit 的旧快照被删除后清理不再引用的内容"""
+        if snapshot is None:
+            return None
+        try:
+            store = self._get_snapshot_store()
+            snapshot_id = store.record(snapshot)
+            limit = self.config_manager.get_snapshot_limit()
+            if limit and store.evict(limit):
+                self._prune_objects()
+            return snapshot_id
+        except Exception as e:
+            print(f"⚠️  记录导出快照失败: {e}")
+            return None
+
+    def list_baselines(self) -> List[Dict]:
+        """列出所有导出基线及其包含的源目录和文件数（还没有导出过时为空）"""
+        if not os.path.isdir(self.metadata_dir):
+            return []
+        return self._get_metadata_store().list_baselines()
+
+    def list_snapshots(self) -> List[Dict]:
+        """列出所有导出快照"""
+        return self._get_snapshot_store().list_snapshots()
+
+    def load_snapshot(self, snapshot_id: int = None) -> Optional[SnapshotBuilder]:
+        """读取导出快照清单，未指定编号时读取最新的快照"""
+        store = self._get_snapshot_store()
+        if snapshot_id is None:
+            snapshot_id = store.latest_id()
+            if snapshot_id is None:
+                return None
+        return store.load(snapshot_id)
+
+    def iter_snapshot_lines(self, snapshot: SnapshotBuilder) -> Iterator[str]:
+        """从对象存储逐行重新生成快照对应的导出文档（与导出时写入的内容相同）"""
+        object_store = self._get_object_store()
+        yield from snapshot.head_lines
+        for snapshot_file in snapshot.files:
+            content = object_store.get_text(snapshot_file.blob)
+            if content is None:
+                content = f"[快照内容缺失: {snapshot_file.blob}]"
+            diff_context = snapshot_file.diff_context if snapshot_file.kind == KIND_DIFF else None
+            yield from self._file_section_lines(snapshot_file.rel_path, snapshot_file.lang, content, diff_context)
+        yield from snapshot.tail_lines
+
+    def render_snapshot(self, snapshot: SnapshotBuilder, output_file: str = None):
+        """将快照重新生成为 Markdown 文件，未指定输出文件时打印到控制台"""
+        lines = self.iter_snapshot_lines(snapshot)
+        if not output_file:
+            self._write_lines(sys.stdout, lines)
+            sys.stdout.write("\n")
+            return
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            self._write_lines(f, lines)
+
+    def restore_snapshot(self, snapshot: SnapshotBuilder, target_dir: str) -> Tuple[int, List[str]]:
+        """
+        将快照中保存了完整内容的文件写入目标目录，返回 (写入的文件数, 跳过的文件)
+        只保存了差异、骨架或无法读取的文件会被跳过
+        """
+        object_store = self._get_object_store()
+        restored = 0
+        skipped = []
+        for snapshot_file in snapshot.files:
+            content = object_store.get_text(snapshot_file.blob) if snapshot_file.kind == KIND_FILE else None
+            if content is None:
+                skipped.append(snapshot_file.rel_path)
+                continue
+            file_path = os.path.join(target_dir, snapshot_file.rel_path)
+            file_dir = os.path.dirname(file_path)
+            if file_dir and not os.path.exists(file_dir):
+                os.makedirs(file_dir)
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            restored += 1
+        return restored, skipped
+
+    def _prune_objects(self):
+        """清理对象存储中不再被任何基线或快照引用的内容"""
+        keep = self._get_metadata_store().referenced_hashes()
+        if os.path.exists(os.path.join(self.metadata_dir, SNAPSHOT_DB_FILENAME)):
+            keep |= self._get_snapshot_store().referenced_blobs()
+        self._get_object_store().prune(keep)
+
+    def _get_dependency_cache(self) -> DependencyCache:
+        """获取缓存在元数据目录中的文件依赖"""
+        if self._dependency_cache is None:
+            self._dependency_cache = DependencyCache(self.metadata_dir)
+        return self._dependency_cache
+
+    def _build_dependency_graph(self, src_dirs: List[str], inventory: FileInventory,
+                                jobs: int = 1) -> DependencyGraph:
+        """更新依赖缓存（只读取新增或变化的文件），生成扫描到的文件之间的依赖图"""
+        cache = self._get_dependency_cache()
+        entries = [entry for entry in inventory.iter_entries(src_dirs) if supports_dependencies(entry.ext)]
+        cache.update(src_dirs, entries, jobs)
+        cache.save()
+        known_files = {os.path.abspath(entry.path) for entry in inventory.iter_entries(src_dirs)}
+        return DependencyGraph(cache, known_files, self.config_manager.get_include_roots() + list(src_dirs))
+
+    def _find_source_files(self, src_dirs: List[str], known_files: Set[str], paths: List[str]) -> List[str]:
+        """把命令行指定的文件（相对于当前目录或源目录）解析为扫描到的文件的绝对路径"""
+        found = []
+        for path in paths:
+            candidates = [os.path.abspath(path)] + [os.path.abspath(os.path.join(src_dir, path))
+                                                    for src_dir in src_dirs]
+            matches = [candidate for candidate in dict.fromkeys(candidates) if candidate in known_files]
+            if not matches:
+                print(f"⚠️  未在源目录中找到文件: {path}")
+            found.extend(matches)
+        return found
+
+    def _resolve_closure_files(self, src_dirs: List[str], inventory: FileInventory, closure: List[str] = None,
+                               impacted_by: List[str] = None, depth: int = None, jobs: int = 1) -> Set[str]:
+        """求起始文件的依赖闭包与受变更文件影响的文件（绝对路径集合）"""
+        graph = self._build_dependency_graph(src_dirs, inventory, jobs)
+        selected = set()
+        if closure:
+            start_files = self._find_source_files(src_dirs, graph.known_files, closure)
+            files = graph.closure(start_files, depth)
+            print(f"🔍 依赖闭包: {len(start_files)} 个起始文件，共 {len(files)} 个文件")
+            selected |= files
+        if impacted_by:
+            changed = self._find_source_files(src_dirs, graph.known_files, impacted_by)
+            files = graph.impacted_by(changed, depth)
+            print(f"🔍 受影响的文件: {len(changed)} 个变更文件，共 {len(files)} 个文件")
+            selected |= files
+        return selected
+
+    def _get_symbol_index(self) -> SymbolIndex:
+        """获取元数据目录中的符号索引"""
+        if self._symbol_index is None:
+            self._symbol_index = SymbolIndex(self.metadata_dir)
+        return self._symbol_index
+
+    def _resolve_symbol_files(self, src_dirs: List[str], inventory: FileInventory, symbols: List[str],
+                              with_callers: bool = False, jobs: int = 1) -> Set[str]:
+        """查找定义（以及引用）指定符号的文件（绝对路径集合），并列出定义位置"""
+        index = self._get_symbol_index()
+        index.update(src_dirs, [entry for entry in inventory.iter_entries(src_dirs) if supports_symbols(entry.ext)],
+                     jobs)
+        base_dir = os.getcwd()
+        selected = set()
+        for symbol in symbols:
+            # 限定名（ns::Name、module.Name）按最后一段查找
+            name = re.split(r'::|\.', symbol)[-1]
+            definitions = index.definitions(name)
+            callers = index.references(name) if with_callers else []
+            if not definitions:
+                print(f"⚠️  未找到符号的定义: {symbol}")
+            else:
+                print(f"🔍 符号 {symbol}: 定义于 {len({path for path, _, _ in definitions})} 个文件"
+                      + (f"，引用于 {len(callers)} 个文件" if with_callers else ""))
+                for path, line, kind in definitions:
+                    print(f"   {os.path.relpath(path, base_dir)}:{line}  {kind}")
+            selected.update(path for path, _, _ in definitions)
+            selected.update(callers)
+        return selected
+
+    def _get_relevance_index(self) -> RelevanceIndex:
+        """获取元数据目录中的 BM25 相关性索引"""
+        if self._relevance_index is None:
+            self._relevance_index = RelevanceIndex(self.metadata_dir)
+        return self._relevance_index
+
+    def _rank_export_entries(self, export_entries: List[Tuple[str, str]], src_dirs: List[str],
+                             inventory: FileInventory, extensions: tuple, query: Optional[str],
+                             top_k: int = None, token_budget: int = None, repo_index: RepoIndex = None,
+                             jobs: int = 1) -> List[Tuple[str, str]]:
+        """
+        按与任务描述的 BM25 相关性排序导出文件，只保留相关的文件（最相关的在前）
+        top_k 限制文件数，token_budget 限制估算的 token 总数（放不下的文件跳过）
+        """
+        if not query or not query.strip():
+            print("⚠️  --top-k / --relevance-budget 需要用 --task-content 提供任务描述，将导出所有文件")
+            return export_entries
+
+        index = self._get_relevance_index()
+        # 索引所有已知语言的源文件，导出扩展名不同的两次导出可以共用索引
+        index.update(src_dirs, [entry for entry in inventory.iter_entries(src_dirs)
+                                if entry.ext.lower() in self.language_map or entry.name.endswith(extensions)],
+                     jobs)
+
+        by_path = {os.path.abspath(file_path): (file_path, rel_path) for file_path, rel_path in export_entries}
+        start = time.perf_counter()
+        ranked = index.search(query, set(by_path))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        selected = []
+        used_tokens = 0
+        for path, _ in ranked:
+            if top_k and len(selected) >= top_k:
+                break
+            file_path, rel_path = by_path[path]
+            if token_budget:
+                indexed = repo_index.get(file_path) if repo_index is not None else None
+                tokens = indexed.tokens if indexed is not None else 0
+                if used_tokens + tokens > token_budget:
+                    continue
+                used_tokens += tokens
+            selected.append((file_path, rel_path))
+        print(f"🔍 按任务描述的相关性选出 {len(selected)}/{len(export_entries)} 个文件（查询用时 {elapsed_ms:.1f} ms）")
+        return selected
+
+    def _sync_repo_index(self, src_dirs: List[str], inventory: FileInventory) -> RepoIndex:
+        """用扫描结果同步仓库索引的 stat 签名（不读取文件内容）"""
+        index = self._get_repo_index()
+        for src_dir in src_dirs:
+            index.sync_dir(src_dir, inventory.entries_for(src_dir))
+        return index
+
+    def _collect_export_files(self, inventory: FileInventory, src_dirs: List[str], extensions: tuple,
+                              changed_files: Optional[Set[str]] = None,
+                              selected_files: Optional[Set[str]] = None) -> List[Tuple[str, str]]:
+        """
+        从文件清单中筛选需要导出的 (文件路径, 相对路径) 列表，顺序与导出顺序一致
+        changed_files 不为 None 时只保留其中的文件（增量导出）
+        selected_files 不为 None 时只保留其中的文件（绝对路径，如依赖闭包），这些文件不按扩展名过滤
+        """
+        export_entries = []
+        for entry in inventory.iter_entries(src_dirs):
+            if selected_files is not None:
+                if os.path.abspath(entry.path) not in selected_files:
+                    continue
+            elif not entry.name.endswith(extensions):
+                continue
+
+            # 如果是增量导出，只处理变更的文件
+            if changed_files is not None and entry.rel_path not in changed_files:
+                continue
+
+            export_entries.append((entry.path, entry.rel_path))
+        return export_entries
+
+    def _iter_export_lines(self, header_lines: List[str], file_tree_lines: List[str],
+                           export_entries: List[Tuple[str, str]], extensions: tuple,
+                           incremental: bool, options: ExportOptions = None,
+                           repo_index: RepoIndex = None,
+                           token_stats: TokenStats = None,
+                           store_contents: bool = False,
+                           diff_bases: Dict[str, str] = None,
+                           snapshot: SnapshotBuilder = None,
+                           expand_ranges: Dict[str, List[Tuple[int, int]]] = None) -> Iterator[str]:
+        """
+        逐行生成导出文档：头部、目录树，然后逐个文件读取并生成代码块
+        文件由读取线程池按导出顺序交付，同时只持有预读窗口内的文件内容
+        读取时顺带计算的哈希和 token 数记录到仓库索引中，保存元数据时不必再读取这些文件
+        options 提供读取线程数（jobs）、diff 的上下文行数（diff_context）和是否只输出骨架（outline）；
+        store_contents 为 True 时把读到的文本保存到对象存储中；
+        diff_bases 为 {文件路径: 基线中的哈希}，这些文件在基线内容可用时只输出 unified diff；
+        expand_ranges 为 {相对路径: [(起始行, 结束行)]}，其中的文件只输出指定的行；
+        传入 snapshot 时把文档的头部、文件清单（内容保存到对象存储）和结尾记录到快照中
+        """
+        if options is None:
+            options = ExportOptions()
+        diff_context = options.diff_context or 0
+        estimator = self._get_token_estimator()
+        object_store = self._get_object_store() if store_contents or diff_bases or snapshot else None
+        transform = options.outline or expand_ranges
+        # 目录树插入在头部最后一条 "---" 分隔线之后
+        insert_index = 0
+        for i in range(len(header_lines) - 1, -1, -1):
+            if header_lines[i].strip() == "---":
+                insert_index = i + 1
+                break
+        head_lines = header_lines[:insert_index] + file_tree_lines + header_lines[insert_index:]
+        if snapshot is not None:
+            snapshot.head_lines = head_lines
+        yield from head_lines
+
+        read_results = iter_read_files((file_path for file_path, _ in export_entries), options.jobs or 1)
+        for (file_path, rel_path), read_result in zip(export_entries, read_results):
+            tokens = estimator.estimate_text(read_result.content)
+            if repo_index is not None:
+                repo_index.record_read(file_path, read_result.digest, read_result.stat, tokens)
+            decoded = bool(read_result.digest) and read_result.content is not UNDECODABLE_CONTENT
+            if (store_contents or snapshot is not None) and decoded:
+                object_store.put_text(read_result.digest, read_result.content)
+
+            diff_text = None
+            base_digest = diff_bases.get(file_path) if diff_bases else None
+            if base_digest and decoded and base_digest != read_result.digest:
+                base_content = object_store.get_text(base_digest)
+                if base_content is not None:
+                    diff_text = "\n".join(self._unified_diff_lines(base_content, read_result.content,
+                                                                   rel_path, diff_context)) or None
+
+            # 骨架或指定的行（差异优先）
+            excerpt = None
+            if transform and not diff_text and decoded:
+                line_ranges = expand_ranges.get(rel_path) if expand_ranges else None
+                ext = os.path.splitext(file_path)[1]
+                if line_ranges:
+                    excerpt = extract_line_ranges(read_result.content, line_ranges, ext)
+                elif options.outline:
+                    excerpt = outline_source(read_result.content, ext)
+                if excerpt == read_result.content:
+                    excerpt = None
+
+            if token_stats is not None:
+                if diff_text:
+                    token_stats.add(rel_path, len(diff_text.encode('utf-8')), estimator.estimate_text(diff_text))
+                elif excerpt is not None:
+                    token_stats.add(rel_path, len(excerpt.encode('utf-8')), estimator.estimate_text(excerpt))
+                else:
+                    size = read_result.stat.st_size if read_result.stat else len(read_result.content.encode('utf-8'))
+                    token_stats.add(rel_path, size, tokens)
+
+            # 确定代码语言
+            lang = self._get_language_by_extension(file_path)
+            if diff_text:
+                if snapshot is not None:
+                    snapshot.add_file(rel_path, lang, object_store.add_text(diff_text), KIND_DIFF, diff_context)
+                yield from self._file_section_lines(rel_path, lang, diff_text, diff_context)
+            elif excerpt is not None:
+                if snapshot is not None:
+                    snapshot.add_file(rel_path, lang, object_store.add_text(excerpt), KIND_OUTLINE)
+                yield from self._file_section_lines(rel_path, lang, excerpt)
+            else:
+                if snapshot is not None:
+                    if decoded:
+                        snapshot.add_file(rel_path, lang, read_result.digest)
+                    else:
+                        snapshot.add_file(rel_path, lang, object_store.add_text(read_result.content), KIND_NOTE)
+                yield from self._file_section_lines(rel_path, lang, read_result.content)
+
+        tail_lines = []
+        if not export_entries:
+            tail_lines.append("## 未找到匹配的代码文件")
+            if incremental:
+                tail_lines.append("自上次导出以来没有文件变更")
+            tail_lines.append(f"请检查目录路径和文件扩展名: {', '.join(extensions)}")
+            tail_lines.append("    ")
+        if snapshot is not None:
+            snapshot.tail_lines = tail_lines
+        yield from tail_lines
+
+    @staticmethod
+    def _filter_expand_entries(export_entries: List[Tuple[str, str]],
+                               expand_ranges: Dict[str, List[Tuple[int, int]]]) -> List[Tuple[str, str]]:
+        """只保留 --expand 指定的文件，并提示没有匹配到的文件"""
+        entries = [(file_path, rel_path) for file_path, rel_path in export_entries if rel_path in expand_ranges]
+        found = {rel_path for _, rel_path in entries}
+        for rel_path in expand_ranges:
+            if rel_path not in found:
+                print(f"⚠️  --expand 指定的文件不在导出范围内: {rel_path}")
+        return entries
+
+    @staticmethod
+    def _file_section_lines(rel_path: str, lang: str, content: str, diff_context: int = None) -> List[str]:
+        """单个文件在导出文档中的各行；diff_context 不为 None 时 content 为相对于基线的 unified diff"""
+        if diff_context is not None:
+            return [f"## {rel_path}", "    ",
+                    f"*相对于基线的变更（unified diff，上下文 {diff_context} 行）*", "    ",
+                    "```diff", content, "```", "    "]
+        return [f"## {rel_path}", "    ", f"```{lang}", content, "```", "    "]
+
+    @staticmethod
+    def _unified_diff_lines(old_content: str, new_content: str, rel_path: str, context: int) -> List[str]:
+        """生成 unified diff 的各行（不含换行符）；内容相同时返回空列表"""
+        path = rel_path.replace(os.sep, '/')
+        return list(difflib.unified_diff(old_content.split('\n'), new_content.split('\n'),
+                                         f"a/{path}", f"b/{path}", n=max(context, 0), lineterm=''))
+
+    def _baseline_diff_bases(self, src_dirs: List[str], inventory: FileInventory,
+                             export_entries: List[Tuple[str, str]], baseline: str) -> Dict[str, str]:
+        """获取导出文件在基线中的内容哈希 {文件路径: 哈希}，基线中没有或只有 stat 指纹的文件不包括在内"""
+        wanted = {file_path for file_path, _ in export_entries}
+        store = self._get_metadata_store()
+        diff_bases = {}
+        for src_dir in src_dirs:
+            try:
+                previous_hashes = store.get_hashes(baseline, src_dir)
+            except Exception as e:
+                print(f"⚠️  读取导出基线失败: {e}")
+                continue
+            for entry in inventory.entries_for(src_dir):
+                previous_hash = previous_hashes.get(entry.rel_path)
+                if entry.path in wanted and previous_hash and \
+                        not previous_hash.startswith(STAT_FINGERPRINT_PREFIX):
+                    diff_bases[entry.path] = previous_hash
+        return diff_bases
+
+    @staticmethod
+    def _write_lines(stream, lines: Iterable[str]):
+        """将行序列以换行符连接后写入流，不在内存中拼接整个文档"""
+        first = True
+        for line in lines:
+            if not first:
+                stream.write("\n")
+            stream.write(line)
+            first = False
+
     # ... [其余代码保持不变，但需要修改 apply_markdown_response] ...
 
     def apply_markdown_response(self, markdown_file: str = None, dst_dir: str = None,
@@ -379,111 +1058,28 @@ class CodeProjectAIHelper:
         if not os.path.exists(dst_dir):
             os.makedirs(dst_dir)
 
-        # 读取Markdown文件
-        try:
-            with open(markdown_file, 'r', encoding='utf-8') as f:
-                markdown_content = f.read()
-        except Exception as e:
-            raise Exception(f"读取Markdown文件失败: {e}")
-
-        # 提取文件信息
-        if flexible_parsing:
-            files = self.response_parser.extract_files_flexible(markdown_content)
-        else:
-            files = self.response_parser.extract_files_standard(markdown_content)
-
+        # 流式解析：每个文件块的结束标记到达后立即写入，不把整个响应读入内存（'-' 表示从标准输入读取）
         result = {
             'success': [],
             'failed': [],
-            'total': len(files),
-            'parsed_files': [f[0] for f in files],
-            'diffs': []  # 用于存储差异信息
+            'total': 0,
+            'parsed_files': [],
+            'diffs': [],  # 用于存储差异信息
+            'deleted': []
         }
-
-        for file_path, lang, content in files:
-            try:
-                # 检查是否为删除操作
-                if lang == 'deleted' or content == 'DELETED':
-                    # 删除文件操作
-                    full_path = os.path.join(dst_dir, file_path)
-                    if os.path.exists(full_path):
-                        if create_backup:
-                            backup_path = f"{full_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                            os.rename(full_path, backup_path)
-                            print(f"🗑️  删除文件 (已备份): {full_path}")
-                            result['deleted'].append({
-                                'file': full_path,
-                                'backup': backup_path
-                            })
-                        else:
-                            os.remove(full_path)
-                            print(f"🗑️  删除文件: {full_path}")
-                            result['deleted'].append({
-                                'file': full_path,
-                                'backup': None
-                            })
-                    else:
-                        print(f"⚠️  文件不存在，无法删除: {full_path}")
-                        result['failed'].append({
-                            'file': file_path,
-                            'error': '文件不存在，无法删除'
-                        })
-                    continue
-
-                # 构建完整路径
-                full_path = os.path.join(dst_dir, file_path)
-
-                # 检查是否应该排除此文件
-                if self._should_exclude_file(file_path, self.exclude_patterns):
-                    print(f"⚠️  跳过排除的文件: {file_path}")
-                    continue
-
-                # 如果需要显示差异，计算差异
-                diff_info = None
-                if show_diff and os.path.exists(full_path):
-                    diff_info = self._calculate_diff(full_path, content)
-
-                # 创建目录
-                file_dir = os.path.dirname(full_path)
-                if file_dir and not os.path.exists(file_dir):
-                    os.makedirs(file_dir)
-
-                # 创建备份（如果文件已存在且需要备份）
-                backup_path = None
-                if create_backup and os.path.exists(full_path):
-                    backup_path = f"{full_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    os.rename(full_path, backup_path)
-
-                # 写入文件
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-
-                success_info = {
-                    'file': full_path,
-                    'language': lang,
-                    'backup': backup_path
-                }
-
-                if diff_info:
-                    success_info['diff'] = diff_info
-                    result['diffs'].append({
-                        'file': full_path,
-                        'diff': diff_info
-                    })
-
-                result['success'].append(success_info)
-                print(f"✅ 创建/更新文件: {full_path}")
-
-                # 显示差异（如果需要）
-                if show_diff and diff_info:
-                    print(f"   差异信息: {diff_info['summary']} ")
-
-            except Exception as e:
-                result['failed'].append({
-                    'file': file_path,
-                    'error': str(e)
-                })
-                print(f"❌ 处理文件失败 {file_path}: {e}")
+        streaming_parser = StreamingResponseParser(self.response_parser, flexible_parsing)
+        feature_id_finder = PrefixedLineFinder("关联特性ID: ")
+        try:
+            with open_response(markdown_file) as stream:
+                for chunk in iter_chunks(stream):
+                    feature_id_finder.feed(chunk)
+                    for parsed_file in streaming_parser.feed(chunk):
+                        self._apply_response_file(result, dst_dir, parsed_file, create_backup, show_diff)
+            for parsed_file in streaming_parser.close():
+                self._apply_response_file(result, dst_dir, parsed_file, create_backup, show_diff)
+        except (OSError, UnicodeDecodeError) as e:
+            raise Exception(f"读取Markdown文件失败: {e}")
+        feature_id_finder.close()
 
         # 输出统计信息
         print(f"\n📊 处理完成: {len(result['success'])}/{result['total']} 个文件成功")
@@ -516,13 +1112,8 @@ class CodeProjectAIHelper:
 
         # --- 新增功能：在应用成功后更新特性状态 ---
         # 尝试从 Markdown 文件中提取关联的特性ID
-        # 这里采用一个简单的方法：查找第一行包含  "关联特性ID: " 的行
-        lines = markdown_content.splitlines()
-        associated_feature_id = None
-        for line in lines:
-            if line.startswith("关联特性ID: "):
-                associated_feature_id = line.split(": ", 1)[1].strip()
-                break
+        # 这里采用一个简单的方法：查找第一行包含  "关联特性ID: " 的行（解析时已在输入中查找）
+        associated_feature_id = feature_id_finder.value
 
         if associated_feature_id:
             feature = self.feature_manager.get_feature(associated_feature_id)
@@ -536,26 +1127,124 @@ class CodeProjectAIHelper:
 
         return result
 
+    def _apply_response_file(self, result: Dict, dst_dir: str, parsed_file: ParsedFile,
+                             create_backup: bool, show_diff: bool):
+        """
+        把响应中解析出的一个文件写入（或删除）到目标目录，结果记录在 result 中
+        文件内容只在写入时解码（删除和排除的文件不解码）
+        """
+        file_path, lang = parsed_file.path, parsed_file.lang
+        result['total'] += 1
+        result['parsed_files'].append(file_path)
+        try:
+            # 检查是否为删除操作
+            if parsed_file.deleted:
+                # 删除文件操作
+                full_path = os.path.join(dst_dir, file_path)
+                if os.path.exists(full_path):
+                    if create_backup:
+                        backup_path = f"{full_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                        os.rename(full_path, backup_path)
+                        print(f"🗑️  删除文件 (已备份): {full_path}")
+                        result['deleted'].append({
+                            'file': full_path,
+                            'backup': backup_path
+                        })
+                    else:
+                        os.remove(full_path)
+                        print(f"🗑️  删除文件: {full_path}")
+                        result['deleted'].append({
+                            'file': full_path,
+                            'backup': None
+                        })
+                else:
+                    print(f"⚠️  文件不存在，无法删除: {full_path}")
+                    result['failed'].append({
+                        'file': file_path,
+                        'error': '文件不存在，无法删除'
+                    })
+                return
+
+            # 构建完整路径
+            full_path = os.path.join(dst_dir, file_path)
+
+            # 检查是否应该排除此文件
+            if self._should_exclude_file(file_path, self.exclude_patterns):
+                print(f"⚠️  跳过排除的文件: {file_path}")
+                return
+
+            content = parsed_file.content
+
+            # 如果需要显示差异，计算差异
+            diff_info = None
+            if show_diff and os.path.exists(full_path):
+                diff_info = self._calculate_diff(full_path, content)
+
+            # 创建目录
+            file_dir = os.path.dirname(full_path)
+            if file_dir and not os.path.exists(file_dir):
+                os.makedirs(file_dir)
+
+            # 创建备份（如果文件已存在且需要备份）
+            backup_path = None
+            if create_backup and os.path.exists(full_path):
+                backup_path = f"{full_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                os.rename(full_path, backup_path)
+
+            # 写入文件
+            with open(full_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+            success_info = {
+                'file': full_path,
+                'language': lang,
+                'backup': backup_path
+            }
+
+            if diff_info:
+                success_info['diff'] = diff_info
+                result['diffs'].append({
+                    'file': full_path,
+                    'diff': diff_info
+                })
+
+            result['success'].append(success_info)
+            print(f"✅ 创建/更新文件: {full_path}")
+
+            # 显示差异（如果需要）
+            if show_diff and diff_info:
+                print(f"   差异信息: {diff_info['summary']} ")
+
+        except Exception as e:
+            result['failed'].append({
+                'file': file_path,
+                'error': str(e)
+            })
+            print(f"❌ 处理文件失败 {file_path}: {e}")
+
     # ... [其余未修改的方法保持不变] ...
 
     # 为了保持代码完整性，这里包含其余未修改的方法
+    def _get_exclude_matcher(self, exclude_patterns: List[str]) -> ExcludeMatcher:
+        """获取编译后的排除模式匹配器（按模式列表缓存）"""
+        key = tuple(exclude_patterns)
+        matcher = self._exclude_matchers.get(key)
+        if matcher is None:
+            matcher = ExcludeMatcher(exclude_patterns)
+            self._exclude_matchers[key] = matcher
+        return matcher
+
     def _should_exclude_file(self, file_path: str, exclude_patterns: List[str]) -> bool:
-        """检查文件是否应该被排除"""
-        for pattern in exclude_patterns:
-            # 直接使用 fnmatch 进行模式匹配
-            if fnmatch.fnmatch(file_path, pattern):
-                return True
-            # 对于目录模式，也匹配该目录下的所有文件
-            if pattern.endswith('/'):
-                if fnmatch.fnmatch(file_path, pattern.rstrip('/') + '/*') or \
-                        fnmatch.fnmatch(file_path, pattern.rstrip('/') + '/**/*'):
-                    return True
-        return False
-
-    def _detect_project_type_multi(self, src_dirs: List[str], extensions: tuple = None) -> str:
+        """检查文件是否应该被排除（目录模式如 node_modules/ 匹配该目录下的所有文件）"""
+        return self._get_exclude_matcher(exclude_patterns).is_excluded(file_path)
+
+    def _detect_project_type_multi(self, src_dirs: List[str], extensions: tuple = None,
+                                   inventory: FileInventory = None) -> str:
         """
         检测多个目录的项目类型（C++、Python、JavaScript等）
         如果配置中指定了项目类型，则使用配置的类型
+        只统计导出时会包含的文件：与导出共用同一份扫描清单，exclude_patterns 排除的文件、
+        不进入的目录（如 node_modules/）和 .gitignore 忽略的文件不计入
         """
         # 首先检查配置中是否强制指定了项目类型
         config_project_type = self.config_manager.get_project_type()
@@ -567,26 +1256,26 @@ class CodeProjectAIHelper:
         if extensions is None:
             extensions = self.default_extensions
 
-        # 统计各类型文件数量
-        cpp_extensions = {'.cpp', '.cc', '.cxx', '.c', '.h', '.hh', '.hpp'}
-        python_extensions = {'.py'}
-        js_extensions = {'.js', '.ts', '.jsx', '.tsx'}
+        # 统计各类型文件数量（语言信息来自仓库索引，排除的文件不计入）
+        cpp_languages = {'cpp', 'c'}
+        python_languages = {'python'}
+        js_languages = {'javascript', 'typescript'}
 
         cpp_count = 0
         python_count = 0
         js_count = 0
 
-        for src_dir in src_dirs:
-            for root, _, files in os.walk(src_dir):
-                for file in files:
-                    if file.endswith(extensions):
-                        _, ext = os.path.splitext(file.lower())
-                        if ext in cpp_extensions:
-                            cpp_count += 1
-                        elif ext in python_extensions:
-                            python_count += 1
-                        elif ext in js_extensions:
-                            js_count += 1
+        inventory = self._scan_source_dirs(src_dirs, inventory)
+        index = self._sync_repo_index(src_dirs, inventory)
+        for entry in inventory.iter_entries(src_dirs):
+            if entry.name.endswith(extensions):
+                language = index.get(entry.path).language
+                if language in cpp_languages:
+                    cpp_count += 1
+                elif language in python_languages:
+                    python_count += 1
+                elif language in js_languages:
+                    js_count += 1
 
         print(f"🔍 项目类型检测结果: ")
         print(f"   C++ 文件: {cpp_count} 个")
@@ -606,23 +1295,36 @@ class CodeProjectAIHelper:
         print(f"   检测到项目类型: {detected_type}")
         return detected_type
 
-    def _get_changed_files_multi(self, src_dirs: List[str], since_time: str = None) -> Set[str]:
+    def _get_changed_files_multi(self, src_dirs: List[str], since_time: str = None,
+                                 inventory: FileInventory = None, extensions: tuple = None,
+                                 baseline: str = DEFAULT_BASELINE,
+                                 reports: Dict[str, MerkleDiff] = None,
+                                 git_mode: bool = False, git_rev: str = None) -> Set[str]:
         """
         获取多个目录中变更的文件列表
+        传入 reports 时按源目录保存比较结果（新增、修改、删除的文件），用于输出变更摘要
         """
         changed_files = set()
+        inventory = self._scan_source_dirs(src_dirs, inventory)
 
         for src_dir in src_dirs:
-            changed_in_dir = self._get_changed_files(src_dir, since_time)
+            changed_in_dir = self._get_changed_files(src_dir, since_time, inventory, extensions,
+                                                     baseline, reports, git_mode, git_rev)
             changed_files.update(changed_in_dir)
 
         return changed_files
 
-    def _get_changed_files(self, src_dir: str, since_time: str = None) -> set:
+    def _get_changed_files(self, src_dir: str, since_time: str = None,
+                           inventory: FileInventory = None, extensions: tuple = None,
+                           baseline: str = DEFAULT_BASELINE,
+                           reports: Dict[str, MerkleDiff] = None,
+                           git_mode: bool = False, git_rev: str = None) -> set:
         """
         获取变更的文件列表
+        git_mode 为 True 时由 git 报告变更（相对于 git_rev，默认 HEAD），无法使用 git 时改为与导出基线比较
         """
-        changed_files = set()
+        inventory = self._scan_source_dirs([src_dir], inventory)
+        entries = [entry for entry in inventory.entries_for(src_dir) if not entry.excluded]
 
         # 如果指定了时间，比较文件修改时间
         if since_time:
@@ -631,95 +1333,140 @@ class CodeProjectAIHelper:
             except:
                 since_timestamp = 0
 
-            for root, _, files in os.walk(src_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, src_dir)
-                    # 检查是否应该排除
-                    if self._should_exclude_file(rel_path, self.exclude_patterns):
-                        continue
-                    if os.path.getmtime(file_path) > since_timestamp:
-                        changed_files.add(rel_path)
+            diff = MerkleDiff()
+            diff.modified = [entry.rel_path for entry in entries if entry.mtime > since_timestamp]
         else:
-            # 否则比较文件哈希值
-            metadata_file = os.path.join(self.metadata_dir, "export_metadata.json")
-            if os.path.exists(metadata_file):
+            diff = self._diff_against_git(src_dir, entries, git_rev) if git_mode else None
+            if diff is None:
+                # 否则与基线中该源目录的 Merkle 树比较
                 try:
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-
-                    current_hashes = self._get_file_hashes(src_dir)
-                    previous_hashes = metadata.get('file_hashes', {})
-
-                    for file_path, current_hash in current_hashes.items():
-                        # 检查是否应该排除
-                        if self._should_exclude_file(file_path, self.exclude_patterns):
-                            continue
-                        previous_hash = previous_hashes.get(file_path)
-                        if previous_hash != current_hash:
-                            changed_files.add(file_path)
-                except:
+                    diff = self._diff_against_baseline(src_dir, inventory, entries, extensions, baseline)
+                except Exception as e:
                     # 如果无法读取元数据，返回所有文件（排除排除的文件）
-                    for root, _, files in os.walk(src_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(file_path, src_dir)
-                            if not self._should_exclude_file(rel_path, self.exclude_patterns):
-                                changed_files.add(rel_path)
-            else:
-                # 如果没有元数据，返回所有文件（排除排除的文件）
-                for root, _, files in os.walk(src_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, src_dir)
-                        if not self._should_exclude_file(rel_path, self.exclude_patterns):
-                            changed_files.add(rel_path)
+                    print(f"⚠️  读取导出基线失败: {e}")
+                    diff = None
+            if diff is None:
+                # 如果基线中没有该目录，返回所有文件（排除排除的文件）
+                diff = MerkleDiff()
+                diff.added = [entry.rel_path for entry in entries]
+
+        if reports is not None:
+            reports[src_dir] = diff
+        return set(diff.changed)
+
+    @staticmethod
+    def _diff_against_git(src_dir: str, entries: List[FileEntry], git_rev: str = None) -> Optional[MerkleDiff]:
+        """
+        由 git 报告源目录中的变更文件，只保留扫描清单中未被排除的文件；
+        不在 git 仓库中或 git 调用失败时返回 None
+        """
+        try:
+            changes = git_changed_files(src_dir, git_rev)
+        except GitChangeError as e:
+            print(f"⚠️  无法通过 git 获取 {src_dir} 的变更: {e}，改为与导出基线比较")
+            return None
+
+        current = {entry.rel_path for entry in entries}
+        diff = MerkleDiff()
+        diff.added = [rel_path for rel_path in changes.added if rel_path in current]
+        diff.modified = [rel_path for rel_path in changes.modified if rel_path in current]
+        diff.deleted = changes.deleted
+        return diff
+
+    def _diff_against_baseline(self, src_dir: str, inventory: FileInventory, entries: List[FileEntry],
+                               extensions: tuple, baseline: str) -> Optional[MerkleDiff]:
+        """
+        自顶向下比较目录树：stat 摘要与基线一致的子树直接跳过，
+        只有变化的目录中的文件才需要计算哈希；基线中没有该目录时返回 None
+        """
+        store = self._get_metadata_store()
+        if not store.has_dir(baseline, src_dir):
+            return None
+
+        index = self._sync_repo_index([src_dir], inventory)
+        previous_hashes = store.get_hashes(baseline, src_dir)
+        # 旧版迁移来的基线没有目录摘要，此时会逐个比较所有文件
+        stored_dirs = store.get_dir_digests(baseline, src_dir)
+
+        tree = build_tree(entries)
+        if stored_dirs:
+            compute_stat_digests(tree, self._baseline_time_ns(store.get_export_time(baseline, src_dir)))
+
+        def current_hash(entry: FileEntry, previous_hash: str) -> str:
+            if previous_hash.startswith(STAT_FINGERPRINT_PREFIX) or \
+                    (extensions is not None and not entry.name.endswith(extensions)):
+                # 上次只记录了 stat 指纹的文件、以及不会被导出的文件按 stat 指纹比较
+                return self._stat_fingerprint(entry)
+            index.ensure_hashes([entry])
+            return index.get(entry.path).hash or ""
+
+        return diff_tree(tree, stored_dirs, previous_hashes, current_hash)
+
+    @staticmethod
+    def _baseline_time_ns(export_time: Optional[str]) -> int:
+        """基线记录时间（纳秒），晚于此时间修改的文件不能只凭 stat 判断为未变化"""
+        try:
+            return int(datetime.fromisoformat(export_time).timestamp() * 1_000_000_000)
+        except (TypeError, ValueError):
+            return 0
 
-        return changed_files
+    @staticmethod
+    def _stat_fingerprint(entry: FileEntry) -> str:
+        """不读取内容的文件指纹（大小和修改时间）"""
+        return f"{STAT_FINGERPRINT_PREFIX}{entry.size}:{entry.mtime_ns}"
 
-    def _get_file_hashes(self, src_dir: str) -> Dict[str, str]:
+    def _get_file_hashes(self, src_dir: str, inventory: FileInventory = None,
+                         extensions: tuple = None) -> Dict[str, str]:
         """
         获取目录中所有文件的哈希值（排除指定的文件）
+        哈希来自仓库索引，只有 stat 签名变化的文件才会被重新读取；
+        指定 extensions 时，不会被导出的其他文件只记录 stat 指纹，不读取内容
         """
+        inventory = self._scan_source_dirs([src_dir], inventory)
+        index = self._sync_repo_index([src_dir], inventory)
+        entries = [entry for entry in inventory.entries_for(src_dir) if not entry.excluded]
+
         file_hashes = {}
-        for root, _, files in os.walk(src_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, src_dir)
-                # 检查是否应该排除
-                if self._should_exclude_file(rel_path, self.exclude_patterns):
-                    continue
-                try:
-                    with open(file_path, 'rb') as f:
-                        content = f.read()
-                        file_hash = hashlib.md5(content).hexdigest()
-                        file_hashes[rel_path] = file_hash
-                except:
-                    file_hashes[rel_path] = ""
+        content_entries = []
+        for entry in entries:
+            if extensions is None or entry.name.endswith(extensions):
+                content_entries.append(entry)
+            else:
+                file_hashes[entry.rel_path] = self._stat_fingerprint(entry)
+
+        index.ensure_hashes(content_entries)
+        for entry in content_entries:
+            file_hashes[entry.rel_path] = index.get(entry.path).hash or ""
         return file_hashes
 
-    def _save_export_metadata_multi(self, src_dirs: List[str], output_file: str):
+    def _save_export_metadata_multi(self, src_dirs: List[str], output_file: str,
+                                    inventory: FileInventory = None, extensions: tuple = None,
+                                    baseline: str = DEFAULT_BASELINE):
         """
-        保存多个目录的导出元数据，用于增量导出
+        保存多个目录的导出元数据（文件哈希和目录 Merkle 摘要），用于增量导出
+        只更新基线中本次导出的源目录，其他源目录的记录保持不变
         """
-        if not os.path.exists(self.metadata_dir):
-            os.makedirs(self.metadata_dir)
+        record_ns = time.time_ns()
+        export_time = datetime.fromtimestamp(record_ns / 1_000_000_000).isoformat()
 
-        all_file_hashes = {}
+        dir_hashes = {}
+        dir_digests = {}
+        inventory = self._scan_source_dirs(src_dirs, inventory)
         for src_dir in src_dirs:
-            dir_hashes = self._get_file_hashes(src_dir)
-            all_file_hashes.update(dir_hashes)
-
-        metadata = {
-            'export_time': datetime.now().isoformat(),
-            'source_dirs': [os.path.abspath(src_dir) for src_dir in src_dirs],
-            'output_file': os.path.abspath(output_file),
-            'file_hashes': all_file_hashes
-        }
-
-        metadata_file = os.path.join(self.metadata_dir, "export_metadata.json")
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+            file_hashes = self._get_file_hashes(src_dir, inventory, extensions)
+            tree = build_tree([entry for entry in inventory.entries_for(src_dir) if not entry.excluded])
+            compute_stat_digests(tree, record_ns)
+            compute_digests(tree, file_hashes)
+            dir_hashes[src_dir] = file_hashes
+            dir_digests[src_dir] = {node.rel_dir: (node.stat_digest or "", node.digest)
+                                    for node in iter_nodes(tree)}
+
+        store = self._get_metadata_store()
+        store.record_export(baseline, dir_hashes, output_file, export_time, dir_digests)
+        # 关闭内容保存后，以前保存的内容在不再被引用时同样清理
+        if self.config_manager.get_store_baseline_contents() or \
+                os.path.isdir(self._get_object_store().objects_dir):
+            self._prune_objects()
 
     def _calculate_diff(self, file_path: str, new_content: str) -> Dict:
         """
@@ -784,8 +1531,20 @@ class CodeProjectAIHelper:
     def validate_response_format(self, markdown_content: str, verbose: bool = False) -> Dict:
         """
         验证AI响应格式是否正确
+        如果存在仓库索引，同时标注响应中的每个文件是已有文件还是新文件
         """
-        return self.response_validator.validate(markdown_content, verbose)
+        result = self.response_validator.validate(markdown_content, verbose)
+        index = self._get_repo_index()
+        if index.entries and result['files']:
+            result['file_status'] = {
+                file_path: 'existing' if index.find_by_rel_path(file_path) else 'new'
+                for file_path in result['files']
+            }
+        return result
+
+    def validate_response_file(self, markdown_file: str, verbose: bool = False) -> Dict:
+        """验证响应文件的格式：文件以 mmap 映射后直接解析，不读入内存，'-' 表示标准输入"""
+        return self.validate_response_format(map_response(markdown_file), verbose)
 
     def list_supported_extensions(self) -> List[str]:
         """列出支持的文件扩展名"""
@@ -796,26 +1555,25 @@ class CodeProjectAIHelper:
         调试方法：显示解析结果
         """
         try:
-            with open(markdown_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # 只解析一次：标准格式没有文件时结果为灵活格式的文件；内容逐个解码
+            parsed = self.response_parser.parse_file(markdown_file)
+            standard_files = parsed.files if parsed.format_type == 'standard' else []
 
             print("=== 标准解析结果 ===")
-            standard_files = self.response_parser.extract_files_standard(content)
-            for i, (file_path, lang, file_content) in enumerate(standard_files):
-                print(f"文件 {i + 1}: {file_path} ({lang})")
-                print(f"内容长度: {len(file_content)} 字符")
+            for i, parsed_file in enumerate(standard_files):
+                print(f"文件 {i + 1}: {parsed_file.path} ({parsed_file.lang})")
+                print(f"内容长度: {len(parsed_file.content)} 字符")
                 print("---")
 
             print(f"\n总共识别到 {len(standard_files)} 个文件")
 
             if not standard_files:
                 print("\n=== 灵活解析结果 ===")
-                flexible_files = self.response_parser.extract_files_flexible(content)
-                for i, (file_path, lang, file_content) in enumerate(flexible_files):
-                    print(f"文件 {i + 1}: {file_path} ({lang})")
-                    print(f"内容长度: {len(file_content)} 字符")
+                for i, parsed_file in enumerate(parsed.files):
+                    print(f"文件 {i + 1}: {parsed_file.path} ({parsed_file.lang})")
+                    print(f"内容长度: {len(parsed_file.content)} 字符")
                     print("---")
-                print(f"总共识别到 {len(flexible_files)} 个文件")
+                print(f"总共识别到 {len(parsed.files)} 个文件")
 
         except Exception as e:
             print(f"调试解析失败: {e}")
@@ -839,9 +1597,10 @@ class CodeProjectAIHelper:
             print("=== 详细解析调试 ===")
             print("原始内容行数: ", len(content.split('\n')))
 
-            # 尝试标准解析
+            # 尝试标准解析（只解析一次，标准格式没有文件时结果为灵活格式的文件）
             print("\n--- 标准解析尝试 ---")
-            standard_files = self.response_parser.extract_files_standard(content)
+            parsed = self.response_parser.parse(content)
+            standard_files = parsed.files if parsed.format_type == 'standard' else []
             print(f"标准解析找到 {len(standard_files)} 个文件")
 
             for i, (file_path, lang, file_content) in enumerate(standard_files):
@@ -857,7 +1616,7 @@ class CodeProjectAIHelper:
             # 如果标准解析失败，尝试灵活解析
             if not standard_files:
                 print("\n--- 灵活解析尝试 ---")
-                flexible_files = self.response_parser.extract_files_flexible(content)
+                flexible_files = parsed.files
                 print(f"灵活解析找到 {len(flexible_files)} 个文件")
 
                 for i, (file_path, lang, file_content) in enumerate(flexible_files):
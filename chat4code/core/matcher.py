@@ -0,0 +1,78 @@
+"""
+chat4code 排除模式匹配模块
+将 exclude_patterns 一次性编译为组合正则和目录前缀集合，并支持在遍历时剪枝目录
+"""
+
+import fnmatch
+import os
+import re
+from typing import List, Optional, Pattern
+
+_GLOB_CHARS = ('*', '?', '[')
+
+
+class ExcludeMatcher:
+    """
+    编译后的排除模式匹配器，匹配结果与逐个模式调用 fnmatch.fnmatch 一致：
+    - 普通模式 P 匹配 fnmatch(path, P)
+    - 目录模式 P/ 匹配 fnmatch(path, P/*)，即该目录下的所有文件
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._sep = os.path.normcase('/')
+
+        file_regexes = []
+        prune_regexes = []
+        # 不含通配符的目录模式（如 node_modules/）只需比较路径前缀
+        self.dir_prefixes = set()
+
+        for pattern in self.patterns:
+            if pattern.endswith('/'):
+                base = pattern.rstrip('/')
+                if base and not any(c in base for c in _GLOB_CHARS):
+                    self.dir_prefixes.add(os.path.normcase(base))
+                    continue
+                pattern = base + '/*'
+            regex = fnmatch.translate(os.path.normcase(pattern))
+            file_regexes.append(regex)
+            # 以 * 结尾的模式：只要目录路径加分隔符能匹配，目录下的任何文件都能匹配
+            if pattern.endswith('*'):
+                prune_regexes.append(regex)
+
+        self._file_regex = self._combine(file_regexes)
+        self._prune_regex = self._combine(prune_regexes)
+
+    @staticmethod
+    def _combine(regexes: List[str]) -> Optional[Pattern]:
+        if not regexes:
+            return None
+        return re.compile('|'.join(regexes))
+
+    def _under_dir_prefix(self, path: str) -> bool:
+        """检查路径的某个上级目录是否命中目录前缀集合"""
+        if not self.dir_prefixes:
+            return False
+        index = path.find(self._sep)
+        while index != -1:
+            if path[:index] in self.dir_prefixes:
+                return True
+            index = path.find(self._sep, index + 1)
+        return False
+
+    def is_excluded(self, rel_path: str) -> bool:
+        """检查文件（相对于源目录的路径）是否应该被排除"""
+        path = os.path.normcase(rel_path)
+        if self._file_regex is not None and self._file_regex.match(path):
+            return True
+        return self._under_dir_prefix(path)
+
+    def excludes_dir(self, rel_dir: str) -> bool:
+        """
+        检查目录下的所有文件是否都会被排除
+        返回 True 时遍历可以直接跳过该目录
+        """
+        path = os.path.normcase(rel_dir) + self._sep
+        if self._under_dir_prefix(path):
+            return True
+        return self._prune_regex is not None and self._prune_regex.match(path) is not None
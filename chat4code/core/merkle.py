@@ -0,0 +1,153 @@
+"""
+chat4code 目录 Merkle 树模块
+每个目录记录两个摘要：
+- stat 摘要：由子项名称和文件的 (大小, mtime_ns, inode) 组合而成，比较时不需要读取文件
+- 内容摘要：由子项名称和文件内容哈希组合而成
+增量比较时自顶向下对比 stat 摘要，摘要一致的子树整体跳过，只有变化的目录才比较文件哈希
+"""
+
+import hashlib
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .scanner import FileEntry
+
+
+class DirNode:
+    """目录树中的单个目录"""
+
+    __slots__ = ('rel_dir', 'files', 'dirs', 'stat_digest', 'digest')
+
+    def __init__(self, rel_dir: str):
+        self.rel_dir = rel_dir
+        self.files: Dict[str, FileEntry] = {}
+        self.dirs: Dict[str, 'DirNode'] = {}
+        # None 表示子树中有无法信任 stat 的文件，比较时必须展开
+        self.stat_digest: Optional[str] = None
+        self.digest: Optional[str] = None
+
+
+class MerkleDiff:
+    """一个源目录与基线的比较结果（均为相对于源目录的路径）"""
+
+    __slots__ = ('added', 'modified', 'deleted', 'visited_dirs', 'skipped_dirs')
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.modified: List[str] = []
+        self.deleted: List[str] = []
+        self.visited_dirs = 0
+        self.skipped_dirs = 0
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+
+def build_tree(entries: List[FileEntry]) -> DirNode:
+    """用扫描得到的文件（不含被排除的文件）建立目录树"""
+    root = DirNode('')
+    nodes = {'': root}
+    for entry in entries:
+        _node_for(nodes, os.path.dirname(entry.rel_path)).files[entry.name] = entry
+    return root
+
+
+def _node_for(nodes: Dict[str, DirNode], rel_dir: str) -> DirNode:
+    node = nodes.get(rel_dir)
+    if node is None:
+        parent = _node_for(nodes, os.path.dirname(rel_dir))
+        node = DirNode(rel_dir)
+        parent.dirs[os.path.basename(rel_dir)] = node
+        nodes[rel_dir] = node
+    return node
+
+
+def iter_nodes(root: DirNode) -> Iterator[DirNode]:
+    """先序遍历所有目录"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.dirs.values())
+
+
+def _combine(items: List[Tuple[str, str, str]]) -> str:
+    digest = hashlib.md5()
+    for kind, name, value in sorted(items):
+        digest.update(f"{kind} {name}\0{value}\n".encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+def compute_stat_digests(node: DirNode, trusted_before_ns: int) -> Optional[str]:
+    """
+    计算目录及其子目录的 stat 摘要
+    修改时间不早于 trusted_before_ns 的文件在同一时间粒度内可能再次被修改，
+    其所在目录及所有上级目录的摘要记为 None
+    """
+    items = []
+    trusted = True
+    for name, entry in node.files.items():
+        if entry.mtime_ns >= trusted_before_ns:
+            trusted = False
+        items.append(('f', name, f"{entry.size}:{entry.mtime_ns}:{entry.inode}"))
+    for name, child in node.dirs.items():
+        child_digest = compute_stat_digests(child, trusted_before_ns)
+        if child_digest is None:
+            trusted = False
+        items.append(('d', name, child_digest or ''))
+    node.stat_digest = _combine(items) if trusted else None
+    return node.stat_digest
+
+
+def compute_digests(node: DirNode, file_hashes: Dict[str, str]) -> str:
+    """用文件哈希（{相对路径: 哈希}）计算目录及其子目录的内容摘要"""
+    items = [('f', name, file_hashes.get(entry.rel_path, '')) for name, entry in node.files.items()]
+    items.extend(('d', name, compute_digests(child, file_hashes)) for name, child in node.dirs.items())
+    node.digest = _combine(items)
+    return node.digest
+
+
+def diff_tree(root: DirNode, stored_dirs: Dict[str, Tuple[str, str]], stored_files: Dict[str, str],
+              current_hash: Callable[[FileEntry, str], str]) -> MerkleDiff:
+    """
+    自顶向下与基线比较
+    stored_dirs 为 {相对目录: (stat 摘要, 内容摘要)}，stored_files 为 {相对路径: 哈希}；
+    current_hash(entry, previous_hash) 只会对 stat 发生变化的目录中的已有文件调用
+    """
+    stored_by_dir: Dict[str, Dict[str, str]] = {}
+    for rel_path, file_hash in stored_files.items():
+        stored_by_dir.setdefault(os.path.dirname(rel_path), {})[os.path.basename(rel_path)] = file_hash
+
+    diff = MerkleDiff()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stored = stored_dirs.get(node.rel_dir)
+        if stored is not None and node.stat_digest is not None and stored[0] == node.stat_digest:
+            diff.skipped_dirs += 1
+            continue
+        diff.visited_dirs += 1
+
+        previous = stored_by_dir.get(node.rel_dir, {})
+        for name, entry in node.files.items():
+            previous_hash = previous.get(name)
+            if previous_hash is None:
+                diff.added.append(entry.rel_path)
+            elif current_hash(entry, previous_hash) != previous_hash:
+                diff.modified.append(entry.rel_path)
+        for name in previous:
+            if name not in node.files:
+                diff.deleted.append(os.path.join(node.rel_dir, name) if node.rel_dir else name)
+        stack.extend(node.dirs.values())
+
+    # 基线中存在、但当前已经整体消失的目录
+    current_dirs = {node.rel_dir for node in iter_nodes(root)}
+    for rel_dir, previous in stored_by_dir.items():
+        if rel_dir not in current_dirs:
+            diff.deleted.extend(os.path.join(rel_dir, name) if rel_dir else name for name in previous)
+
+    diff.added.sort()
+    diff.modified.sort()
+    diff.deleted.sort()
+    return diff
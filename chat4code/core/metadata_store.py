@@ -0,0 +1,204 @@
+"""
+chat4code 导出元数据存储模块
+用元数据目录中的 SQLite 数据库保存增量导出的基线：每个基线、每个源目录、每个文件一行，
+另外每个目录一行保存 Merkle 摘要；更新时只改动有变化的行；
+支持命名基线，并兼容迁移旧的 export_metadata.json
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+DB_FILENAME = "export_metadata.db"
+LEGACY_METADATA_FILENAME = "export_metadata.json"
+DEFAULT_BASELINE = "default"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS baselines (
+    name TEXT PRIMARY KEY,
+    export_time TEXT NOT NULL,
+    output_file TEXT
+);
+CREATE TABLE IF NOT EXISTS baseline_dirs (
+    baseline TEXT NOT NULL,
+    src_dir TEXT NOT NULL,
+    export_time TEXT NOT NULL,
+    PRIMARY KEY (baseline, src_dir)
+);
+CREATE TABLE IF NOT EXISTS files (
+    baseline TEXT NOT NULL,
+    src_dir TEXT NOT NULL,
+    rel_path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (baseline, src_dir, rel_path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_rel_path ON files (rel_path);
+CREATE TABLE IF NOT EXISTS dir_digests (
+    baseline TEXT NOT NULL,
+    src_dir TEXT NOT NULL,
+    rel_dir TEXT NOT NULL,
+    stat_digest TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (baseline, src_dir, rel_dir)
+) WITHOUT ROWID;
+"""
+
+
+class MetadataStore:
+    """
+    导出基线存储
+    源目录统一保存为绝对路径，同一相对路径在不同源目录中互不影响
+    """
+
+    def __init__(self, metadata_dir: str):
+        self.metadata_dir = metadata_dir
+        self.db_file = os.path.join(metadata_dir, DB_FILENAME)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        if not os.path.exists(self.metadata_dir):
+            os.makedirs(self.metadata_dir)
+        is_new = not os.path.exists(self.db_file)
+        conn = sqlite3.connect(self.db_file)
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        if is_new:
+            self._migrate_legacy_json()
+        return conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _migrate_legacy_json(self):
+        """
+        将旧版 export_metadata.json 导入为默认基线
+        旧格式的哈希只按相对路径保存，因此复制到其记录的每个源目录下
+        """
+        legacy_file = os.path.join(self.metadata_dir, LEGACY_METADATA_FILENAME)
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            file_hashes = metadata.get('file_hashes', {})
+            dir_hashes = {src_dir: file_hashes for src_dir in metadata.get('source_dirs', [])}
+            self.record_export(DEFAULT_BASELINE, dir_hashes, metadata.get('output_file'),
+                               metadata.get('export_time'))
+            print(f"ℹ️  已将 {LEGACY_METADATA_FILENAME} 迁移到 {DB_FILENAME}")
+        except Exception as e:
+            print(f"⚠️  迁移旧的导出元数据失败: {e}")
+
+    @staticmethod
+    def _dir_key(src_dir: str) -> str:
+        return os.path.abspath(src_dir)
+
+    def has_dir(self, baseline: str, src_dir: str) -> bool:
+        """检查基线中是否记录过该源目录"""
+        row = self._connect().execute(
+            "SELECT 1 FROM baseline_dirs WHERE baseline = ? AND src_dir = ?",
+            (baseline, self._dir_key(src_dir))).fetchone()
+        return row is not None
+
+    def get_hashes(self, baseline: str, src_dir: str) -> Dict[str, str]:
+        """获取基线中某个源目录下所有文件的 {相对路径: 哈希}"""
+        rows = self._connect().execute(
+            "SELECT rel_path, hash FROM files WHERE baseline = ? AND src_dir = ?",
+            (baseline, self._dir_key(src_dir)))
+        return dict(rows)
+
+    def get_export_time(self, baseline: str, src_dir: str) -> Optional[str]:
+        """获取基线中某个源目录的记录时间"""
+        row = self._connect().execute(
+            "SELECT export_time FROM baseline_dirs WHERE baseline = ? AND src_dir = ?",
+            (baseline, self._dir_key(src_dir))).fetchone()
+        return row[0] if row else None
+
+    def get_dir_digests(self, baseline: str, src_dir: str) -> Dict[str, Tuple[str, str]]:
+        """获取基线中某个源目录下所有目录的 {相对目录: (stat 摘要, 内容摘要)}"""
+        rows = self._connect().execute(
+            "SELECT rel_dir, stat_digest, digest FROM dir_digests WHERE baseline = ? AND src_dir = ?",
+            (baseline, self._dir_key(src_dir)))
+        return {rel_dir: (stat_digest, digest) for rel_dir, stat_digest, digest in rows}
+
+    def record_export(self, baseline: str, dir_hashes: Dict[str, Dict[str, str]],
+                      output_file: str = None, export_time: str = None,
+                      dir_digests: Dict[str, Dict[str, Tuple[str, str]]] = None):
+        """
+        在一个事务中更新基线：只替换本次导出的源目录，
+        并且只插入、更新或删除哈希有变化的文件行和目录摘要行
+        """
+        if export_time is None:
+            export_time = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO baselines (name, export_time, output_file) VALUES (?, ?, ?)",
+                (baseline, export_time, os.path.abspath(output_file) if output_file else None))
+            for src_dir, hashes in dir_hashes.items():
+                dir_key = self._dir_key(src_dir)
+                previous = self.get_hashes(baseline, src_dir)
+                upserts = [(baseline, dir_key, rel_path, file_hash)
+                           for rel_path, file_hash in hashes.items()
+                           if previous.get(rel_path) != file_hash]
+                deletes = [(baseline, dir_key, rel_path)
+                           for rel_path in previous if rel_path not in hashes]
+                if upserts:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO files (baseline, src_dir, rel_path, hash) VALUES (?, ?, ?, ?)",
+                        upserts)
+                if deletes:
+                    conn.executemany(
+                        "DELETE FROM files WHERE baseline = ? AND src_dir = ? AND rel_path = ?",
+                        deletes)
+                self._update_dir_digests(conn, baseline, src_dir,
+                                         (dir_digests or {}).get(src_dir, {}))
+                conn.execute(
+                    "INSERT OR REPLACE INTO baseline_dirs (baseline, src_dir, export_time) VALUES (?, ?, ?)",
+                    (baseline, dir_key, export_time))
+
+    def _update_dir_digests(self, conn: sqlite3.Connection, baseline: str, src_dir: str,
+                            digests: Dict[str, Tuple[str, str]]):
+        dir_key = self._dir_key(src_dir)
+        previous = self.get_dir_digests(baseline, src_dir)
+        upserts = [(baseline, dir_key, rel_dir, stat_digest, digest)
+                   for rel_dir, (stat_digest, digest) in digests.items()
+                   if previous.get(rel_dir) != (stat_digest, digest)]
+        deletes = [(baseline, dir_key, rel_dir) for rel_dir in previous if rel_dir not in digests]
+        if upserts:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dir_digests (baseline, src_dir, rel_dir, stat_digest, digest) "
+                "VALUES (?, ?, ?, ?, ?)", upserts)
+        if deletes:
+            conn.executemany(
+                "DELETE FROM dir_digests WHERE baseline = ? AND src_dir = ? AND rel_dir = ?",
+                deletes)
+
+    def referenced_hashes(self) -> Set[str]:
+        """获取所有基线中引用的文件哈希"""
+        rows = self._connect().execute("SELECT DISTINCT hash FROM files")
+        return {row[0] for row in rows}
+
+    def list_baselines(self) -> List[Dict]:
+        """列出所有基线及其包含的源目录和文件数"""
+        conn = self._connect()
+        baselines = []
+        for name, export_time, output_file in conn.execute(
+                "SELECT name, export_time, output_file FROM baselines ORDER BY name"):
+            src_dirs = [row[0] for row in conn.execute(
+                "SELECT src_dir FROM baseline_dirs WHERE baseline = ? ORDER BY src_dir", (name,))]
+            file_count = conn.execute(
+                "SELECT COUNT(*) FROM files WHERE baseline = ?", (name,)).fetchone()[0]
+            baselines.append({
+                'name': name,
+                'export_time': export_time,
+                'output_file': output_file,
+                'source_dirs': src_dirs,
+                'file_count': file_count
+            })
+        return baselines
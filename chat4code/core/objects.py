@@ -0,0 +1,77 @@
+"""
+chat4code 内容对象存储模块
+在元数据目录的 objects/ 中按内容哈希保存导出文件的文本（zlib 压缩），
+用于增量导出时生成相对于基线的差异；不再被任何基线引用的对象会被清理
+"""
+
+import hashlib
+import os
+import zlib
+from typing import Iterable, Optional
+
+OBJECTS_DIRNAME = "objects"
+
+# 写入时的压缩级别：导出时逐个写入，优先考虑速度
+_COMPRESS_LEVEL = 1
+
+
+class ObjectStore:
+    """
+    内容寻址的文本存储
+    对象以源文件原始字节的 MD5 命名（与基线中记录的文件哈希相同），保存的是解码后的文本
+    """
+
+    def __init__(self, metadata_dir: str):
+        self.objects_dir = os.path.join(metadata_dir, OBJECTS_DIRNAME)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def put_text(self, digest: str, text: str):
+        """保存文本；对象已存在时不重复写入"""
+        path = self._path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(zlib.compress(text.encode('utf-8', 'surrogatepass'), _COMPRESS_LEVEL))
+        os.replace(temp_path, path)
+
+    def add_text(self, text: str) -> str:
+        """以文本的 UTF-8 编码的 MD5 保存文本（用于不对应某个源文件版本的内容，如差异），返回哈希"""
+        digest = hashlib.md5(text.encode('utf-8', 'surrogatepass')).hexdigest()
+        self.put_text(digest, text)
+        return digest
+
+    def get_text(self, digest: str) -> Optional[str]:
+        """读取文本，对象不存在或已损坏时返回 None"""
+        try:
+            with open(self._path(digest), 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8', 'surrogatepass')
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """删除不在 keep 中的对象，返回删除的数量"""
+        keep = set(keep)
+        removed = 0
+        try:
+            prefixes = list(os.scandir(self.objects_dir))
+        except OSError:
+            return 0
+        for prefix in prefixes:
+            if not prefix.is_dir():
+                continue
+            with os.scandir(prefix.path) as it:
+                for entry in it:
+                    if prefix.name + entry.name not in keep:
+                        try:
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            pass
+        return removed
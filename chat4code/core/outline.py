@@ -0,0 +1,291 @@
+"""
+chat4code 代码骨架模块
+导出骨架时保留签名、类成员和声明，把函数体替换为带行号范围的标记：
+- Python：用 ast 找到函数体（保留文档字符串）
+- C/C++：线性扫描括号，跳过注释、字符串和预处理指令，把函数体替换为 { /* 省略 L12-40 */ }
+之后可以用 --expand 文件:起始行-结束行 取回指定的函数体
+"""
+
+import ast
+import bisect
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+PYTHON_EXTENSIONS = ('.py', '.pyi')
+C_FAMILY_EXTENSIONS = ('.c', '.cc', '.cpp', '.cxx', '.c++', '.h', '.hh', '.hpp', '.hxx', '.inl')
+
+# 使用 # 注释的语言（--expand 输出行号标记时使用）
+_HASH_COMMENT_EXTENSIONS = ('.py', '.pyi', '.sh', '.bash', '.yaml', '.yml', '.rb', '.pl', '.r', '.toml')
+
+# C/C++ 扫描时需要关注的字符
+_C_SPECIAL_RE = re.compile(r'[{};"\'/#]')
+_C_BRACE_RE = re.compile(r'[{}"\'/#]')
+# 分类语句前缀时去掉的注释和字符串
+_C_STRIP_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.S)
+_C_CLASS_KEY_RE = re.compile(r'(?:template\s*<.*>\s*)?(?:typedef\s+)?(?:class|struct|union|enum|namespace)\b', re.S)
+_SINGLE_COLON_RE = re.compile(r'(?<!:):(?!:)')
+
+
+def elision_marker(start: int, end: int) -> str:
+    return f"省略 L{start}-{end}"
+
+
+def outline_source(content: str, ext: str) -> Optional[str]:
+    """生成骨架；不支持的语言或无法解析时返回 None"""
+    ext = ext.lower()
+    if ext in PYTHON_EXTENSIONS:
+        return outline_python(content)
+    if ext in C_FAMILY_EXTENSIONS:
+        return outline_c_family(content)
+    return None
+
+
+def outline_python(content: str) -> Optional[str]:
+    """Python 骨架：函数体（文档字符串之后的部分）替换为 "...  # 省略 L起-止"，语法错误时返回 None"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    # (起始行, 结束行)，只记录最外层的函数体，嵌套在其中的函数随之省略
+    ranges: List[Tuple[int, int]] = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                body_range = _python_body_range(child)
+                if body_range is not None:
+                    ranges.append(body_range)
+                    continue
+            stack.append(child)
+
+    if not ranges:
+        return content
+    lines = content.split('\n')
+    output = []
+    line_no = 1
+    for start, end in sorted(ranges):
+        output.extend(lines[line_no - 1:start - 1])
+        first_line = lines[start - 1]
+        indent = first_line[:len(first_line) - len(first_line.lstrip())]
+        output.append(indent + "...  # " + elision_marker(start, end))
+        line_no = end + 1
+    output.extend(lines[line_no - 1:])
+    return '\n'.join(output)
+
+
+def _python_body_range(node) -> Optional[Tuple[int, int]]:
+    body = node.body
+    first = body[0]
+    if isinstance(first, ast.Expr) and isinstance(getattr(first, 'value', None), ast.Constant) and \
+            isinstance(first.value.value, str):
+        # 保留文档字符串
+        body = body[1:]
+        if not body:
+            return None
+        first = body[0]
+    start = first.lineno
+    for decorator in getattr(first, 'decorator_list', []):
+        start = min(start, decorator.lineno)
+    if start <= node.lineno:
+        # 单行函数（def f(): return 1）保持原样
+        return None
+    return start, node.end_lineno
+
+
+class _CScanner:
+    """C/C++ 线性扫描器：定位代码中的括号，跳过注释、字符串、字符常量和预处理指令"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+
+    def skip(self, i: int) -> int:
+        """i 处是注释、字符串或预处理指令时返回其后的位置，否则返回 i"""
+        text = self.text
+        c = text[i]
+        if c == '/':
+            nxt = text[i + 1:i + 2]
+            if nxt == '/':
+                end = text.find('\n', i)
+                return self.length if end < 0 else end
+            if nxt == '*':
+                end = text.find('*/', i + 2)
+                return self.length if end < 0 else end + 2
+            return i
+        if c == '"':
+            return self._skip_string(i)
+        if c == "'":
+            # C++14 数字分隔符（如 1'000'000）
+            start = i
+            while start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                start -= 1
+            if start < i and text[start].isdigit():
+                return i + 1
+            return self._skip_quoted(i, "'")
+        if c == '#':
+            line_start = text.rfind('\n', 0, i) + 1
+            if text[line_start:i].strip():
+                return i
+            # 预处理指令（支持反斜杠续行）
+            j = i
+            while True:
+                end = text.find('\n', j)
+                if end < 0:
+                    return self.length
+                if text[end - 1:end] == '\\' or text[end - 2:end] == '\\\r':
+                    j = end + 1
+                    continue
+                return end
+        return i
+
+    def _skip_quoted(self, i: int, quote: str) -> int:
+        text = self.text
+        j = i + 1
+        while j < self.length:
+            c = text[j]
+            if c == '\\':
+                j += 2
+                continue
+            if c == quote or c == '\n':
+                return j + 1
+            j += 1
+        return self.length
+
+    def _skip_string(self, i: int) -> int:
+        text = self.text
+        if i > 0 and text[i - 1] == 'R':
+            # 原始字符串 R"delim(...)delim"
+            paren = text.find('(', i)
+            if paren > 0 and paren - i <= 17:
+                delimiter = ')' + text[i + 1:paren] + '"'
+                end = text.find(delimiter, paren)
+                return self.length if end < 0 else end + len(delimiter)
+        return self._skip_quoted(i, '"')
+
+    def find_matching(self, i: int) -> int:
+        """返回与 i 处的 { 匹配的 } 的位置，找不到时返回 -1"""
+        depth = 0
+        text = self.text
+        while True:
+            match = _C_BRACE_RE.search(text, i)
+            if match is None:
+                return -1
+            i = match.start()
+            c = text[i]
+            if c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+                if depth == 0:
+                    return i
+            else:
+                j = self.skip(i)
+                if j != i:
+                    i = j
+                    continue
+            i += 1
+
+
+def _classify_c_prefix(prefix: str) -> str:
+    """
+    根据 { 之前的语句前缀判断括号类型：
+    body 为函数体（包括 lambda），init 为构造函数初始化列表中的花括号初始化，container 为类、命名空间等
+    """
+    code = _C_STRIP_RE.sub('""', prefix).strip()
+    if ')' not in code:
+        return 'container'
+    if _C_CLASS_KEY_RE.match(code):
+        colon = _SINGLE_COLON_RE.search(code)
+        if colon is not None and colon.start() < code.index('('):
+            # 继承列表中带括号（如 decltype(...)）的类定义
+            return 'container'
+    last = code[-1]
+    if last.isalnum() or last in '_>':
+        # 参数列表之后出现单个冒号：构造函数初始化列表中的成员花括号初始化（如 buf_{1, 2}）
+        params_end = code.index(')')
+        if any(colon.start() > params_end for colon in _SINGLE_COLON_RE.finditer(code)):
+            return 'init'
+    return 'body'
+
+
+def outline_c_family(content: str) -> str:
+    """C/C++ 骨架：函数体替换为 { /* 省略 L起-止 */ }；括号不配对时返回原内容"""
+    scanner = _CScanner(content)
+    newlines = [match.start() for match in re.finditer('\n', content)]
+
+    def line_of(pos: int) -> int:
+        return bisect.bisect_left(newlines, pos) + 1
+
+    output = []
+    copied = 0
+    prefix_start = 0
+    i = 0
+    while True:
+        match = _C_SPECIAL_RE.search(content, i)
+        if match is None:
+            break
+        i = match.start()
+        c = content[i]
+        if c in ';}':
+            prefix_start = i + 1
+        elif c == '{':
+            kind = _classify_c_prefix(content[prefix_start:i])
+            if kind == 'container':
+                prefix_start = i + 1
+            else:
+                end = scanner.find_matching(i)
+                if end < 0:
+                    return content
+                if kind == 'body':
+                    output.append(content[copied:i])
+                    output.append("{ /* " + elision_marker(line_of(i), line_of(end)) + " */ }")
+                    copied = end + 1
+                    prefix_start = end + 1
+                i = end + 1
+                continue
+        else:
+            j = scanner.skip(i)
+            if j != i:
+                if c == '#':
+                    prefix_start = j
+                i = j
+                continue
+        i += 1
+    output.append(content[copied:])
+    return ''.join(output)
+
+
+def parse_expand_specs(specs: List[str]) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    解析 --expand 参数：文件:起始行-结束行 或 文件:行号，同一文件可以指定多次
+    返回 {相对路径（系统分隔符）: [(起始行, 结束行), ...]}
+    """
+    ranges: Dict[str, List[Tuple[int, int]]] = {}
+    for spec in specs:
+        path, sep, line_range = spec.rpartition(':')
+        start_text, _, end_text = line_range.partition('-')
+        try:
+            start = int(start_text)
+            end = int(end_text) if end_text else start
+        except ValueError:
+            start = end = 0
+        if not sep or not path or start < 1 or end < start:
+            raise ValueError(f"无效的 --expand 参数: {spec}（格式为 文件:起始行-结束行）")
+        rel_path = os.path.normpath(path.replace('/', os.sep))
+        ranges.setdefault(rel_path, []).append((start, end))
+    return ranges
+
+
+def extract_line_ranges(content: str, ranges: List[Tuple[int, int]], ext: str) -> str:
+    """取出指定的行，每段之前加一行注释标明行号范围"""
+    comment = '#' if ext.lower() in _HASH_COMMENT_EXTENSIONS else '//'
+    lines = content.split('\n')
+    output = []
+    for start, end in sorted(ranges):
+        end = min(end, len(lines))
+        output.append(f"{comment} L{start}-{end}")
+        output.extend(lines[start - 1:end])
+    return '\n'.join(output)
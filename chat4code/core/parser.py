@@ -1,137 +1,573 @@
 """
 chat4code 响应解析模块 - 支持文件删除操作
+响应按 UTF-8 字节扫描：可以一次解析整个响应，也可以流式地逐块输入，每个文件块在结束标记到达时立即产生
+解析结果只记录内容在共享缓冲区中的偏移，磁盘上的响应文件用 mmap 映射，内容在写入或比较差异时才解码
 """
 
+import bisect
+import mmap
 import os
 import re
-from typing import List, Tuple, Optional
+import sys
+from typing import BinaryIO, Iterator, List, Tuple, Optional, Union
+
+# 流式读取时每次读取的字节数上限
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 代码块的开始 / 结束标记行：三个以上的 ` 或 ~，之后为语言标识等信息
+_FENCE_RE = re.compile(rb'\s*(`{3,}|~{3,})(.*)')
+# 文件标题行（灵活格式允许 ## 之后有多个空白）
+_HEADING_RE = re.compile(r'\s*## (.*)')
+_FLEXIBLE_HEADING_RE = re.compile(r'\s*##\s+(.*)')
+_BLANK_RE = re.compile(rb'\s*$')
+_LEADING_SPACE_RE = re.compile(rb'\s*')
+_SPACE_BYTES = b' \t\n\r\x0b\x0c'
+# 各个状态下需要处理的行的行首（可能是标记行、标题行或非空行），其余的行整段跳过，不逐行处理
+_FENCE_LINE_RE = re.compile(rb'^[^\S\n]*(?:`{3}|~{3})', re.M)
+_NON_BLANK_LINE_RE = re.compile(rb'^[^\S\n]*\S', re.M)
+_SEEK_LINE_RE = re.compile(rb'^[^\S\n]*(?:`{3}|~{3}|## )', re.M)
+_FLEXIBLE_SEEK_LINE_RE = re.compile(rb'^[^\S\n]*(?:`{3}|~{3}|##[^\S\n])', re.M)
+
+# 章节标题（而不是文件路径）：1. 简介、A. 介绍、使用方法
+_NUMBERED_TITLE_RE = re.compile(r'^\d+(\.\d+)*\s')
+_LETTERED_TITLE_RE = re.compile(r'^[A-Z]\.\s')
+_PLAIN_TITLE_RE = re.compile(r'^[A-Z\u4e00-\u9fa5][^.]*$')
+_PATH_PREFIX_RE = re.compile(r'^(文件|File)[:：]?\s*')
+# 说明文件被删除的注释
+_SLASH_DELETE_NOTE_RE = re.compile(r'//\s*此文件.*删除', re.IGNORECASE)
+_HASH_DELETE_NOTE_RE = re.compile(r'#\s*此文件.*删除', re.IGNORECASE)
+
+_SEEK = 0
+_HEADING = 1
+_BLOCK = 2
+
+# 删除标记的文件内容
+DELETED_CONTENT = 'DELETED'
+
+
+class ParsedFile:
+    """
+    响应中解析出的一个文件：只记录路径、语言和内容在共享缓冲区中的字节范围 [start, end)（已去掉首尾空白），
+    内容在访问 content 时才解码，不访问就不复制；删除标记的语言为 'deleted'
+    可以像以前的 (文件路径, 语言, 内容) 元组一样解包、按下标访问和取长度
+    """
+
+    __slots__ = ('path', 'lang', 'buffer', 'start', 'end', 'flexible')
+
+    def __init__(self, path: str, lang: str, buffer, start: int, end: int, flexible: bool = False):
+        self.path = path
+        self.lang = lang
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        # 灵活格式：解码时移除代码中可能混入的说明文字
+        self.flexible = flexible
+
+    @property
+    def deleted(self) -> bool:
+        return self.lang == 'deleted'
+
+    @property
+    def size(self) -> int:
+        """内容的字节数"""
+        return self.end - self.start
+
+    @property
+    def content(self) -> str:
+        if self.deleted:
+            return DELETED_CONTENT
+        # 通过 memoryview 直接从缓冲区解码，不先复制出 bytes
+        with memoryview(self.buffer) as view:
+            text = str(view[self.start:self.end], 'utf-8').strip()
+        if self.flexible:
+            text = clean_code_content(text).strip()
+        return text
+
+    def __iter__(self):
+        return iter((self.path, self.lang, self.content))
+
+    def __getitem__(self, index):
+        return (self.path, self.lang, self.content)[index]
+
+    def __len__(self):
+        return 3
+
+    def __repr__(self):
+        return f"ParsedFile({self.path!r}, {self.lang!r}, {self.start}:{self.end})"
+
+
+class ParseResult:
+    """
+    一次解析的结果：format_type 为 'standard'、'flexible' 或 'none'，
+    block_count 为标准格式扫描到的代码块总数（包括不属于文件的代码块）
+    """
+
+    __slots__ = ('buffer', 'files', 'format_type', 'block_count')
+
+    def __init__(self, buffer, files: List[ParsedFile], format_type: str, block_count: int):
+        self.buffer = buffer
+        self.files = files
+        self.format_type = format_type
+        self.block_count = block_count
+
+
+class FenceTokenizer:
+    """
+    单遍扫描响应的代码块分词器：逐行推进的状态机（查找标题 → 等待代码块 → 代码块内），不拆分行列表
+    按 CommonMark 的规则记录开始标记的字符和长度，只有同一字符、长度不小于开始标记且没有其他文字的行才结束代码块，
+    因此包含 ``` 的内容可以用 ```` 包起来；代码块内带语言标识的开始标记与之后的结束标记成对出现时视为嵌套的代码块
+    每个代码块记录为 (文件路径, 语言, (起始偏移, 结束偏移))，偏移为缓冲区中的字节位置，
+    不在文件标题之后的代码块文件路径为 None
+    flexible 为 True 时使用灵活格式：## 之后可以有多个空白，标题和代码块之间可以有说明文字
+    buffer 为已有的完整内容时直接调用 close()，否则用 feed() 逐块追加
+    """
+
+    def __init__(self, parser: 'ResponseParser', flexible: bool = False, buffer=None):
+        self.parser = parser
+        self.flexible = flexible
+        self.buffer = bytearray() if buffer is None else buffer
+        self.records: List[Tuple[Optional[str], str, Tuple[int, int]]] = []
+        self._seek_re = _FLEXIBLE_SEEK_LINE_RE if flexible else _SEEK_LINE_RE
+        self._pos = 0
+        self._state = _SEEK
+        self._path: Optional[str] = None
+        self._lang = ''
+        self._fence_char = b''
+        self._fence_len = 0
+        self._content_start = 0
+        self._depth = 0
+        self._nesting = True
+        # 文本结束后重新扫描时使用：{字符: ([结束标记行的位置], [从该位置到文本结束的最长结束标记])}
+        self._closers = None
+
+    def feed(self, data: bytes):
+        """追加数据并处理其中完整的行"""
+        self.buffer += data
+        self._scan()
+
+    def discard_processed(self):
+        """丢弃缓冲区中已经处理完的部分（之前记录中的偏移随之失效），流式解析时取出记录后调用"""
+        keep = self._content_start if self._state == _BLOCK else self._pos
+        if keep > 0:
+            del self.buffer[:keep]
+            self._pos -= keep
+            self._content_start -= keep
+
+    def _scan(self):
+        buffer = self.buffer
+        pos = self._pos
+        while True:
+            if self._state == _BLOCK:
+                line_re = _FENCE_LINE_RE
+            elif self._state == _HEADING and not self.flexible:
+                line_re = _NON_BLANK_LINE_RE
+            else:
+                # 灵活格式中标题之后的说明文字和查找标题时一样跳过
+                line_re = self._seek_re
+            match = line_re.search(buffer, pos)
+            if match is None:
+                # 保留最后一个不完整的行，之后追加的数据可能使它成为需要处理的行
+                pos = buffer.rfind(b'\n', pos) + 1 or pos
+                break
+            pos = match.start()
+            end = buffer.find(b'\n', pos)
+            if end < 0:
+                break
+            self._line(pos, end)
+            pos = end + 1
+        self._pos = pos
+
+    def close(self):
+        """处理剩余的行；代码块直到文本结束都没有结束时，按 CommonMark 的规则回退后重新扫描其余部分"""
+        self._scan()
+        length = len(self.buffer)
+        if self._pos < length:
+            self._line(self._pos, length)
+            self._pos = length
+        if self._state != _BLOCK:
+            return
+        # 带语言标识的行被当作嵌套代码块时，在第一个符合条件的结束标记处结束；
+        # 没有结束标记的代码块忽略其开始标记。之后不再识别嵌套，
+        # 并记录其余部分的结束标记，不可能结束的开始标记直接跳过，保证重新扫描只进行一次
+        buffer = self.buffer
+        closers = {}
+        resume = self._content_start
+        pos = self._content_start
+        while True:
+            match = _FENCE_LINE_RE.search(buffer, pos)
+            if match is None:
+                break
+            pos = match.start()
+            end = buffer.find(b'\n', pos)
+            if end < 0:
+                end = length
+            fence = self._fence_at(pos, end)
+            if fence is not None and not fence[2]:
+                if resume == self._content_start and fence[0] == self._fence_char and \
+                        fence[1] >= self._fence_len:
+                    self._add_record(pos)
+                    resume = end + 1
+                    closers = {}
+                else:
+                    closers.setdefault(fence[0], []).append((pos, fence[1]))
+            pos = end + 1
+
+        self._closers = {}
+        for char, items in closers.items():
+            positions = [item[0] for item in items]
+            longest = [0] * len(items)
+            current = 0
+            for i in range(len(items) - 1, -1, -1):
+                current = max(current, items[i][1])
+                longest[i] = current
+            self._closers[char] = (positions, longest)
+        self._nesting = False
+        self._state = _SEEK
+        self._pos = resume
+        self._scan()
+        if self._pos < length:
+            self._line(self._pos, length)
+            self._pos = length
+
+    def _fence_at(self, start: int, end: int) -> Optional[Tuple[bytes, int, str]]:
+        """start:end 是代码块标记行时返回 (字符, 长度, 信息字符串)"""
+        match = _FENCE_RE.match(self.buffer, start, end)
+        if match is None:
+            return None
+        run, info = match.groups()
+        if run[:1] == b'`' and b'`' in info:
+            return None
+        return run[:1], len(run), info.decode('utf-8', 'replace').strip()
+
+    def _can_close(self, start: int, fence: Tuple[bytes, int, str]) -> bool:
+        """重新扫描时判断 start 处开始的代码块之后是否还有能结束它的标记"""
+        if self._closers is None:
+            return True
+        positions, longest = self._closers.get(fence[0], ((), ()))
+        i = bisect.bisect_right(positions, start)
+        return i < len(positions) and longest[i] >= fence[1]
+
+    def _add_record(self, closer_start: int):
+        end = max(self._content_start, closer_start - 1)
+        self.records.append((self._path, self._lang, (self._content_start, end)))
+        self._state = _SEEK
+        self._path = None
+
+    def _open_block(self, fence: Tuple[bytes, int, str], end: int):
+        self._fence_char, self._fence_len = fence[0], fence[1]
+        self._lang = fence[2].split()[0] if fence[2] else 'text'
+        self._content_start = end + 1
+        self._depth = 0
+        self._state = _BLOCK
+
+    def _line(self, start: int, end: int):
+        state = self._state
+        if state == _BLOCK:
+            fence = self._fence_at(start, end)
+            if fence is not None and fence[0] == self._fence_char and fence[1] >= self._fence_len:
+                if not fence[2]:
+                    if self._depth == 0:
+                        self._add_record(start)
+                    else:
+                        self._depth -= 1
+                elif self._nesting:
+                    self._depth += 1
+            return
+
+        fence = self._fence_at(start, end)
+        if fence is not None and not self._can_close(start, fence):
+            fence = None
+        if state == _HEADING:
+            if fence is not None:
+                self._open_block(fence, end)
+                return
+            if _BLANK_RE.match(self.buffer, start, end):
+                return
+            if self.flexible and not _FLEXIBLE_SEEK_LINE_RE.match(self.buffer, start, end):
+                # 标题和代码块之间的说明文字
+                return
+            # 标题之后不是代码块：回到查找标题的状态处理这一行
+            self._state = _SEEK
+            self._path = None
+
+        if fence is not None:
+            self._path = None
+            self._open_block(fence, end)
+            return
+        line = self.buffer[start:end].decode('utf-8', 'replace')
+        file_path = self.parser.heading_file_path(line, self.flexible)
+        if file_path is not None:
+            self._path = file_path
+            self._state = _HEADING
+
+
+class StreamingResponseParser:
+    """
+    流式解析响应：push 方式用 feed() 逐块追加数据，pull 方式用 iter_files() 从文件对象中读取，
+    每个文件块在结束标记到达时立即以 ParsedFile 产生（内容复制到各自的缓冲区，解码仍在访问时进行）；
+    已经处理完的数据随即丢弃，内存占用取决于最大的单个文件而不是整个响应
+    flexible 为 True 时与 extract_files_flexible 相同：没有标准格式的文件时在输入结束后按灵活格式产生
+    """
+
+    def __init__(self, parser: 'ResponseParser' = None, flexible: bool = False):
+        self.parser = parser or ResponseParser()
+        self._standard = FenceTokenizer(self.parser)
+        # 出现标准格式的文件之前同时按灵活格式解析，结果保留到输入结束
+        self._flexible = FenceTokenizer(self.parser, flexible=True) if flexible else None
+        self._flexible_files: List[ParsedFile] = []
+
+    def feed(self, data: Union[bytes, str]) -> List[ParsedFile]:
+        """追加一块数据，返回其中已经完整的文件"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._standard.feed(data)
+        files = self._take(self._standard)
+        if self._flexible is not None:
+            if files:
+                self._flexible = None
+                self._flexible_files = []
+            else:
+                self._flexible.feed(data)
+                self._flexible_files.extend(self._take(self._flexible))
+        return files
+
+    def close(self) -> List[ParsedFile]:
+        """输入结束，返回剩余的文件"""
+        self._standard.close()
+        files = self._take(self._standard)
+        if self._flexible is not None and not files:
+            self._flexible.close()
+            files = self._flexible_files + self._take(self._flexible)
+        self._flexible = None
+        self._flexible_files = []
+        return files
+
+    def _take(self, tokenizer: FenceTokenizer) -> List[ParsedFile]:
+        # 缓冲区随后会被截断，每个文件的内容复制出来
+        files = self.parser.files_from_records(tokenizer.buffer, tokenizer.records, tokenizer.flexible, copy=True)
+        tokenizer.records = []
+        tokenizer.discard_processed()
+        return files
+
+    def iter_files(self, stream, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[ParsedFile]:
+        """从文件对象（二进制或文本）中逐块读取，逐个产生解析出的文件"""
+        for data in iter_chunks(stream, chunk_size):
+            yield from self.feed(data)
+        yield from self.close()
+
+
+class PrefixedLineFinder:
+    """在流式输入中查找第一个以指定前缀开头的行，value 为前缀之后的内容（去掉首尾空白）"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix.encode('utf-8')
+        self.value: Optional[str] = None
+        # 上一块数据的末尾（前缀可能跨越两块数据），开始时视为在行首
+        self._tail = b'\n'
+        self._line: Optional[bytearray] = None
+
+    def feed(self, data: Union[bytes, str]):
+        if self.value is not None:
+            return
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if self._line is None:
+            window = self._tail + data
+            index = window.find(b'\n' + self.prefix)
+            if index < 0:
+                self._tail = window[-len(self.prefix):]
+                return
+            self._line = bytearray(window[index + 1 + len(self.prefix):])
+        else:
+            self._line += data
+        end = self._line.find(b'\n')
+        if end >= 0:
+            self._set_value(self._line[:end])
+
+    def close(self):
+        if self.value is None and self._line is not None:
+            self._set_value(self._line)
+
+    def _set_value(self, line: bytes):
+        self.value = line.decode('utf-8', 'replace').strip()
+        self._line = None
+
+
+def iter_chunks(stream, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Union[bytes, str]]:
+    """
+    逐块读取文件对象（二进制或文本）直到结束；
+    二进制缓冲流使用 read1()，管道中已有的数据不必等满一整块就会返回
+    """
+    read = getattr(stream, 'read1', None) or stream.read
+    while True:
+        data = read(chunk_size)
+        if not data:
+            break
+        yield data
+
+
+def open_response(path: str) -> BinaryIO:
+    """以二进制方式打开响应文件，'-' 表示标准输入（关闭时不关闭标准输入）"""
+    if path == '-':
+        return open(sys.stdin.fileno(), 'rb', closefd=False)
+    return open(path, 'rb')
+
+
+def map_response(path: str):
+    """
+    读取整个响应用于一次性解析：磁盘上的文件以只读方式 mmap 映射，解析结果直接引用映射的内容，
+    不把文件复制到内存（映射在不再被引用时释放）；'-' 表示标准输入，读取全部内容
+    """
+    if path == '-':
+        return sys.stdin.buffer.read()
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 长度为 0 的文件不能映射
+            return b''
+
+
+def clean_code_content(code_content: str) -> str:
+    """
+    清理代码内容，移除可能混入的说明文字
+    """
+    lines = code_content.split('\n')
+    cleaned_lines = []
+
+    for line in lines:
+        # 如果行看起来像说明文字而不是代码，跳过
+        stripped = line.strip()
+        if (stripped.startswith('//') and len(stripped) > 20 and '瓶颈' in stripped) or \
+           (stripped.startswith('/*') and '优化' in stripped) or \
+           (stripped.startswith('*') and '建议' in stripped):
+            # 这可能是说明文字，跳过
+            continue
+        cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines)
+
 
 class ResponseParser:
     def __init__(self):
         pass
 
-    def extract_files_standard(self, content: str) -> List[Tuple[str, str, str]]:
+    def tokenize(self, content: Union[str, bytes], flexible: bool = False
+                 ) -> Tuple[bytes, List[Tuple[Optional[str], str, Tuple[int, int]]]]:
         """
-        标准格式提取：## 文件路径 ```语言 内容 ```
-        支持文件删除标记
+        单遍扫描响应，返回 (缓冲区, 代码块记录)，记录为 [(文件路径, 语言, (起始偏移, 结束偏移))]，
+        偏移为缓冲区（str 按 UTF-8 编码，bytes 和 mmap 直接使用）中的字节位置；不在文件标题之后的代码块文件路径为 None
+        """
+        buffer = content.encode('utf-8') if isinstance(content, str) else content
+        tokenizer = FenceTokenizer(self, flexible, buffer)
+        tokenizer.close()
+        return buffer, tokenizer.records
+
+    def files_from_records(self, buffer, records: List[Tuple[Optional[str], str, Tuple[int, int]]],
+                           flexible: bool = False, copy: bool = False) -> List[ParsedFile]:
+        """
+        把分词结果中属于文件的代码块转换为 ParsedFile（引用同一个缓冲区，去掉首尾空白只调整偏移），
+        识别删除标记时只解码第一行；flexible 为 True 时内容解码时移除可能混入的说明文字
+        copy 为 True 时把每个文件的内容复制到单独的 bytes 中（缓冲区之后会被修改时使用）
         """
         files = []
-        lines = content.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            # 查找文件标题
-            if (lines[i].strip().startswith('## ') and 
-                not self._is_markdown_section_title(lines[i].strip()[3:])):
-                
-                file_title = lines[i].strip()[3:].strip()
-                clean_file_path = self._clean_file_path(file_title)
-                
-                if clean_file_path and self._is_valid_file_path(clean_file_path):
-                    # 查找下一个代码块
-                    i += 1
-                    # 跳过空行
-                    while i < len(lines) and lines[i].strip() == '':
-                        i += 1
-                    
-                    # 查找代码块开始标记
-                    if i < len(lines) and self._is_code_block_start(lines[i]):
-                        # 提取语言标识
-                        language = self._extract_language(lines[i])
-                        
-                        # 提取代码内容
-                        i += 1
-                        code_content, next_line_index = self._extract_code_content(lines, i)
-                        
-                        if code_content is not None:
-                            # 检查是否为删除标记
-                            # 修改点：更严格的删除判断逻辑
-                            if self._is_delete_marker(language, code_content):
-                                # 标记为删除的文件
-                                files.append((clean_file_path, 'deleted', 'DELETED'))
-                            else:
-                                files.append((clean_file_path, language, code_content))
-                            i = next_line_index
-                        else:
-                            i += 1
-                    else:
-                        i += 1
-                else:
-                    i += 1
+        for file_path, language, (start, end) in records:
+            if file_path is None:
+                continue
+            start = _LEADING_SPACE_RE.match(buffer, start, end).end()
+            while end > start and buffer[end - 1] in _SPACE_BYTES:
+                end -= 1
+            line_end = buffer.find(b'\n', start, end)
+            first_line = buffer[start:end if line_end < 0 else line_end].decode('utf-8')
+            if self._is_delete_marker(language, first_line):
+                files.append(ParsedFile(file_path, 'deleted', b'', 0, 0))
+                continue
+            if copy:
+                with memoryview(buffer) as view:
+                    piece = bytes(view[start:end])
+                files.append(ParsedFile(file_path, language, piece, 0, len(piece), flexible))
             else:
-                i += 1
-        
+                files.append(ParsedFile(file_path, language, buffer, start, end, flexible))
         return files
 
+    def parse(self, content, flexible: bool = True) -> ParseResult:
+        """
+        解析整个响应（str、bytes 或 mmap），标准格式和灵活格式都只扫描一次：
+        先按标准格式，没有文件且 flexible 为 True 时再按灵活格式
+        """
+        buffer, records = self.tokenize(content)
+        files = self.files_from_records(buffer, records)
+        if files:
+            return ParseResult(buffer, files, 'standard', len(records))
+        if flexible:
+            files = self._extract_flexible(buffer)
+            if files:
+                return ParseResult(buffer, files, 'flexible', len(records))
+        return ParseResult(buffer, [], 'none', len(records))
+
+    def parse_file(self, file_path: str, flexible: bool = True) -> ParseResult:
+        """解析磁盘上的响应文件（mmap 映射，不读入内存），'-' 表示标准输入"""
+        return self.parse(map_response(file_path), flexible)
+
+    def extract_files_standard(self, content: Union[str, bytes]) -> List[ParsedFile]:
+        """
+        标准格式提取：## 文件路径 ```语言 内容 ```
+        支持文件删除标记
+        """
+        return self.parse(content, flexible=False).files
+
+    def heading_file_path(self, line: str, flexible: bool = False) -> Optional[str]:
+        """
+        line 是 "## 文件路径" 形式的文件标题时返回清理后的路径，否则返回 None
+        灵活格式不排除章节标题，只检查路径是否有效
+        """
+        match = (_FLEXIBLE_HEADING_RE if flexible else _HEADING_RE).match(line)
+        if match is None:
+            return None
+        file_title = match.group(1).strip()
+        if not file_title or (not flexible and self._is_markdown_section_title(file_title)):
+            return None
+        clean_file_path = self._clean_file_path(file_title)
+        if clean_file_path and self._is_valid_file_path(clean_file_path):
+            return clean_file_path
+        return None
+
     def _is_delete_marker(self, language: str, code_content: str) -> bool:
         """
-        判断是否为删除标记
+        判断是否为删除标记（code_content 可以只是内容的第一行）
         """
         # 语言为 deleted 是明确的删除标记
         if language == 'deleted':
             return True
         
         # 检查代码内容的第一行是否为删除标记
-        first_line = code_content.split('\n')[0].strip()
+        first_line = code_content.partition('\n')[0].strip()
         if first_line in ['DELETED', 'DELETE', 'REMOVE', 'REMOVED']:
             return True
             
         # 检查第一行是否包含删除原因注释
-        if re.search(r'//\s*此文件.*删除', first_line, re.IGNORECASE):
+        if _SLASH_DELETE_NOTE_RE.search(first_line):
             return True
             
         # 检查第一行是否包含删除原因注释 (Markdown 风格)
-        if re.search(r'#\s*此文件.*删除', first_line, re.IGNORECASE):
+        if _HASH_DELETE_NOTE_RE.search(first_line):
             return True
             
         return False
 
-    def _is_code_block_start(self, line: str) -> bool:
-        """判断是否为代码块开始标记"""
-        return line.strip().startswith('```')
-
-    def _extract_language(self, line: str) -> str:
-        """从代码块开始行提取语言标识"""
-        line = line.strip()
-        if len(line) > 3:
-            return line[3:].strip()
-        return 'text'
-
-    def _extract_code_content(self, lines: List[str], start_index: int) -> Tuple[Optional[str], int]:
-        """
-        提取代码内容，正确处理内容中的 ```
-        """
-        code_lines = []
-        i = start_index
-        
-        while i < len(lines):
-            line = lines[i]
-            if line.strip() == '```':
-                # 找到结束标记
-                code_content = '\n'.join(code_lines)
-                # 移除首尾的空行
-                code_content = code_content.strip()
-                return code_content, i + 1
-            else:
-                code_lines.append(line)
-            i += 1
-        
-        # 没有找到结束标记
-        return None, i
-
     def _is_markdown_section_title(self, text: str) -> bool:
         """
         判断文本是否为markdown章节标题而不是文件路径
         """
         text = text.strip()
         # 数字标题：1. 简介, 2.1 功能等
-        if re.match(r'^\d+(\.\d+)*\s', text):
+        if _NUMBERED_TITLE_RE.match(text):
             return True
         # 字母标题：A. 介绍, B. 使用等
-        if re.match(r'^[A-Z]\.\s', text):
+        if _LETTERED_TITLE_RE.match(text):
             return True
         # 纯文本标题：简介, 使用方法等（没有文件扩展名特征）
-        if (re.match(r'^[A-Z\u4e00-\u9fa5][^.]*$', text) and 
+        if (_PLAIN_TITLE_RE.match(text) and 
             '.' not in text and '/' not in text and '\\' not in text):
             return True
         return False
@@ -150,9 +586,9 @@ class ResponseParser:
             return True
             
         # 明确的标题特征
-        if (re.match(r'^\d+(\.\d+)*\s', file_path) or 
-            re.match(r'^[A-Z]\.\s', file_path) or
-            (re.match(r'^[A-Z\u4e00-\u9fa5][^.]*$', file_path) and 
+        if (_NUMBERED_TITLE_RE.match(file_path) or 
+            _LETTERED_TITLE_RE.match(file_path) or
+            (_PLAIN_TITLE_RE.match(file_path) and 
              '.' not in file_path and '/' not in file_path)):
             return False
             
@@ -161,7 +597,7 @@ class ResponseParser:
     def _clean_file_path(self, file_path: str) -> Optional[str]:
         """清理和验证文件路径"""
         # 移除常见前缀
-        file_path = re.sub(r'^(文件|File)[:：]?\s*', '', file_path.strip())
+        file_path = _PATH_PREFIX_RE.sub('', file_path.strip())
         
         # 清理文件路径
         clean_file_path = os.path.normpath(file_path)
@@ -174,56 +610,18 @@ class ResponseParser:
             
         return clean_file_path
 
-    def extract_files_flexible(self, content: str) -> List[Tuple[str, str, str]]:
+    def extract_files_flexible(self, content: Union[str, bytes]) -> List[ParsedFile]:
         """
         灵活格式提取：处理AI可能的各种输出格式
         包括处理详细说明文本的情况和文件删除标记
         """
-        # 首先尝试标准格式
-        standard_files = self.extract_files_standard(content)
-        if standard_files:
-            return standard_files
-        
-        # 备用正则表达式方法
-        return self._extract_with_regex_flexible(content)
-
-    def _extract_with_regex_flexible(self, content: str) -> List[Tuple[str, str, str]]:
-        """
-        使用更灵活的正则表达式提取文件
-        """
-        files = []
-        
-        # 匹配模式：## 文件路径 + 可选的说明文字 + ```语言 + 代码内容 + ```
-        pattern = r'##\s+([^\n]+?)\s*\n\s*\n\s*```(\w*)\s*\n(.*?)\s*\n\s*```'
-        matches = re.findall(pattern, content, re.DOTALL)
-        
-        for file_path, lang, code_content in matches:
-            clean_file_path = self._clean_file_path(file_path.strip())
-            if clean_file_path and self._is_valid_file_path(clean_file_path):
-                # 检查是否为删除标记 (使用新的严格判断逻辑)
-                if self._is_delete_marker(lang, code_content):
-                    files.append((clean_file_path, 'deleted', 'DELETED'))
-                else:
-                    cleaned_code = self._clean_code_content(code_content)
-                    files.append((clean_file_path, lang or 'text', cleaned_code.strip()))
-        
-        return files
+        # 首先尝试标准格式，没有文件时使用备用的灵活格式
+        return self.parse(content).files
 
-    def _clean_code_content(self, code_content: str) -> str:
+    def _extract_flexible(self, content: Union[str, bytes]) -> List[ParsedFile]:
         """
-        清理代码内容，移除可能混入的说明文字
+        按灵活格式提取文件：## 之后可以有多个空白，标题和代码块之间可以有空行和说明文字，
+        代码中混入的说明文字被移除；与标准格式使用同一个线性扫描的分词器
         """
-        lines = code_content.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # 如果行看起来像说明文字而不是代码，跳过
-            stripped = line.strip()
-            if (stripped.startswith('//') and len(stripped) > 20 and '瓶颈' in stripped) or \
-               (stripped.startswith('/*') and '优化' in stripped) or \
-               (stripped.startswith('*') and '建议' in stripped):
-                # 这可能是说明文字，跳过
-                continue
-            cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines)
+        buffer, records = self.tokenize(content, flexible=True)
+        return self.files_from_records(buffer, records, flexible=True)
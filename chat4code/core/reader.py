@@ -0,0 +1,86 @@
+"""
+chat4code 文件读取模块
+导出时并发读取、解码源文件，并按原有顺序交付结果；
+读取的同时计算内容哈希，元数据保存时无需再次读取文件
+"""
+
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+READ_CHUNK_SIZE = 1024 * 1024
+# 无法按 UTF-8 解码的文件写入导出文件的提示文字
+UNDECODABLE_CONTENT = "[该文件无法读取，请检查编码或文件类型]"
+
+
+class ReadResult:
+    """单个文件的读取结果"""
+
+    __slots__ = ('path', 'content', 'digest', 'stat')
+
+    def __init__(self, path: str, content: str, digest: str = "",
+                 stat: Optional[os.stat_result] = None):
+        self.path = path
+        # 写入导出文件的文本（无法读取时为提示文字）
+        self.content = content
+        # 原始字节的 MD5，读取失败时为空字符串
+        self.digest = digest
+        # 读取时打开的文件的 stat 信息，用于确认哈希对应的文件版本
+        self.stat = stat
+
+
+def _decode_text(data: bytes) -> str:
+    """按文本模式 open(..., encoding='utf-8') 的规则解码（包括通用换行符转换）"""
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def read_source_file(file_path: str) -> ReadResult:
+    """
+    读取并解码单个源文件，同时用读到的字节计算 MD5
+    无法读取时内容为写入导出文件的提示文字，与原有导出行为一致
+    """
+    try:
+        digest = hashlib.md5()
+        chunks = []
+        with open(file_path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                chunks.append(chunk)
+        data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        hex_digest = digest.hexdigest()
+    except Exception as e:
+        return ReadResult(file_path, f"[读取文件时发生错误: {str(e)}]")
+
+    try:
+        content = _decode_text(data)
+    except UnicodeDecodeError:
+        content = UNDECODABLE_CONTENT
+    return ReadResult(file_path, content, hex_digest, stat_result)
+
+
+def iter_read_files(file_paths: Iterable[str], jobs: int = 1) -> Iterator[ReadResult]:
+    """
+    按输入顺序返回每个文件的读取结果
+    jobs > 1 时使用线程池并发读取；预读窗口为 jobs 的两倍，
+    因此同时驻留内存的文件数量有上限，不会因项目变大而增长
+    """
+    if jobs <= 1:
+        for file_path in file_paths:
+            yield read_source_file(file_path)
+        return
+
+    window = jobs * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for file_path in file_paths:
+            pending.append(executor.submit(read_source_file, file_path))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,153 @@
+"""
+chat4code 相关性索引模块
+在元数据目录的 SQLite 数据库中（见 docstore）维护源文件的倒排索引（标识符、注释中的词），
+按 BM25 对任务描述打分，选出与任务最相关的文件；
+与依赖缓存一样只有 stat 签名变化的文件才重新读取和分词，查询只读取查询词的倒排列表
+"""
+
+import math
+import re
+import sqlite3
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
+
+from .docstore import DocumentIndex
+from .scanner import FileEntry
+
+RELEVANCE_DB_FILENAME = "relevance_index.db"
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 文件数达到该值后，查询时跳过出现在一半以上文件中的词（文件少时读取全部倒排列表也很快）
+COMMON_TERM_MIN_DOCS = 1000
+
+# 标识符，或连续的中文字符（按二元组切分）
+_WORD_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|[一-鿿]+')
+# 拆分驼峰和下划线命名（ConnectionPool -> connection, pool；HTTPServer -> http, server）
+_SUBWORD_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+# 几乎每个文件都会出现、不能区分文件的词
+_STOP_WORDS = frozenset("""
+a an and are as at be by for from if in is it of on or the this that to with not no
+auto bool break case catch char class const continue def default delete do double else elif enum
+except explicit extern false final float for friend goto import include inline int lambda long
+namespace new none null nullptr operator override pass private protected public raise return self
+short signed size sizeof static std struct switch template this throw true try typedef typename
+unsigned using virtual void volatile while yield
+""".split())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lengths (
+    doc INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+"""
+
+
+@lru_cache(maxsize=65536)
+def _word_terms(word: str) -> Tuple[str, ...]:
+    if word[0] >= '一':
+        if len(word) == 1:
+            return (word,)
+        return tuple(word[i:i + 2] for i in range(len(word) - 1))
+    terms = []
+    lower = word.lower()
+    if len(lower) > 1 and lower not in _STOP_WORDS:
+        terms.append(lower)
+    parts = _SUBWORD_RE.findall(word)
+    if len(parts) > 1:
+        terms.extend(part for part in (p.lower() for p in parts)
+                     if len(part) > 1 and part not in _STOP_WORDS and part != lower)
+    return tuple(terms)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：标识符本身及其驼峰 / 下划线拆分出的子词（小写），中文按相邻两字切分
+    过短的词和停用词被丢弃
+    """
+    terms = []
+    for word in _WORD_RE.findall(text):
+        terms.extend(_word_terms(word))
+    return terms
+
+
+def term_counts(text: str) -> Counter:
+    """统计各个词的出现次数（相同的标识符只拆分一次）"""
+    counts = Counter()
+    for word, count in Counter(_WORD_RE.findall(text)).items():
+        for term in _word_terms(word):
+            counts[term] += count
+    return counts
+
+
+class RelevanceIndex(DocumentIndex):
+    """BM25 倒排索引，以文件的绝对路径标识文档"""
+
+    db_filename = RELEVANCE_DB_FILENAME
+    schema = _SCHEMA
+    doc_tables = ('lengths', 'postings')
+
+    def _store(self, conn: sqlite3.Connection, doc_id: int, content: str, entry: FileEntry):
+        counts = term_counts(content)
+        conn.execute("INSERT INTO lengths (doc, length) VALUES (?, ?)", (doc_id, sum(counts.values())))
+        conn.executemany("INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+                         [(term, doc_id, tf) for term, tf in counts.items()])
+
+    def search(self, query: str, paths: Set[str] = None) -> List[Tuple[str, float]]:
+        """
+        按 BM25 为包含查询词的文件打分，返回按分数从高到低排列的 (绝对路径, 分数)
+        paths 不为 None 时只返回其中的文件（文档频率仍按整个索引计算）
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        conn = self._connect()
+        doc_count, total_length = conn.execute("SELECT COUNT(*), SUM(length) FROM lengths").fetchone()
+        if not doc_count:
+            return []
+        avg_length = (total_length or 0) / doc_count or 1.0
+
+        # 先只统计文档频率：出现在一半以上文件中的词几乎不能区分文件，
+        # 大型项目中跳过它们就不必读取最长的倒排列表（所有词都很常见时仍然使用）
+        doc_freqs = {}
+        for term in terms:
+            df = conn.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()[0]
+            if df:
+                doc_freqs[term] = df
+        if doc_count >= COMMON_TERM_MIN_DOCS:
+            selective = {term: df for term, df in doc_freqs.items() if df * 2 <= doc_count}
+            if selective:
+                doc_freqs = selective
+
+        scores: Dict[int, float] = {}
+        for term, df in doc_freqs.items():
+            rows = conn.execute("SELECT p.doc, p.tf, l.length FROM postings p JOIN lengths l ON l.doc = p.doc "
+                                "WHERE p.term = ?", (term,))
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf, length in rows:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        if not scores:
+            return []
+        doc_paths = {}
+        doc_ids = list(scores)
+        # 分批查询，避免超出 SQLite 的参数个数限制
+        for i in range(0, len(doc_ids), 500):
+            batch = doc_ids[i:i + 500]
+            doc_paths.update(conn.execute(
+                f"SELECT id, path FROM docs WHERE id IN ({','.join('?' * len(batch))})", batch))
+        results = [(doc_paths[doc_id], score) for doc_id, score in scores.items()
+                   if paths is None or doc_paths[doc_id] in paths]
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
@@ -0,0 +1,210 @@
+"""
+chat4code 仓库索引模块
+在元数据目录中持久化每个文件的 (大小, mtime_ns, inode) 签名、内容哈希、语言和 token 估算，
+只有签名变化的文件才需要重新读取和计算哈希
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .scanner import FileEntry
+
+INDEX_FILENAME = "repo_index.json"
+INDEX_VERSION = 1
+
+
+def estimate_tokens_by_size(size: int) -> int:
+    """按字节数粗略估算 token 数（约 4 字节一个 token）"""
+    return (max(size, 0) + 3) // 4
+
+
+def hash_file(file_path: str) -> str:
+    """计算文件内容的 MD5，无法读取时返回空字符串"""
+    digest = hashlib.md5()
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+class IndexEntry:
+    """索引中的单个文件记录"""
+
+    __slots__ = ('rel_path', 'size', 'mtime_ns', 'inode', 'hash', 'language', 'tokens')
+
+    def __init__(self, rel_path: str, size: int, mtime_ns: int, inode: int,
+                 hash: Optional[str], language: str, tokens: int):
+        self.rel_path = rel_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.hash = hash
+        self.language = language
+        self.tokens = tokens
+
+    def to_list(self) -> list:
+        return [self.rel_path, self.size, self.mtime_ns, self.inode,
+                self.hash, self.language, self.tokens]
+
+    @classmethod
+    def from_list(cls, data: list) -> 'IndexEntry':
+        return cls(*data)
+
+
+class RepoIndex:
+    """
+    持久化的仓库文件索引，以文件的绝对路径为键
+    哈希按需计算：只同步 stat 信息时不读取文件内容
+    """
+
+    def __init__(self, metadata_dir: str, language_map: Dict[str, str], token_estimator: str = None):
+        self.metadata_dir = metadata_dir
+        self.index_file = os.path.join(metadata_dir, INDEX_FILENAME)
+        self.language_map = language_map
+        # 记录中的 token 数由哪个估算器按内容计算；估算器变化时退回按大小估算
+        self.token_estimator = token_estimator
+        self.entries: Dict[str, IndexEntry] = {}
+        # 上次保存索引的时间，晚于此时间修改的文件签名不可信（同一时间粒度内可能再次被修改）
+        self.saved_ns = 0
+        self.dirty = False
+        self._by_rel_path: Optional[Dict[str, List[str]]] = None
+        # 本次运行中已按当前 stat 重建过的记录，再次同步时签名一致即可沿用
+        self._synced = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            self.saved_ns = data.get('saved_ns', 0)
+            self.entries = {path: IndexEntry.from_list(item)
+                            for path, item in data.get('files', {}).items()}
+            if self.token_estimator and data.get('token_estimator') != self.token_estimator:
+                for entry in self.entries.values():
+                    entry.tokens = estimate_tokens_by_size(entry.size)
+                self.dirty = True
+        except Exception as e:
+            print(f"⚠️  加载仓库索引失败 {self.index_file}: {e}，将重新建立索引")
+            self.entries = {}
+
+    def save(self):
+        """保存索引（没有变化时不写入）"""
+        if not self.dirty:
+            return
+        if not os.path.exists(self.metadata_dir):
+            os.makedirs(self.metadata_dir)
+        self.saved_ns = time.time_ns()
+        data = {
+            'version': INDEX_VERSION,
+            'saved_ns': self.saved_ns,
+            'token_estimator': self.token_estimator,
+            'files': {path: entry.to_list() for path, entry in self.entries.items()}
+        }
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, self.index_file)
+        self.dirty = False
+
+    @staticmethod
+    def key_for(file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    def get(self, file_path: str) -> Optional[IndexEntry]:
+        return self.entries.get(self.key_for(file_path))
+
+    def _language_for(self, name: str) -> str:
+        _, ext = os.path.splitext(name.lower())
+        return self.language_map.get(ext, 'text')
+
+    def _is_current(self, key: str, indexed: IndexEntry, entry: FileEntry) -> bool:
+        return (indexed.size == entry.size and indexed.mtime_ns == entry.mtime_ns and
+                indexed.inode == entry.inode and
+                (entry.mtime_ns < self.saved_ns or key in self._synced))
+
+    def sync_dir(self, src_dir: str, entries: Iterable[FileEntry]) -> int:
+        """
+        用一次扫描的结果同步某个源目录下的索引记录（只比较 stat 签名，不读取文件）
+        签名变化的记录会清除哈希，目录中已不存在或被排除的文件从索引中移除
+        返回新增或变化的记录数
+        """
+        changed = 0
+        seen = set()
+        for entry in entries:
+            if entry.excluded:
+                continue
+            key = self.key_for(entry.path)
+            seen.add(key)
+            indexed = self.entries.get(key)
+            if indexed is not None and self._is_current(key, indexed, entry):
+                if indexed.rel_path != entry.rel_path:
+                    indexed.rel_path = entry.rel_path
+                    self._invalidate()
+                continue
+            self.entries[key] = IndexEntry(entry.rel_path, entry.size, entry.mtime_ns, entry.inode,
+                                           None, self._language_for(entry.name),
+                                           estimate_tokens_by_size(entry.size))
+            self._synced.add(key)
+            self._invalidate()
+            changed += 1
+
+        prefix = os.path.join(os.path.abspath(src_dir), '')
+        stale = [key for key in self.entries if key.startswith(prefix) and key not in seen]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._invalidate()
+        return changed
+
+    def ensure_hashes(self, entries: Iterable[FileEntry]) -> int:
+        """为缺少哈希的记录读取文件并计算哈希，返回实际读取的文件数"""
+        hashed = 0
+        for entry in entries:
+            indexed = self.entries.get(self.key_for(entry.path))
+            if indexed is None or indexed.hash is not None:
+                continue
+            indexed.hash = hash_file(entry.path)
+            self.dirty = True
+            hashed += 1
+        return hashed
+
+    def record_read(self, file_path: str, digest: str, stat_result: Optional[os.stat_result],
+                    tokens: int = None):
+        """
+        记录在其他流程中（如导出时读取文件）顺带计算的哈希和 token 数
+        只有读取时的 stat 签名与索引记录一致时才采用，避免记录到中途被修改的文件版本
+        """
+        indexed = self.get(file_path)
+        if indexed is None or not digest or stat_result is None:
+            return
+        if (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino) != \
+                (indexed.size, indexed.mtime_ns, indexed.inode):
+            return
+        if indexed.hash != digest:
+            indexed.hash = digest
+            self.dirty = True
+        if tokens is not None and indexed.tokens != tokens:
+            indexed.tokens = tokens
+            self.dirty = True
+
+    def find_by_rel_path(self, rel_path: str) -> List[IndexEntry]:
+        """按相对路径查找索引记录（同一相对路径可能出现在多个源目录中）"""
+        if self._by_rel_path is None:
+            self._by_rel_path = {}
+            for key, entry in self.entries.items():
+                self._by_rel_path.setdefault(os.path.normpath(entry.rel_path), []).append(key)
+        return [self.entries[key] for key in self._by_rel_path.get(os.path.normpath(rel_path), [])]
+
+    def _invalidate(self):
+        self.dirty = True
+        self._by_rel_path = None
@@ -0,0 +1,196 @@
+"""
+chat4code 目录扫描模块
+对源目录只做一次遍历，生成可在导出、项目类型检测、哈希计算之间复用的文件清单；
+遍历基于 os.scandir，目录判断使用 DirEntry 自带的文件类型，文件 stat 使用 DirEntry 的缓存
+"""
+
+import os
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .gitignore import GitIgnoreMatcher
+
+
+class FileEntry:
+    """扫描得到的单个文件信息"""
+
+    __slots__ = ('src_dir', 'path', 'rel_path', 'name', 'ext',
+                 'size', 'mtime', 'mtime_ns', 'inode', 'excluded')
+
+    def __init__(self, src_dir: str, path: str, rel_path: str, name: str,
+                 stat_result: Optional[os.stat_result], excluded: bool):
+        self.src_dir = src_dir
+        self.path = path
+        self.rel_path = rel_path
+        self.name = name
+        self.ext = os.path.splitext(name)[1]
+        self.excluded = excluded
+        if stat_result is not None:
+            self.size = stat_result.st_size
+            self.mtime = stat_result.st_mtime
+            self.mtime_ns = stat_result.st_mtime_ns
+            self.inode = stat_result.st_ino
+        else:
+            # 文件在扫描过程中消失、无法访问，或已被排除（被排除的文件不获取 stat）
+            self.size = -1
+            self.mtime = 0.0
+            self.mtime_ns = 0
+            self.inode = 0
+
+    def __repr__(self):
+        return f"FileEntry({self.rel_path!r}, size={self.size}, excluded={self.excluded})"
+
+
+class FileInventory:
+    """
+    文件清单：按源目录分组保存扫描结果
+    同一源目录内的顺序与 os.walk 的遍历顺序一致（先列出目录中的文件，再依次进入子目录）
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, List[FileEntry]] = {}
+
+    def add_dir(self, src_dir: str, entries: List[FileEntry]):
+        self._entries[src_dir] = entries
+
+    def has_dir(self, src_dir: str) -> bool:
+        return src_dir in self._entries
+
+    def entries_for(self, src_dir: str) -> List[FileEntry]:
+        """获取某个源目录下的所有文件（包括被排除的文件）"""
+        return self._entries.get(src_dir, [])
+
+    def iter_entries(self, src_dirs: List[str] = None, include_excluded: bool = False) -> Iterator[FileEntry]:
+        """按源目录顺序遍历文件"""
+        if src_dirs is None:
+            src_dirs = list(self._entries.keys())
+        for src_dir in src_dirs:
+            for entry in self.entries_for(src_dir):
+                if include_excluded or not entry.excluded:
+                    yield entry
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+
+class DirectoryScanner:
+    """
+    目录扫描器
+    should_exclude 接收相对于源目录的文件路径，返回是否排除
+    should_prune 接收相对于源目录的目录路径，返回 True 时不再进入该目录
+    use_gitignore 为 True 时同时应用仓库中的 .gitignore 和 .git/info/exclude 规则
+    follow_symlinks 为 True 时进入指向目录的符号链接，已经访问过的目录（按设备号和 inode）不会重复进入，
+    避免符号链接形成的循环
+    """
+
+    def __init__(self, should_exclude: Callable[[str], bool],
+                 should_prune: Callable[[str], bool] = None,
+                 use_gitignore: bool = False,
+                 follow_symlinks: bool = False):
+        self.should_exclude = should_exclude
+        self.should_prune = should_prune
+        self.use_gitignore = use_gitignore
+        self.follow_symlinks = follow_symlinks
+
+    def scan(self, src_dirs: List[str], inventory: FileInventory = None) -> FileInventory:
+        """扫描多个源目录，已在清单中的目录不会重复扫描"""
+        if inventory is None:
+            inventory = FileInventory()
+        for src_dir in src_dirs:
+            if not inventory.has_dir(src_dir):
+                inventory.add_dir(src_dir, self.scan_dir(src_dir))
+        return inventory
+
+    def scan_dir(self, src_dir: str) -> List[FileEntry]:
+        """扫描单个源目录"""
+        gitignore, git_prefix = self._gitignore_for(src_dir)
+        if gitignore is not None and git_prefix is None:
+            # 源目录本身被 .gitignore 忽略
+            return []
+
+        entries = []
+        visited = set()
+        if self.follow_symlinks:
+            try:
+                src_stat = os.stat(src_dir)
+                visited.add((src_stat.st_dev, src_stat.st_ino))
+            except OSError:
+                pass
+
+        # 栈中保存 (目录路径, 相对路径, 相对于仓库根目录的路径)；子目录逆序入栈，保持 os.walk 的先序顺序
+        stack = [(src_dir, '', git_prefix)]
+        while stack:
+            dir_path, rel_root, git_root = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    dir_entries = list(it)
+            except OSError:
+                continue
+
+            sub_dirs = []
+            for dir_entry in dir_entries:
+                name = dir_entry.name
+                rel_path = rel_root + os.sep + name if rel_root else name
+                try:
+                    is_dir = dir_entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    if self._prune_dir(rel_path, gitignore, git_root, name):
+                        continue
+                    if not self._enter_dir(dir_entry, visited):
+                        continue
+                    sub_dirs.append((dir_entry.path, rel_path,
+                                     _join_git_path(git_root, name) if gitignore is not None else None))
+                    continue
+
+                excluded = self.should_exclude(rel_path)
+                if not excluded and gitignore is not None:
+                    excluded = gitignore.is_ignored(_join_git_path(git_root, name), False)
+                stat_result = None
+                if not excluded:
+                    try:
+                        stat_result = dir_entry.stat()
+                    except OSError:
+                        pass
+                entries.append(FileEntry(src_dir, dir_entry.path, rel_path, name, stat_result, excluded))
+            stack.extend(reversed(sub_dirs))
+        return entries
+
+    def _enter_dir(self, dir_entry: os.DirEntry, visited: set) -> bool:
+        """检查是否进入子目录：默认不进入符号链接；跟随符号链接时跳过已访问过的目录"""
+        if not self.follow_symlinks:
+            return not dir_entry.is_symlink()
+        try:
+            dir_stat = dir_entry.stat()
+        except OSError:
+            return False
+        key = (dir_stat.st_dev, dir_stat.st_ino)
+        if key in visited:
+            return False
+        visited.add(key)
+        return True
+
+    def _gitignore_for(self, src_dir: str):
+        """获取源目录对应的 .gitignore 匹配器及源目录相对于仓库根目录的路径"""
+        if not self.use_gitignore:
+            return None, None
+        gitignore = GitIgnoreMatcher.for_path(src_dir)
+        git_prefix = gitignore.relative_path(src_dir)
+        if git_prefix and gitignore.is_path_ignored(git_prefix, True):
+            return gitignore, None
+        return gitignore, git_prefix
+
+    def _prune_dir(self, rel_dir: str, gitignore: Optional[GitIgnoreMatcher],
+                   git_root: Optional[str], name: str) -> bool:
+        if self.should_prune is not None and self.should_prune(rel_dir):
+            return True
+        return gitignore is not None and gitignore.is_ignored(_join_git_path(git_root, name), True)
+
+
+def _join_git_path(parent: str, name: str) -> str:
+    if not parent:
+        return name
+    if not name:
+        return parent
+    return parent + '/' + name
@@ -0,0 +1,173 @@
+"""
+chat4code 导出快照模块
+每次导出记录为一个快照：文件内容按哈希保存在对象存储中（相同内容只保存一次），
+快照本身只是 路径 → 内容哈希 的清单，加上导出文档的头部和目录树；
+需要时从清单和对象存储重新生成 Markdown，或把快照中的文件恢复到目录中
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+SNAPSHOT_DB_FILENAME = "snapshots.db"
+
+# 快照中文件内容的类型：完整内容、相对于基线的差异、无法读取时的提示文字、骨架或指定的行
+KIND_FILE = "file"
+KIND_DIFF = "diff"
+KIND_NOTE = "note"
+KIND_OUTLINE = "outline"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    output_file TEXT,
+    source_dirs TEXT NOT NULL,
+    head_lines TEXT NOT NULL,
+    tail_lines TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_files (
+    snapshot INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    rel_path TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    diff_context INTEGER,
+    PRIMARY KEY (snapshot, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SnapshotFile:
+    """快照中的单个文件，kind 为 KIND_DIFF 时 diff_context 为差异的上下文行数"""
+
+    __slots__ = ('rel_path', 'lang', 'blob', 'kind', 'diff_context')
+
+    def __init__(self, rel_path: str, lang: str, blob: str, kind: str = KIND_FILE,
+                 diff_context: Optional[int] = None):
+        self.rel_path = rel_path
+        self.lang = lang
+        self.blob = blob
+        self.kind = kind
+        self.diff_context = diff_context
+
+
+class SnapshotBuilder:
+    """导出过程中收集快照清单"""
+
+    def __init__(self, source_dirs: List[str], output_file: Optional[str]):
+        self.source_dirs = [os.path.abspath(src_dir) for src_dir in source_dirs]
+        self.output_file = os.path.abspath(output_file) if output_file else None
+        # 第一个文件之前的所有行（头部、目录树）和最后一个文件之后的行
+        self.head_lines: List[str] = []
+        self.tail_lines: List[str] = []
+        self.files: List[SnapshotFile] = []
+
+    def add_file(self, rel_path: str, lang: str, blob: str, kind: str = KIND_FILE,
+                 diff_context: Optional[int] = None):
+        self.files.append(SnapshotFile(rel_path, lang, blob, kind, diff_context))
+
+
+class SnapshotStore:
+    """快照清单的 SQLite 存储（位于元数据目录中，文件内容在对象存储中）"""
+
+    def __init__(self, metadata_dir: str):
+        self.metadata_dir = metadata_dir
+        self.db_file = os.path.join(metadata_dir, SNAPSHOT_DB_FILENAME)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if not os.path.exists(self.metadata_dir):
+                os.makedirs(self.metadata_dir)
+            self._conn = sqlite3.connect(self.db_file)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def record(self, builder: SnapshotBuilder) -> int:
+        """保存快照，返回快照编号"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO snapshots (created, output_file, source_dirs, head_lines, tail_lines) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(), builder.output_file,
+                 json.dumps(builder.source_dirs, ensure_ascii=False),
+                 json.dumps(builder.head_lines, ensure_ascii=False),
+                 json.dumps(builder.tail_lines, ensure_ascii=False)))
+            snapshot_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO snapshot_files (snapshot, seq, rel_path, lang, blob, kind, diff_context) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(snapshot_id, seq, f.rel_path, f.lang, f.blob, f.kind, f.diff_context)
+                 for seq, f in enumerate(builder.files)])
+        return snapshot_id
+
+    def evict(self, limit: int) -> int:
+        """只保留最新的 limit 个快照，返回删除的快照数"""
+        conn = self._connect()
+        with conn:
+            old_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM snapshots ORDER BY id DESC LIMIT -1 OFFSET ?", (limit,))]
+            for old_id in old_ids:
+                self._delete(conn, old_id)
+        return len(old_ids)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, snapshot_id: int):
+        conn.execute("DELETE FROM snapshot_files WHERE snapshot = ?", (snapshot_id,))
+        conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def delete(self, snapshot_id: int) -> bool:
+        conn = self._connect()
+        with conn:
+            exists = conn.execute("SELECT 1 FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if exists:
+                self._delete(conn, snapshot_id)
+        return exists is not None
+
+    def list_snapshots(self) -> List[Dict]:
+        """列出所有快照（按编号排列）"""
+        rows = self._connect().execute(
+            "SELECT s.id, s.created, s.output_file, s.source_dirs, COUNT(f.seq) "
+            "FROM snapshots s LEFT JOIN snapshot_files f ON f.snapshot = s.id "
+            "GROUP BY s.id ORDER BY s.id")
+        return [{'id': snapshot_id, 'created': created, 'output_file': output_file,
+                 'source_dirs': json.loads(source_dirs), 'file_count': file_count}
+                for snapshot_id, created, output_file, source_dirs, file_count in rows]
+
+    def latest_id(self) -> Optional[int]:
+        row = self._connect().execute("SELECT MAX(id) FROM snapshots").fetchone()
+        return row[0] if row else None
+
+    def load(self, snapshot_id: int) -> Optional[SnapshotBuilder]:
+        """读取快照清单，不存在时返回 None"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT output_file, source_dirs, head_lines, tail_lines FROM snapshots WHERE id = ?",
+            (snapshot_id,)).fetchone()
+        if row is None:
+            return None
+        output_file, source_dirs, head_lines, tail_lines = row
+        snapshot = SnapshotBuilder([], None)
+        snapshot.output_file = output_file
+        snapshot.source_dirs = json.loads(source_dirs)
+        snapshot.head_lines = json.loads(head_lines)
+        snapshot.tail_lines = json.loads(tail_lines)
+        for rel_path, lang, blob, kind, diff_context in conn.execute(
+                "SELECT rel_path, lang, blob, kind, diff_context FROM snapshot_files "
+                "WHERE snapshot = ? ORDER BY seq", (snapshot_id,)):
+            snapshot.add_file(rel_path, lang, blob, kind, diff_context)
+        return snapshot
+
+    def referenced_blobs(self) -> Set[str]:
+        """获取所有快照引用的内容哈希"""
+        return {row[0] for row in self._connect().execute("SELECT DISTINCT blob FROM snapshot_files")}
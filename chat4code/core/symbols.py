@@ -0,0 +1,168 @@
+"""
+chat4code 符号索引模块
+类似 ctags 的符号索引：记录每个文件中定义的符号（类、函数、宏等）和引用到的标识符，
+Python 用 ast 解析，C/C++ 用轻量的词法扫描；
+索引保存在元数据目录的 SQLite 数据库中（见 docstore），只有 stat 签名变化的文件才重新读取
+"""
+
+import ast
+import bisect
+import re
+import sqlite3
+from typing import List, Set, Tuple
+
+from .docstore import DocumentIndex
+from .outline import C_FAMILY_EXTENSIONS, PYTHON_EXTENSIONS
+from .scanner import FileEntry
+
+SYMBOL_DB_FILENAME = "symbols.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS defs (
+    name TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (name, doc, line)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS refs (
+    name TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (name, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS defs_doc ON defs (doc);
+CREATE INDEX IF NOT EXISTS refs_doc ON refs (doc);
+"""
+
+# C/C++ 扫描前替换为空白的注释、字符串和字符常量（保留换行以便计算行号）
+_C_BLANK_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+_C_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_C_TYPE_DEF_RE = re.compile(
+    r'\b(class|struct|union|enum)\s+(?:class\s+|struct\s+)?(?:\[\[[^\]]*\]\]\s*)?([A-Za-z_]\w*)\s*(?:final\s*)?[:{]')
+_C_FUNCTION_DEF_RE = re.compile(
+    r'([A-Za-z_]\w*(?:\s*::\s*~?[A-Za-z_]\w*)*)\s*\(([^;{}()]|\([^;{}()]*\))*\)\s*'
+    r'(?:const\s*|noexcept\s*|override\s*|final\s*|volatile\s*|&\s*)*(?:->\s*[\w:<>,\s*&]+?\s*)?(?::[^;{]*)?\{')
+_C_MACRO_RE = re.compile(r'^[ \t]*#[ \t]*define[ \t]+([A-Za-z_]\w*)', re.M)
+_C_ALIAS_RE = re.compile(r'\busing\s+([A-Za-z_]\w*)\s*=|\btypedef\b[^;{}]*?\b([A-Za-z_]\w*)\s*;')
+_C_KEYWORDS = frozenset("""
+alignas alignof asm auto bool break case catch char class const constexpr const_cast continue decltype
+default define delete do double dynamic_cast else endif enum explicit extern false float for friend goto
+if ifdef ifndef include inline int long mutable namespace new noexcept nullptr operator override private
+protected public register reinterpret_cast return short signed sizeof static static_assert static_cast
+struct switch template this throw true try typedef typeid typename union unsigned using virtual void
+volatile while
+""".split())
+
+
+class SymbolInfo:
+    """从单个文件中提取的符号：定义 [(名称, 行号, 类型)] 和引用到的标识符"""
+
+    __slots__ = ('definitions', 'references')
+
+    def __init__(self):
+        self.definitions: List[Tuple[str, int, str]] = []
+        self.references: Set[str] = set()
+
+
+def supports_symbols(ext: str) -> bool:
+    ext = ext.lower()
+    return ext in PYTHON_EXTENSIONS or ext in C_FAMILY_EXTENSIONS
+
+
+def extract_symbols(content: str, ext: str) -> SymbolInfo:
+    """提取文件中的符号定义和引用（不支持的语言返回空结果）"""
+    ext = ext.lower()
+    if ext in PYTHON_EXTENSIONS:
+        return _python_symbols(content)
+    if ext in C_FAMILY_EXTENSIONS:
+        return _c_family_symbols(content)
+    return SymbolInfo()
+
+
+def _python_symbols(content: str) -> SymbolInfo:
+    info = SymbolInfo()
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return info
+    # 模块级的赋值也作为定义（常量、全局变量）
+    for node in tree.body:
+        if isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    info.definitions.append((target.id, node.lineno, 'variable'))
+    stack = [(tree, False)]
+    while stack:
+        node, in_class = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                info.definitions.append((child.name, child.lineno, 'class'))
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                info.definitions.append((child.name, child.lineno, 'method' if in_class else 'function'))
+            elif isinstance(child, ast.Name):
+                info.references.add(child.id)
+            elif isinstance(child, ast.Attribute):
+                info.references.add(child.attr)
+            elif isinstance(child, ast.alias):
+                info.references.add(child.name.rpartition('.')[2])
+            stack.append((child, isinstance(child, ast.ClassDef)))
+    info.definitions.sort(key=lambda item: item[1])
+    return info
+
+
+def _blank(match) -> str:
+    return re.sub(r'[^\n]', ' ', match.group(0))
+
+
+def _c_family_symbols(content: str) -> SymbolInfo:
+    info = SymbolInfo()
+    code = _C_BLANK_RE.sub(_blank, content)
+    newlines = [match.start() for match in re.finditer('\n', code)]
+
+    def line_of(pos: int) -> int:
+        return bisect.bisect_left(newlines, pos) + 1
+
+    for match in _C_MACRO_RE.finditer(code):
+        info.definitions.append((match.group(1), line_of(match.start(1)), 'macro'))
+    for match in _C_TYPE_DEF_RE.finditer(code):
+        info.definitions.append((match.group(2), line_of(match.start(2)), match.group(1)))
+    for match in _C_ALIAS_RE.finditer(code):
+        group = 1 if match.group(1) else 2
+        info.definitions.append((match.group(group), line_of(match.start(group)), 'type'))
+    for match in _C_FUNCTION_DEF_RE.finditer(code):
+        name = match.group(1).replace(' ', '').rpartition('::')[2]
+        if name not in _C_KEYWORDS:
+            info.definitions.append((name, line_of(match.start(1)), 'function'))
+
+    info.references = {name for name in _C_IDENT_RE.findall(code) if name not in _C_KEYWORDS}
+    info.definitions.sort(key=lambda item: item[1])
+    return info
+
+
+class SymbolIndex(DocumentIndex):
+    """符号索引，以文件的绝对路径标识文件"""
+
+    db_filename = SYMBOL_DB_FILENAME
+    schema = _SCHEMA
+    doc_tables = ('defs', 'refs')
+
+    def _store(self, conn: sqlite3.Connection, doc_id: int, content: str, entry: FileEntry):
+        info = extract_symbols(content, entry.ext)
+        conn.executemany("INSERT OR IGNORE INTO defs (name, doc, line, kind) VALUES (?, ?, ?, ?)",
+                         [(name, doc_id, line, kind) for name, line, kind in info.definitions])
+        conn.executemany("INSERT INTO refs (name, doc) VALUES (?, ?)",
+                         [(name, doc_id) for name in info.references])
+
+    def definitions(self, name: str) -> List[Tuple[str, int, str]]:
+        """符号的定义位置 [(绝对路径, 行号, 类型)]"""
+        return [tuple(row) for row in self._connect().execute(
+            "SELECT d.path, f.line, f.kind FROM defs f JOIN docs d ON d.id = f.doc "
+            "WHERE f.name = ? ORDER BY d.path, f.line", (name,))]
+
+    def references(self, name: str) -> List[str]:
+        """引用了该符号的文件（绝对路径，不包括只定义了它的文件）"""
+        return [row[0] for row in self._connect().execute(
+            "SELECT d.path FROM refs r JOIN docs d ON d.id = r.doc WHERE r.name = ? "
+            "AND NOT EXISTS (SELECT 1 FROM defs f WHERE f.name = r.name AND f.doc = r.doc) "
+            "ORDER BY d.path", (name,))]
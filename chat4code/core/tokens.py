@@ -0,0 +1,229 @@
+"""
+chat4code token 估算模块
+提供可替换的 token 估算器：
+- heuristic：按字节和字符的快速估算（默认）
+- bpe：从磁盘加载 BPE 词表（vocab.json 或 tiktoken 格式），按最长匹配切分估算
+以及导出时按文件和目录汇总的 token 统计表
+"""
+
+import base64
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from .repo_index import estimate_tokens_by_size
+
+# 近似 GPT 系列分词器的预切分规则：缩写、带前导空格的单词/数字/符号、空白
+_PRETOKEN_RE = re.compile(r"'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+")
+
+# BPE 估算时单词切分结果的缓存上限
+_WORD_CACHE_LIMIT = 100000
+
+
+class TokenEstimator(ABC):
+    """token 估算器基类"""
+
+    name = "base"
+
+    @abstractmethod
+    def estimate_text(self, text: str) -> int:
+        """估算文本的 token 数"""
+
+    def estimate_size(self, size: int) -> int:
+        """只知道字节数时的估算（与仓库索引使用同一规则）"""
+        return estimate_tokens_by_size(size)
+
+
+class HeuristicEstimator(TokenEstimator):
+    """
+    快速启发式估算：ASCII 字符约 4 个一个 token，
+    非 ASCII 字符（如中文）约每个字符一个 token
+    """
+
+    name = "heuristic"
+
+    def estimate_text(self, text: str) -> int:
+        if text.isascii():
+            return (len(text) + 3) // 4
+        # UTF-8 中非 ASCII 字符多为 2~3 字节，用字节数与字符数之差近似其数量
+        extra_bytes = len(text.encode('utf-8', 'surrogatepass')) - len(text)
+        non_ascii = (extra_bytes + 1) // 2
+        return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """GPT-2 字节级 BPE 使用的字节到可见字符的映射"""
+    visible = list(range(ord('!'), ord('~') + 1)) + list(range(ord('¡'), ord('¬') + 1)) + \
+        list(range(ord('®'), ord('ÿ') + 1))
+    chars = list(visible)
+    n = 0
+    for b in range(256):
+        if b not in visible:
+            visible.append(b)
+            chars.append(256 + n)
+            n += 1
+    return dict(zip(visible, (chr(c) for c in chars)))
+
+
+class BpeVocabEstimator(TokenEstimator):
+    """
+    基于 BPE 词表的估算器
+    对每个预切分的单词按词表做最长前缀匹配，匹配数即 token 数；
+    不执行真正的合并规则，结果与真实分词器接近但不完全一致
+    """
+
+    name = "bpe"
+
+    def __init__(self, vocab_file: str):
+        self.vocab_file = vocab_file
+        self.tokens = self._load_vocab(vocab_file)
+        if not self.tokens:
+            raise ValueError(f"词表为空: {vocab_file}")
+        self.max_token_len = max(len(token) for token in self.tokens)
+        self._cache: Dict[str, int] = {}
+
+    @staticmethod
+    def _load_vocab(vocab_file: str) -> set:
+        tokens = set()
+        if vocab_file.endswith('.json'):
+            with open(vocab_file, 'r', encoding='utf-8') as f:
+                vocab = json.load(f)
+            if isinstance(vocab, dict) and isinstance(vocab.get('model'), dict):
+                # tokenizer.json 格式
+                vocab = vocab['model'].get('vocab', {})
+            byte_decoder = {char: byte for byte, char in _bytes_to_unicode().items()}
+            for token in vocab:
+                if all(char in byte_decoder for char in token):
+                    tokens.add(bytes(byte_decoder[char] for char in token))
+                else:
+                    # SentencePiece 风格的词表用 ▁ 表示空格
+                    tokens.add(token.replace('▁', ' ').encode('utf-8'))
+        else:
+            # tiktoken 格式：每行 "base64 编码的 token 序号"
+            with open(vocab_file, 'rb') as f:
+                for line in f:
+                    parts = line.split()
+                    if parts:
+                        tokens.add(base64.b64decode(parts[0]))
+        return tokens
+
+    def _count_word(self, data: bytes) -> int:
+        count = 0
+        i = 0
+        length = len(data)
+        while i < length:
+            step = min(self.max_token_len, length - i)
+            while step > 1 and data[i:i + step] not in self.tokens:
+                step -= 1
+            # 词表中没有的单个字节也计为一个 token
+            i += step
+            count += 1
+        return count
+
+    def estimate_text(self, text: str) -> int:
+        cache = self._cache
+        total = 0
+        for word in _PRETOKEN_RE.findall(text):
+            count = cache.get(word)
+            if count is None:
+                count = self._count_word(word.encode('utf-8', 'surrogatepass'))
+                if len(cache) < _WORD_CACHE_LIMIT:
+                    cache[word] = count
+            total += count
+        return total
+
+
+def create_token_estimator(name: str = None, vocab_file: str = None) -> TokenEstimator:
+    """按名称创建估算器；BPE 词表无法加载时退回启发式估算"""
+    if name == BpeVocabEstimator.name:
+        if not vocab_file:
+            print("⚠️  token_estimator 为 bpe 但未配置 token_vocab_file，使用启发式估算")
+            return HeuristicEstimator()
+        try:
+            return BpeVocabEstimator(vocab_file)
+        except Exception as e:
+            print(f"⚠️  加载 BPE 词表失败 {vocab_file}: {e}，使用启发式估算")
+            return HeuristicEstimator()
+    if name and name != HeuristicEstimator.name:
+        print(f"⚠️  未知的 token 估算器: {name}，使用启发式估算")
+    return HeuristicEstimator()
+
+
+class TokenStats:
+    """导出文件的 token 统计，按文件记录并按目录（包括所有上级目录）汇总"""
+
+    def __init__(self, estimator_name: str):
+        self.estimator_name = estimator_name
+        # (相对路径, 字节数, token 数)
+        self.files: List[tuple] = []
+
+    def add(self, rel_path: str, size: int, tokens: int):
+        self.files.append((rel_path.replace(os.sep, '/'), size, tokens))
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(tokens for _, _, tokens in self.files)
+
+    @property
+    def total_size(self) -> int:
+        return sum(size for _, size, _ in self.files)
+
+    def directories(self) -> Dict[str, List[int]]:
+        """{目录: [文件数, 字节数, token 数]}，根目录为 "."，每个文件计入它的所有上级目录"""
+        dirs: Dict[str, List[int]] = {}
+        for rel_path, size, tokens in self.files:
+            parts = rel_path.split('/')[:-1]
+            for i in range(len(parts) + 1):
+                key = '/'.join(parts[:i]) or '.'
+                totals = dirs.setdefault(key, [0, 0, 0])
+                totals[0] += 1
+                totals[1] += size
+                totals[2] += tokens
+        return dirs
+
+    def to_dict(self) -> Dict:
+        return {
+            'estimator': self.estimator_name,
+            'total_files': len(self.files),
+            'total_bytes': self.total_size,
+            'total_tokens': self.total_tokens,
+            'directories': [
+                {'path': path, 'files': files, 'bytes': size, 'tokens': tokens}
+                for path, (files, size, tokens) in sorted(self.directories().items(),
+                                                          key=lambda item: (-item[1][2], item[0]))
+            ],
+            'files': [
+                {'path': rel_path, 'bytes': size, 'tokens': tokens}
+                for rel_path, size, tokens in sorted(self.files, key=lambda item: (-item[2], item[0]))
+            ]
+        }
+
+    def format_table(self, limit: int = 20) -> List[str]:
+        """生成控制台输出的统计表（目录和文件各列出 token 最多的前 limit 项）"""
+        total_tokens = self.total_tokens or 1
+        lines = [f"📊 Token 统计（估算器: {self.estimator_name}）",
+                 f"   总计: {len(self.files)} 个文件，{self.total_size:,} 字节，约 {self.total_tokens:,} tokens"]
+
+        dirs = sorted(self.directories().items(), key=lambda item: (-item[1][2], item[0]))
+        width = max([len(path) for path, _ in dirs[:limit]] + [4])
+        lines.append(f"   {'目录'.ljust(width)}  {'文件数':>6}  {'字节':>12}  {'tokens':>10}  {'占比':>6}")
+        for path, (files, size, tokens) in dirs[:limit]:
+            lines.append(f"   {path.ljust(width)}  {files:>6}  {size:>12,}  {tokens:>10,}  "
+                         f"{tokens * 100 / total_tokens:>5.1f}%")
+
+        files = sorted(self.files, key=lambda item: (-item[2], item[0]))
+        width = max([len(path) for path, _, _ in files[:limit]] + [4])
+        lines.append(f"   {'文件'.ljust(width)}  {'字节':>12}  {'tokens':>10}  {'占比':>6}")
+        for rel_path, size, tokens in files[:limit]:
+            lines.append(f"   {rel_path.ljust(width)}  {size:>12,}  {tokens:>10,}  "
+                         f"{tokens * 100 / total_tokens:>5.1f}%")
+        return lines
+
+    def save_json(self, json_file: str):
+        output_dir = os.path.dirname(json_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
@@ -3,15 +3,14 @@ chat4code 响应验证模块
 """
 
 from .parser import ResponseParser
-import re
 
 class ResponseValidator:
     def __init__(self):
         self.parser = ResponseParser()
 
-    def validate(self, markdown_content: str, verbose: bool = False) -> dict:
+    def validate(self, markdown_content, verbose: bool = False) -> dict:
         """
-        验证AI响应格式是否正确
+        验证AI响应格式是否正确（内容可以是 str、bytes 或 mmap 映射的文件）
         """
         result = {
             'is_valid': False,
@@ -23,34 +22,20 @@ class ResponseValidator:
         }
         
         try:
-            # 尝试标准格式提取
-            standard_files = self.parser.extract_files_standard(markdown_content)
-            if standard_files:
-                result['format_type'] = 'standard'
-                result['file_count'] = len(standard_files)
-                result['files'] = [f[0] for f in standard_files]
+            # 一次解析：先按标准格式，没有文件时按灵活格式（只记录偏移，不解码文件内容）
+            parsed = self.parser.parse(markdown_content)
+            if parsed.files:
+                result['format_type'] = parsed.format_type
+                result['file_count'] = len(parsed.files)
+                result['files'] = [f.path for f in parsed.files]
                 result['is_valid'] = True
-                
-                if verbose:
-                    result['details'] = {
-                        'extracted_files': standard_files,
-                        'method': 'standard_parsing'
-                    }
-                return result
-            
-            # 尝试灵活格式提取
-            flexible_files = self.parser.extract_files_flexible(markdown_content)
-            if flexible_files:
-                result['format_type'] = 'flexible'
-                result['file_count'] = len(flexible_files)
-                result['files'] = [f[0] for f in flexible_files]
-                result['is_valid'] = True
-                result['warnings'].append("使用了灵活解析模式，建议使用标准格式")
-                
+                if parsed.format_type == 'flexible':
+                    result['warnings'].append("使用了灵活解析模式，建议使用标准格式")
+
                 if verbose:
                     result['details'] = {
-                        'extracted_files': flexible_files,
-                        'method': 'flexible_parsing'
+                        'extracted_files': parsed.files,
+                        'method': f"{parsed.format_type}_parsing"
                     }
                 return result
             
@@ -59,9 +44,8 @@ class ResponseValidator:
             result['format_type'] = 'none'
             
             # 检查是否有代码块但没有正确格式
-            code_blocks = re.findall(r'```(\w*)\n(.*?)\n\s*```', markdown_content, re.DOTALL)
-            if code_blocks:
-                result['warnings'].append(f"发现 {len(code_blocks)} 个代码块，但格式不符合要求")
+            if parsed.block_count:
+                result['warnings'].append(f"发现 {parsed.block_count} 个代码块，但格式不符合要求")
                 result['format_type'] = 'code_blocks_only'
                 
         except Exception as e:
@@ -4,6 +4,8 @@
 chat4code 交互模式模块
 """
 
+from .core.export_options import ExportOptions
+from .core.gitchanges import parse_incremental_value
 from .core.helper import CodeProjectAIHelper
 from .core.session import SessionManager
 import os
@@ -52,7 +54,7 @@ def _show_interactive_help():
     """显示交互式模式帮助"""
     help_text = """
 可用命令:
-  export [目录1] [目录2] ... [文件] [--task 任务] [--task-content 内容] [--incremental] [--task-prompt]  导出项目代码
+  export [目录1] [目录2] ... [文件] [--task 任务] [--task-content 内容] [--incremental[=git[:版本]]] [--task-prompt] [--outline] [--top-k N]  导出项目代码
   apply [文件] [目录] [--show-diff] [--no-backup]                     应用AI 响应
   validate [文件]                                                      验证响应格式
   session start|log|history|list [参数]                               会话管理
@@ -96,6 +98,8 @@ def _interactive_export(helper, args):
     task_content = None
     incremental = False
     include_task_prompt = False  # 默认不包含任务提示在文件中
+    outline = False
+    top_k = None
 
     # 解析命令行参数
     i = 0
@@ -109,9 +113,22 @@ def _interactive_export(helper, args):
         elif args[i] == '--incremental':
             incremental = True
             i += 1
+        elif args[i].startswith('--incremental='):
+            try:
+                incremental = parse_incremental_value(args[i].split('=', 1)[1])
+            except ValueError as e:
+                print(f"❌ --incremental: {e}")
+                return
+            i += 1
         elif args[i] == '--task-prompt':
             include_task_prompt = True
             i += 1
+        elif args[i] == '--outline':
+            outline = True
+            i += 1
+        elif args[i] == '--top-k' and i + 1 < len(args) and args[i + 1].isdigit():
+            top_k = int(args[i + 1])
+            i += 2
         elif args[i].startswith('--'):
             # 跳过其他标志
             i += 1
@@ -204,7 +221,8 @@ def _interactive_export(helper, args):
             src_dirs, output_file, task=task,
             incremental=incremental,
             include_task_prompt=include_task_prompt,
-            custom_task_content=task_content  # 注意：交互模式中传递的是 task_content
+            custom_task_content=task_content,  # 注意：交互模式中传递的是 task_content
+            options=ExportOptions(outline=outline, top_k=top_k)
         )
         print("✅ 导出完成! ")
         print(f"   导出文件: {result_file}")
@@ -289,8 +307,10 @@ def _interactive_validate(helper, args):
 
         if validation_result['files']:
             print(f"  文件列表: ")
+            file_status = validation_result.get('file_status', {})
+            status_labels = {'existing': ' (已有文件)', 'new': ' (新文件)'}
             for file in validation_result['files']:
-                print(f"    - {file}")
+                print(f"    - {file}{status_labels.get(file_status.get(file), '')}")
 
         if validation_result['warnings']:
             print(f"  ⚠️  警告: ")
@@ -5,24 +5,51 @@
 """
 
 import argparse
+import sys
+
+from ..core.gitchanges import parse_incremental_value
+
+INCREMENTAL_OPTION = '--incremental'
+
+
+def _incremental_value(value: str):
+    """--incremental 的取值：单独的 --incremental 为 True，否则必须是 git 或 git:REV"""
+    try:
+        return parse_incremental_value(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """
+    --incremental 只能写成 --incremental=git[:REV] 来指定取值：
+    解析前把单独的 --incremental 改写为 --incremental=，之后的参数仍然是路径，不会被当作取值
+    """
+
+    def parse_known_args(self, args=None, namespace=None):
+        args = list(sys.argv[1:] if args is None else args)
+        end = args.index('--') if '--' in args else len(args)
+        args[:end] = [INCREMENTAL_OPTION + '=' if arg == INCREMENTAL_OPTION else arg for arg in args[:end]]
+        return super().parse_known_args(args, namespace)
 
 
 def create_parser():
     """创建命令行参数解析器"""
-    parser = argparse.ArgumentParser(
+    parser = _ArgumentParser(
         description="chat4code - 让代码与AI对话更简单",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 使用示例:
   导出项目: python -m chat4code export ./my_project project.md
   增量导出: python -m chat4code export ./my_project changes.md --incremental
+  git 增量: python -m chat4code export ./my_project changes.md --incremental=git:main
   应用响应: python -m chat4code apply response.md ./updated_project
   交互模式: python -m chat4code --interactive
         """
     )
 
-    parser.add_argument('action', nargs='?', choices=['export', 'apply', 'validate', 'session', 'debug-parse', 'config', 'help', 'feature'],
-                        help=' 操作类型: export(导出代码), apply(应用响应), validate(验证格式), session(会话管理), debug-parse(调试解析), config(配置管理), help(帮助), feature(特性管理)')
+    parser.add_argument('action', nargs='?', choices=['export', 'apply', 'validate', 'session', 'debug-parse', 'config', 'help', 'feature', 'snapshot'],
+                        help=' 操作类型: export(导出代码), apply(应用响应), validate(验证格式), session(会话管理), debug-parse(调试解析), config(配置管理), help(帮助), feature(特性管理), snapshot(导出快照)')
 
     parser.add_argument('paths', nargs='*', help='路径参数') 
 
@@ -36,8 +63,56 @@ def create_parser():
     parser.add_argument('--verbose', action='store_true', help='详细输出(用于validate)')
 
     # 增量导出参数
-    parser.add_argument('--incremental', action='store_true', help='增量导出')
+    parser.add_argument(INCREMENTAL_OPTION, nargs='?', const=True, default=False, type=_incremental_value,
+                        metavar='git[:REV]',
+                        help='增量导出；--incremental=git 由本地 git 仓库获取相对于 HEAD 的变更，'
+                             '--incremental=git:REV 相对于指定版本')
     parser.add_argument('--since', dest='since_time', help='导出自指定时间以来的变更')
+    parser.add_argument('--baseline', help='增量导出使用的命名基线 (默认 default)')
+    parser.add_argument('--list-baselines', action='store_true', help='列出已保存的导出基线')
+    parser.add_argument('--diff-context', type=int, metavar='N',
+                        help='增量导出时已修改的文件只导出相对于基线的差异，N 为上下文行数（隐含 --incremental）')
+    parser.add_argument('--dry-run', action='store_true', help='只显示将要导出的文件摘要，不写入文件')
+
+    # 依赖闭包参数
+    parser.add_argument('--closure', action='append', metavar='FILE',
+                        help='只导出指定文件及其传递依赖（C/C++ 的 #include、Python 的 import），可以指定多次')
+    parser.add_argument('--impacted-by', action='append', metavar='FILE',
+                        help='只导出直接或间接依赖于指定文件的文件（包括其本身），可以指定多次')
+    parser.add_argument('--depth', type=int, metavar='N',
+                        help='--closure / --impacted-by 跟随依赖的最大层数 (默认不限制)')
+
+    # 符号查找参数
+    parser.add_argument('--symbol', action='append', metavar='NAME',
+                        help='只导出定义该符号（类、函数、宏等）的文件，可以指定多次')
+    parser.add_argument('--with-callers', action='store_true', help='--symbol 同时导出引用该符号的文件')
+
+    # 相关性选择参数
+    parser.add_argument('--top-k', type=int, metavar='N',
+                        help='按与 --task-content 的相关性 (BM25) 只导出最相关的 N 个文件')
+    parser.add_argument('--relevance-budget', type=int, metavar='TOKENS',
+                        help='按相关性依次选择文件，估算的 token 总数不超过 TOKENS')
+
+    # 骨架导出参数
+    parser.add_argument('--outline', action='store_true',
+                        help='只导出骨架：Python 和 C/C++ 文件的函数体替换为带行号范围的标记')
+    parser.add_argument('--expand', action='append', metavar='FILE:START-END',
+                        help='只导出指定文件中的指定行（文件相对于源目录，可以指定多次）')
+
+    # 分块导出参数
+    parser.add_argument('--max-tokens', type=int, help='单个导出文件的 token 预算，超出时拆分为多个文件')
+    parser.add_argument('--max-bytes', type=int, help='单个导出文件的字节预算，超出时拆分为多个文件')
+
+    # token 统计参数
+    parser.add_argument('--stats', action='store_true', help='导出后显示按文件和目录汇总的 token 统计')
+    parser.add_argument('--stats-json', help='将 token 统计保存为 JSON 文件')
+
+    # 并发读取参数
+    parser.add_argument('--jobs', '-j', type=int, help='导出时并发读取文件的线程数 (默认使用配置 export_jobs)')
+    parser.add_argument('--gitignore', action='store_true', default=None,
+                        help='导出时跳过 .gitignore 忽略的文件和目录 (默认使用配置 use_gitignore)')
+    parser.add_argument('--no-gitignore', dest='gitignore', action='store_false',
+                        help='导出时不使用 .gitignore 规则（覆盖配置 use_gitignore）')
 
     # 差异显示参数
     parser.add_argument('--show-diff', action='store_true', help='显示应用前后的差异')
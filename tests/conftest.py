@@ -10,6 +10,13 @@ import os
 from unittest.mock import Mock
 
 
+def write_file(path, content=''):
+    """写入测试文件（UTF-8），按需创建所在目录"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
 @pytest.fixture
 def temp_dir():
     """临时目录fixture"""
@@ -31,3 +38,13 @@ def sample_args():
     args.list_tasks = False
     args.list_extensions = False
     return args
+
+
+@pytest.fixture
+def export_helper(temp_dir, monkeypatch):
+    """在临时目录中工作的助手实例（任务管理器被模拟）"""
+    from unittest.mock import patch
+    monkeypatch.chdir(temp_dir)
+    with patch('chat4code.core.helper.TaskManager'):
+        from chat4code.core.helper import CodeProjectAIHelper
+        yield CodeProjectAIHelper()
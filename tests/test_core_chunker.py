@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块规划测试
+"""
+
+from chat4code.core.chunker import ChunkPlanner
+
+
+def test_plan_keeps_directories_together():
+    """测试放得下的目录整体留在同一分块，分块内保持导出顺序"""
+    planner = ChunkPlanner(max_size=300)
+    chunks = planner.plan([
+        ('a/x.cpp', 100, 25),
+        ('b/z.cpp', 120, 30),
+        ('a/y.cpp', 100, 25),
+        ('b/c/w.cpp', 50, 10),
+        ('t.cpp', 30, 5),
+    ])
+    assert sorted(i for chunk in chunks for i in chunk) == [0, 1, 2, 3, 4]
+    assert [0, 2] in [[i for i in chunk if i in (0, 2)] for chunk in chunks]
+    assert any(1 in chunk and 3 in chunk for chunk in chunks)
+    assert all(chunk == sorted(chunk) for chunk in chunks)
+    assert len(chunks) == 2
+    assert planner.oversized == []
+
+
+def test_plan_respects_token_budget_and_isolates_oversized():
+    """测试 token 预算和超出预算的单个文件"""
+    planner = ChunkPlanner(max_tokens=100, base_tokens=10)
+    chunks = planner.plan([
+        ('a.cpp', 160, 40),
+        ('b.cpp', 160, 40),
+        ('c.cpp', 160, 40),
+        ('huge.cpp', 2000, 500),
+    ])
+    assert planner.oversized == [3]
+    assert [3] in chunks
+    assert len(chunks) == 3
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+依赖图测试
+"""
+
+import os
+
+from chat4code.core.depgraph import DependencyCache, DependencyGraph, extract_dependencies
+from chat4code.core.scanner import DirectoryScanner
+
+from .conftest import write_file
+
+
+def _scan(src_dir):
+    return DirectoryScanner(lambda path: False).scan_dir(src_dir)
+
+
+def test_extract_includes():
+    """测试只提取引号形式的 #include，并按出现顺序去重"""
+    content = '#include <vector>\n  #  include "a.h"\n#include "net/b.h" // x\n#include "a.h"\n'
+    assert extract_dependencies(content, '.cpp') == ['a.h', 'net/b.h']
+    assert extract_dependencies(content, '.txt') == []
+
+
+def test_include_closure_and_incremental_cache(temp_dir):
+    """测试按包含文件目录和 include 根目录解析依赖、限制层数，以及缓存只重新读取变化的文件"""
+    src = os.path.join(temp_dir, 'src')
+    include = os.path.join(src, 'include')
+    write_file(os.path.join(src, 'main.cpp'), '#include "util.h"\n#include "api/api.h"\n')
+    write_file(os.path.join(src, 'util.h'), '#include "detail.h"\n')
+    write_file(os.path.join(src, 'detail.h'), '#include <string>\n')
+    write_file(os.path.join(include, 'api', 'api.h'), 'int api();\n')
+    write_file(os.path.join(src, 'other.cpp'), '#include "util.h"\n')
+
+    metadata_dir = os.path.join(temp_dir, 'meta')
+    cache = DependencyCache(metadata_dir)
+    entries = _scan(src)
+    assert cache.update([src], entries) == 5
+    cache.save()
+    known = {os.path.abspath(entry.path) for entry in entries}
+    graph = DependencyGraph(cache, known, [include])
+
+    def rel(paths):
+        return sorted(os.path.relpath(path, src).replace(os.sep, '/') for path in paths)
+
+    main = os.path.join(src, 'main.cpp')
+    assert rel(graph.closure([main])) == ['detail.h', 'include/api/api.h', 'main.cpp', 'util.h']
+    assert rel(graph.closure([main], depth=1)) == ['include/api/api.h', 'main.cpp', 'util.h']
+
+    # 重新加载后未变化的文件不再读取
+    cache = DependencyCache(metadata_dir)
+    assert cache.update([src], _scan(src)) == 0
+    os.remove(os.path.join(src, 'other.cpp'))
+    write_file(os.path.join(src, 'util.h'), 'int util();\n')
+    entries = _scan(src)
+    assert cache.update([src], entries) == 1
+    assert os.path.abspath(os.path.join(src, 'other.cpp')) not in cache.files
+    graph = DependencyGraph(cache, {os.path.abspath(entry.path) for entry in entries}, [include])
+    assert rel(graph.closure([main])) == ['include/api/api.h', 'main.cpp', 'util.h']
+
+
+def test_python_import_closure_and_impacted_by(temp_dir):
+    """测试解析 Python 的绝对和相对导入，以及反向求受变更影响的模块"""
+    src = os.path.join(temp_dir, 'proj')
+    write_file(os.path.join(src, 'app', '__init__.py'), '')
+    write_file(os.path.join(src, 'app', 'cli.py'), 'import os\nfrom app.core import engine\n')
+    write_file(os.path.join(src, 'app', 'core', '__init__.py'), 'from .engine import run\n')
+    write_file(os.path.join(src, 'app', 'core', 'engine.py'), 'from ..utils import helper\n')
+    write_file(os.path.join(src, 'app', 'utils.py'), 'def helper():\n    pass\n')
+    write_file(os.path.join(src, 'app', 'unrelated.py'), 'import json\n')
+    assert extract_dependencies('from . import a, b\nfrom x.y import *\n', '.py') == ['.', '.a', '.b', 'x.y']
+
+    cache = DependencyCache(os.path.join(temp_dir, 'meta'))
+    entries = _scan(src)
+    cache.update([src], entries)
+    graph = DependencyGraph(cache, {os.path.abspath(entry.path) for entry in entries}, [src])
+
+    def rel(paths):
+        return sorted(os.path.relpath(path, src).replace(os.sep, '/') for path in paths)
+
+    assert rel(graph.closure([os.path.join(src, 'app', 'cli.py')])) == \
+        ['app/cli.py', 'app/core/__init__.py', 'app/core/engine.py', 'app/utils.py']
+    assert rel(graph.impacted_by([os.path.join(src, 'app', 'utils.py')])) == \
+        ['app/cli.py', 'app/core/__init__.py', 'app/core/engine.py', 'app/utils.py']
+    assert rel(graph.impacted_by([os.path.join(src, 'app', 'utils.py')], depth=1)) == \
+        ['app/core/engine.py', 'app/utils.py']
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出流程测试
+"""
+
+import os
+
+from chat4code.core.export_options import ExportOptions
+
+from .conftest import write_file
+
+
+def test_export_streaming_output(export_helper):
+    """测试流式导出的文档结构：头部、目录树、文件内容"""
+    write_file(os.path.join('src', 'main.cpp'), 'int main() {}\n')
+    write_file(os.path.join('src', 'net', 'socket.h'), '#pragma once\n')
+
+    export_helper.export_to_markdown(['src'], os.path.join('out', 'req.md'), extensions=('.cpp', '.h'))
+
+    with open(os.path.join('out', 'req.md'), encoding='utf-8') as f:
+        content = f.read()
+
+    lines = content.split('\n')
+    assert lines[:3] == ["    ", "---", "# 项目文件组织结构"]
+    assert "- `main.cpp`    " in lines
+    assert "- net    " in lines
+    assert "    - `socket.h`    " in lines
+    # 目录树必须出现在所有文件内容之前
+    assert content.index("# 项目文件组织结构") < content.index("## main.cpp")
+    assert "## net/socket.h\n    \n```cpp\n#pragma once\n\n```" in content
+    assert content.endswith("```\n    ")
+
+
+def test_export_without_matching_files(export_helper):
+    """测试没有匹配文件时的导出内容"""
+    write_file(os.path.join('src', 'notes.txt'), 'hello')
+
+    export_helper.export_to_markdown(['src'], 'empty.md', extensions=('.cpp',))
+
+    with open('empty.md', encoding='utf-8') as f:
+        content = f.read()
+    assert content == "    \n---\n    \n## 未找到匹配的代码文件\n请检查目录路径和文件扩展名: .cpp\n    "
+
+
+
+def test_export_walks_each_source_dir_once(export_helper):
+    """测试一次导出只遍历一次源目录（类型检测、导出、元数据共用扫描结果）"""
+    from unittest.mock import patch
+
+    write_file(os.path.join('src', 'main.cpp'), 'int main() {}\n')
+    real_scandir = os.scandir
+    walked = []
+
+    def counting_scandir(path='.'):
+        walked.append(path)
+        return real_scandir(path)
+
+    with patch('os.scandir', side_effect=counting_scandir):
+        export_helper.export_to_markdown(['src'], 'full.md', extensions=('.cpp',))
+    assert walked.count(os.path.join('.', 'src')) == 1
+
+
+def test_incremental_export_only_changed(export_helper):
+    """测试增量导出只包含变更的文件"""
+    write_file(os.path.join('src', 'a.cpp'), 'int a;\n')
+    write_file(os.path.join('src', 'b.cpp'), 'int b;\n')
+    export_helper.export_to_markdown(['src'], 'full.md', extensions=('.cpp',))
+
+    write_file(os.path.join('src', 'b.cpp'), 'int b = 1;\n')
+    export_helper.export_to_markdown(['src'], 'inc.md', extensions=('.cpp',), incremental=True)
+
+    with open('inc.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## b.cpp" in content
+    assert "## a.cpp" not in content
+
+
+def test_export_metadata_reuses_export_hashes(export_helper):
+    """测试保存元数据时复用导出时计算的哈希，未导出的文件只记录 stat 指纹"""
+    from unittest.mock import patch
+
+    write_file(os.path.join('src', 'main.cpp'), 'int main() {}\n')
+    write_file(os.path.join('src', 'notes.txt'), 'hello')
+
+    with patch('chat4code.core.repo_index.hash_file') as hash_file:
+        export_helper.export_to_markdown(['src'], 'out.md', extensions=('.cpp',))
+    hash_file.assert_not_called()
+
+    file_hashes = export_helper._get_metadata_store().get_hashes('default', 'src')
+    assert len(file_hashes['main.cpp']) == 32
+    assert file_hashes['notes.txt'].startswith('stat:')
+
+    # 换一组扩展名做增量导出时，只有 stat 指纹的文件按 stat 比较
+    export_helper.export_to_markdown(['src'], 'inc.md', extensions=('.txt',), incremental=True)
+    with open('inc.md', encoding='utf-8') as f:
+        assert "自上次导出以来没有文件变更" in f.read()
+
+
+def test_incremental_export_with_named_baselines(export_helper):
+    """测试命名基线互不影响，导出部分目录不会覆盖其他目录的基线"""
+    write_file(os.path.join('app', 'main.cpp'), 'int main() {}\n')
+    write_file(os.path.join('lib', 'util.cpp'), 'void util() {}\n')
+
+    export_helper.export_to_markdown(['app', 'lib'], 'full.md', extensions=('.cpp',),
+                                     options=ExportOptions(baseline='release'))
+    export_helper.export_to_markdown(['app', 'lib'], 'full2.md', extensions=('.cpp',))
+    write_file(os.path.join('app', 'main.cpp'), 'int main() { return 1; }\n')
+    # 只导出 app 会更新默认基线中 app 的记录，lib 的记录保持不变
+    export_helper.export_to_markdown(['app'], 'app.md', extensions=('.cpp',))
+    write_file(os.path.join('lib', 'util.cpp'), 'void util() { }\n')
+
+    export_helper.export_to_markdown(['app', 'lib'], 'inc.md', extensions=('.cpp',), incremental=True)
+    with open('inc.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## util.cpp" in content
+    assert "## main.cpp" not in content
+
+    export_helper.export_to_markdown(['app', 'lib'], 'rel.md', extensions=('.cpp',),
+                                     incremental=True, options=ExportOptions(baseline='release'))
+    with open('rel.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## util.cpp" in content
+    assert "## main.cpp" in content
+
+
+def test_list_baselines(export_helper, capsys):
+    """测试 --list-baselines 列出已保存的命名基线，还没有导出过时不创建元数据目录"""
+    from chat4code.actions import help_action
+
+    help_action.show_baselines(export_helper)
+    assert "没有导出基线" in capsys.readouterr().out
+    assert not os.path.exists(export_helper.metadata_dir)
+
+    write_file(os.path.join('app', 'main.cpp'), 'int main() {}\n')
+    export_helper.export_to_markdown(['app'], 'full.md', extensions=('.cpp',),
+                                     options=ExportOptions(baseline='release'))
+    export_helper.export_to_markdown(['app'], 'full2.md', extensions=('.cpp',))
+    capsys.readouterr()
+    help_action.show_baselines(export_helper)
+    out = capsys.readouterr().out
+    assert [baseline['name'] for baseline in export_helper.list_baselines()] == ['default', 'release']
+    assert "release  " in out and "1 个文件" in out and "full.md\n" in out
+
+
+def test_project_type_ignores_excluded_files(export_helper):
+    """测试项目类型只按导出时会包含的文件检测，排除的目录（node_modules/）和文件不计入"""
+    export_helper.config_manager.config['exclude_patterns'] = ['node_modules/', '*.min.js']
+    export_helper.exclude_patterns = export_helper.config_manager.get_exclude_patterns()
+    write_file(os.path.join('src', 'app.py'), 'import os\n')
+    write_file(os.path.join('src', 'util.py'), 'x = 1\n')
+    for i in range(5):
+        write_file(os.path.join('src', 'node_modules', 'dep', f'm{i}.js'), 'module.exports = 1;\n')
+        write_file(os.path.join('src', 'static', f'b{i}.min.js'), 'var a=1;\n')
+
+    assert export_helper._detect_project_type_multi(['src'], ('.py', '.js')) == 'python'
+
+
+def test_incremental_dry_run_summary(export_helper, capsys):
+    """测试增量导出预演按目录输出变更摘要，且不写入文件"""
+    write_file(os.path.join('src', 'net', 'socket.cpp'), 'int s;\n')
+    write_file(os.path.join('src', 'ui', 'view.cpp'), 'int v;\n')
+    export_helper.export_to_markdown(['src'], 'full.md', extensions=('.cpp',))
+    write_file(os.path.join('src', 'net', 'socket.cpp'), 'int s2;\n')
+    capsys.readouterr()
+
+    result = export_helper.export_to_markdown(['src'], 'dry.md', extensions=('.cpp',),
+                                              incremental=True, options=ExportOptions(dry_run=True))
+    out = capsys.readouterr().out
+    assert result is None
+    assert not os.path.exists('dry.md')
+    assert "net/  新增 0，修改 1，删除 0" in out
+    assert "ui/" not in out
+    assert "将导出 1 个代码文件" in out
+
+
+def test_chunked_export_stays_within_budget(export_helper):
+    """测试按字节预算分块导出：每个分块不超过预算，重复任务提示，所有文件恰好导出一次"""
+    for i in range(12):
+        write_file(os.path.join('src', f'mod{i % 3}', f'file{i}.cpp'), f'// file {i}\n' + 'x' * 300 + '\n')
+    export_helper.task_manager.get_task_info.return_value = {'prompt': 'default prompt'}
+    export_helper.task_manager.customize_task_prompt.return_value = 'hello prompt'
+
+    first = export_helper.export_to_markdown(['src'], os.path.join('out', 'req.md'), extensions=('.cpp',),
+                                             task='add_feature', custom_task_content='hello',
+                                             options=ExportOptions(max_bytes=2000))
+    assert first == os.path.join('out', 'req1.md')
+
+    chunk_files = sorted(os.listdir('out'))
+    assert len(chunk_files) > 1
+    exported = []
+    for name in chunk_files:
+        with open(os.path.join('out', name), encoding='utf-8') as f:
+            content = f.read()
+        assert len(content.encode('utf-8')) <= 2000
+        assert content.startswith(f"导出分块: ")
+        assert "hello" in content
+        assert "# 项目文件组织结构" in content
+        exported.extend(line[3:] for line in content.split('\n') if line.startswith('## mod'))
+    assert sorted(exported) == sorted(os.path.join(f'mod{i % 3}', f'file{i}.cpp') for i in range(12))
+
+
+def test_export_token_stats_json(export_helper):
+    """测试导出时生成按文件和目录汇总的 token 统计，并缓存到仓库索引"""
+    import json
+
+    write_file(os.path.join('src', 'net', 'socket.cpp'), 'a' * 400)
+    write_file(os.path.join('src', 'main.cpp'), 'b' * 40)
+
+    export_helper.export_to_markdown(['src'], 'out.md', extensions=('.cpp',),
+                                     options=ExportOptions(stats_json='stats.json'))
+    with open('stats.json', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['total_files'] == 2
+    assert data['total_tokens'] == 110
+    assert {'path': 'net', 'files': 1, 'bytes': 400, 'tokens': 100} in data['directories']
+
+    indexed = export_helper._get_repo_index().get(os.path.join('src', 'net', 'socket.cpp'))
+    assert indexed.tokens == 100
+
+
+def test_next_sequential_filename(export_helper):
+    """测试序列化文件名取已有文件中最大的序号加一"""
+    for name in ['req1.md', 'req7.md', 'req3.md.bak', 'req12x.md', 'other2.md']:
+        write_file(os.path.join('out', name), '')
+
+    assert export_helper.get_next_sequential_filename('req.md', 'out') == os.path.join('out', 'req8.md')
+    assert export_helper.get_next_sequential_filename('req.md', 'missing') == os.path.join('missing', 'req1.md')
+
+
+def test_full_export_stores_no_contents_by_default(export_helper):
+    """测试默认的完整导出只写入 Markdown 文件，不在元数据目录中保存文件内容"""
+    write_file(os.path.join('src', 'a.cpp'), 'int a;\n')
+    export_helper.export_to_markdown(['src'], 'full.md', extensions=('.cpp',))
+    assert not os.path.exists(os.path.join(export_helper.metadata_dir, 'objects'))
+
+
+def test_incremental_export_with_diff_context(export_helper):
+    """测试已修改的文件只导出相对于基线的差异，新增文件导出完整内容"""
+    export_helper.config_manager.config['store_baseline_contents'] = True
+    lines = [f"int v{i} = {i};" for i in range(200)]
+    write_file(os.path.join('src', 'big.cpp'), "\n".join(lines) + "\n")
+    write_file(os.path.join('src', 'same.cpp'), 'int same;\n')
+    export_helper.export_to_markdown(['src'], 'full.md', extensions=('.cpp',))
+
+    lines[100] = "int v100 = -1;"
+    write_file(os.path.join('src', 'big.cpp'), "\n".join(lines) + "\n")
+    write_file(os.path.join('src', 'new.cpp'), 'int fresh;\n')
+    export_helper.export_to_markdown(['src'], 'inc.md', extensions=('.cpp',), incremental=True,
+                                     options=ExportOptions(diff_context=2))
+
+    with open('inc.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "```diff\n--- a/big.cpp\n+++ b/big.cpp\n@@ -99,5 +99,5 @@\n" in content
+    assert "-int v100 = 100;\n+int v100 = -1;\n" in content
+    assert "int v50 = 50;" not in content
+    assert "## new.cpp\n    \n```cpp\nint fresh;\n" in content
+    assert "## same.cpp" not in content
+
+
+def test_diff_context_chunks_stay_within_budget(export_helper):
+    """测试差异模式分块时按 diff 的大小规划：整个文件改写时 diff 约为文件的两倍，分块仍不超过预算"""
+    export_helper.config_manager.config['store_baseline_contents'] = True
+    for i in range(8):
+        write_file(os.path.join('src', f'file{i}.cpp'), "".join(f"int a{i}_{n};\n" for n in range(40)))
+    export_helper.export_to_markdown(['src'], 'full.md', extensions=('.cpp',))
+
+    for i in range(8):
+        write_file(os.path.join('src', f'file{i}.cpp'), "".join(f"int b{i}_{n};\n" for n in range(40)))
+    export_helper.export_to_markdown(['src'], os.path.join('out', 'inc.md'), extensions=('.cpp',),
+                                     incremental=True, options=ExportOptions(diff_context=3, max_bytes=2500))
+
+    chunk_files = sorted(os.listdir('out'))
+    assert len(chunk_files) > 1
+    exported = []
+    for name in chunk_files:
+        with open(os.path.join('out', name), encoding='utf-8') as f:
+            content = f.read()
+        assert len(content.encode('utf-8')) <= 2500
+        assert "```diff" in content
+        exported.extend(line[3:] for line in content.split('\n') if line.startswith('## file'))
+    assert sorted(exported) == [f'file{i}.cpp' for i in range(8)]
+
+
+def test_export_snapshots_render_and_restore(export_helper, capsys):
+    """测试开启快照后每次导出到文件都记录快照（输出到控制台时不记录），快照可重新生成相同的文档并恢复文件"""
+    export_helper.export_to_markdown(['src'], 'none.md', extensions=('.cpp', '.h'))
+    assert export_helper.list_snapshots() == []
+    export_helper.config_manager.config['record_snapshots'] = True
+    write_file(os.path.join('src', 'main.cpp'), 'int main() {}\n')
+    write_file(os.path.join('src', 'net', 'socket.h'), '#pragma once\r\n')
+    export_helper.export_to_markdown(['src'], 'first.md', extensions=('.cpp', '.h'))
+    write_file(os.path.join('src', 'main.cpp'), 'int main() { return 1; }\n')
+    export_helper.export_to_markdown(['src'], 'second.md', extensions=('.cpp', '.h'))
+    export_helper.export_to_markdown(['src'], '', extensions=('.cpp', '.h'))
+
+    snapshots = export_helper.list_snapshots()
+    assert [snapshot['file_count'] for snapshot in snapshots] == [2, 2]
+
+    first = export_helper.load_snapshot(snapshots[0]['id'])
+    export_helper.render_snapshot(first, os.path.join('out', 'first.md'))
+    with open('first.md', encoding='utf-8') as f, open(os.path.join('out', 'first.md'), encoding='utf-8') as g:
+        assert f.read() == g.read()
+    # 未变化的文件在两个快照之间共用同一个对象
+    second = export_helper.load_snapshot()
+    assert first.files[1].blob == second.files[1].blob
+    assert first.files[0].blob != second.files[0].blob
+
+    restored, skipped = export_helper.restore_snapshot(first, 'restored')
+    assert (restored, skipped) == (2, [])
+    with open(os.path.join('restored', 'main.cpp'), encoding='utf-8') as f:
+        assert f.read() == 'int main() {}\n'
+
+
+def test_export_outline_and_expand(export_helper):
+    """测试骨架导出省略函数体，--expand 取回指定的行"""
+    write_file(os.path.join('src', 'net.cpp'), 'int add(int a, int b) {\n    return a + b;\n}\n')
+    write_file(os.path.join('src', 'util.py'), 'def f():\n    x = 1\n    return x\n')
+    write_file(os.path.join('src', 'notes.txt'), 'plain\n')
+    export_helper.config_manager.config['record_snapshots'] = True
+    export_helper.export_to_markdown(['src'], 'outline.md', extensions=('.cpp', '.py', '.txt'),
+                                     options=ExportOptions(outline=True))
+
+    with open('outline.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "int add(int a, int b) { /* 省略 L1-3 */ }\n" in content
+    assert "def f():\n    ...  # 省略 L2-3\n" in content
+    assert "plain\n" in content
+    # 骨架不能用于恢复文件
+    restored, skipped = export_helper.restore_snapshot(export_helper.load_snapshot(), 'restored')
+    assert (restored, sorted(skipped)) == (1, ['net.cpp', 'util.py'])
+
+    export_helper.export_to_markdown(['src'], 'body.md', extensions=('.cpp', '.py', '.txt'),
+                                     options=ExportOptions(expand=['net.cpp:2-2']))
+    with open('body.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "```cpp\n// L2-2\n    return a + b;\n```" in content
+    assert "## util.py" not in content
+
+
+def test_export_include_closure(export_helper):
+    """测试 --closure 只导出起始文件及其包含的头文件（不受扩展名限制）"""
+    write_file(os.path.join('src', 'main.cpp'), '#include "net/socket.hpp"\nint main() {}\n')
+    write_file(os.path.join('src', 'net', 'socket.hpp'), '#include "buffer.h"\n')
+    write_file(os.path.join('src', 'net', 'buffer.h'), 'struct Buffer {};\n')
+    write_file(os.path.join('src', 'tool.cpp'), 'int tool() {}\n')
+    export_helper.export_to_markdown(['src'], 'tu.md', extensions=('.cpp', '.h'),
+                                     options=ExportOptions(closure=['main.cpp']))
+
+    with open('tu.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## main.cpp" in content
+    assert f"## {os.path.join('net', 'socket.hpp')}" in content
+    assert f"## {os.path.join('net', 'buffer.h')}" in content
+    assert "## tool.cpp" not in content
+
+
+def test_export_top_k_by_relevance(export_helper):
+    """测试 --top-k 按与任务描述的相关性只导出最相关的文件，最相关的在前"""
+    write_file(os.path.join('src', 'a_math.cpp'), 'double square(double x);\n')
+    write_file(os.path.join('src', 'b_conn.cpp'), 'Connection open();\n')
+    write_file(os.path.join('src', 'c_pool.cpp'), 'class ConnectionPool { Connection acquire(); };\n')
+    export_helper.export_to_markdown(['src'], 'top.md', extensions=('.cpp',),
+                                     custom_task_content="ConnectionPool 泄漏", options=ExportOptions(top_k=2))
+
+    with open('top.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## a_math.cpp" not in content
+    assert content.index("## c_pool.cpp") < content.index("## b_conn.cpp")
+
+
+def test_export_symbol_with_callers(export_helper):
+    """测试 --symbol 只导出定义符号的文件，--with-callers 同时导出引用它的文件"""
+    write_file(os.path.join('src', 'pool.h'), 'class ConnectionPool {};\n')
+    write_file(os.path.join('src', 'server.cpp'), 'ConnectionPool pool;\n')
+    write_file(os.path.join('src', 'other.cpp'), 'int other;\n')
+    export_helper.export_to_markdown(['src'], 'def.md', extensions=('.cpp',),
+                                     options=ExportOptions(symbols=['net::ConnectionPool']))
+    export_helper.export_to_markdown(['src'], 'all.md', extensions=('.cpp',),
+                                     options=ExportOptions(symbols=['ConnectionPool'], with_callers=True))
+
+    with open('def.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## pool.h" in content and "## server.cpp" not in content
+    with open('all.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## pool.h" in content and "## server.cpp" in content and "## other.cpp" not in content
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录树生成测试
+"""
+
+from chat4code.core.filetree import FileTree
+
+
+def _render(paths, **kwargs):
+    tree = FileTree()
+    tree.add_all(paths)
+    return tree.render(**kwargs)
+
+
+def test_render_matches_sorted_path_order():
+    """测试输出顺序与按完整路径排序一致，同名的文件和目录互不冲突"""
+    lines = _render(['src/b.cpp', 'src/a.cpp', 'main.cpp', 'src', 'src/net/x.cpp', 'README.md'])
+    assert lines == [
+        "- `README.md`    ",
+        "- `main.cpp`    ",
+        "- `src`    ",
+        "- src    ",
+        "    - `a.cpp`    ",
+        "    - `b.cpp`    ",
+        "    - net    ",
+        "        - `x.cpp`    ",
+    ]
+
+
+def test_duplicate_paths_and_backslashes():
+    """测试多个源目录中的相同相对路径重复列出，反斜杠按目录分隔符处理"""
+    lines = _render(['a\\x.py', 'a/x.py'])
+    assert lines == ["- a    ", "    - `x.py`    ", "    - `x.py`    "]
+
+
+def test_collapse_single_child_chains():
+    """测试折叠只有单个子目录的目录链"""
+    lines = _render(['src/main/java/App.java', 'src/main/java/util/Io.java', 'src/test/T.java'],
+                    collapse=True)
+    assert lines == [
+        "- src    ",
+        "    - main/java    ",
+        "        - `App.java`    ",
+        "        - util    ",
+        "            - `Io.java`    ",
+        "    - test    ",
+        "        - `T.java`    ",
+    ]
+
+
+def test_annotate_file_counts_and_tokens():
+    """测试目录标注子树中的文件数和 token 总数"""
+    tree = FileTree()
+    tree.add_all(['a/x.py', 'a/b/y.py', 'z.py'], {'a/x.py': 1200, 'a/b/y.py': 300, 'z.py': 5})
+    lines = tree.render(annotate=True)
+    assert lines[0] == "- a (2 个文件, ~1,500 tokens)    "
+    assert lines[1] == "    - b (1 个文件, ~300 tokens)    "
+    assert lines[-1] == "- `z.py`    "
+
+    # 之后再添加的文件会重新汇总
+    tree.add('a/w.py', 10)
+    assert tree.render(annotate=True)[0] == "- a (3 个文件, ~1,510 tokens)    "
+
+
+def test_large_tree_builds_quickly():
+    """测试大量路径时的构建和输出"""
+    paths = [f"d{i % 50}/s{i % 7}/f{i}.py" for i in range(20000)]
+    lines = _render(paths)
+    assert len(lines) == 20000 + 50 + 50 * 7
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+git 变更检测测试
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from chat4code.core.gitchanges import (GitChangeError, git_changed_files, parse_incremental_mode,
+                                       parse_incremental_value)
+from chat4code.utils.parser import create_parser
+
+from .conftest import write_file
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="需要 git")
+
+
+def _git(repo, *args):
+    subprocess.run(['git', '-C', repo, '-c', 'user.name=test', '-c', 'user.email=test@example.com'] + list(args),
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def repo(temp_dir):
+    _git(temp_dir, 'init', '-q')
+    write_file(os.path.join(temp_dir, 'src', 'a.cpp'), 'int a;\n')
+    write_file(os.path.join(temp_dir, 'src', 'b.cpp'), 'int b;\n')
+    write_file(os.path.join(temp_dir, 'docs', 'readme.md'), 'doc\n')
+    write_file(os.path.join(temp_dir, '.gitignore'), '*.o\n')
+    _git(temp_dir, 'add', '-A')
+    _git(temp_dir, 'commit', '-q', '-m', 'init')
+    _git(temp_dir, 'tag', 'v1')
+    return temp_dir
+
+
+def test_parse_incremental_mode():
+    """测试 --incremental 取值的解析"""
+    assert parse_incremental_mode(True) == (False, None)
+    assert parse_incremental_mode('git') == (True, None)
+    assert parse_incremental_mode('git:HEAD~2') == (True, 'HEAD~2')
+
+
+def test_incremental_option_does_not_take_paths():
+    """测试单独的 --incremental 不会把之后的路径当作取值，取值只能写成 --incremental=git[:REV]"""
+    parser = create_parser()
+    args = parser.parse_args(['export', './src', 'out.md', '--incremental'])
+    assert (args.paths, args.incremental) == (['./src', 'out.md'], True)
+    args = parser.parse_args(['export', './src', 'out.md', '--incremental=git:main'])
+    assert (args.paths, args.incremental) == (['./src', 'out.md'], 'git:main')
+    with pytest.raises(SystemExit):
+        parser.parse_args(['export', './src', '--incremental', 'out.md'])
+    with pytest.raises(SystemExit):
+        parser.parse_args(['export', './src', '--incremental=out.md'])
+
+
+def test_interactive_export_rejects_invalid_incremental_value(capsys):
+    """测试交互模式与命令行一样拒绝无效的 --incremental 取值，不会退回基于元数据的增量导出"""
+    from unittest.mock import Mock
+    from chat4code.interactive import _interactive_export
+
+    assert parse_incremental_value('') is True
+    assert parse_incremental_value('git:main') == 'git:main'
+    helper = Mock()
+    _interactive_export(helper, ['src', 'out.md', '--incremental=gti'])
+    assert "❌ --incremental: 无效的取值 'gti'（应为 git 或 git:REV）" in capsys.readouterr().out
+    helper.export_to_markdown.assert_not_called()
+
+
+def test_changes_against_head(repo):
+    """测试相对于 HEAD 的变更：修改、删除、未跟踪，忽略的文件和其他目录不包括在内"""
+    write_file(os.path.join(repo, 'src', 'a.cpp'), 'int a = 1;\n')
+    os.remove(os.path.join(repo, 'src', 'b.cpp'))
+    write_file(os.path.join(repo, 'src', 'net', 'new.cpp'), 'int n;\n')
+    write_file(os.path.join(repo, 'src', 'build.o'), '')
+    write_file(os.path.join(repo, 'docs', 'readme.md'), 'changed\n')
+
+    changes = git_changed_files(os.path.join(repo, 'src'))
+    assert changes.added == [os.path.join('net', 'new.cpp')]
+    assert changes.modified == ['a.cpp']
+    assert changes.deleted == ['b.cpp']
+
+
+def test_changes_against_revision(repo):
+    """测试相对于指定版本的变更包括已提交的修改和未跟踪的文件"""
+    write_file(os.path.join(repo, 'src', 'a.cpp'), 'int a = 2;\n')
+    _git(repo, 'commit', '-q', '-am', 'change a')
+    write_file(os.path.join(repo, 'src', 'c.cpp'), 'int c;\n')
+
+    assert git_changed_files(os.path.join(repo, 'src')).added == ['c.cpp']
+    assert git_changed_files(os.path.join(repo, 'src')).modified == []
+
+    changes = git_changed_files(os.path.join(repo, 'src'), 'v1')
+    assert changes.modified == ['a.cpp']
+    assert changes.added == ['c.cpp']
+
+    with pytest.raises(GitChangeError):
+        git_changed_files(os.path.join(repo, 'src'), 'no-such-rev')
+
+
+def test_git_incremental_export(export_helper):
+    """测试 --incremental=git 只导出 git 报告的变更文件，并仍然应用扩展名过滤"""
+    _git('.', 'init', '-q')
+    write_file(os.path.join('src', 'a.cpp'), 'int a;\n')
+    write_file(os.path.join('src', 'b.cpp'), 'int b;\n')
+    _git('.', 'add', '-A')
+    _git('.', 'commit', '-q', '-m', 'init')
+    write_file(os.path.join('src', 'b.cpp'), 'int b = 1;\n')
+    write_file(os.path.join('src', 'notes.txt'), 'todo\n')
+
+    export_helper.export_to_markdown(['src'], 'inc.md', extensions=('.cpp',), incremental='git')
+    with open('inc.md', encoding='utf-8') as f:
+        content = f.read()
+    assert "## b.cpp" in content
+    assert "## a.cpp" not in content
+    assert "notes.txt" not in content
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+.gitignore 支持测试
+"""
+
+import os
+
+from chat4code.core.gitignore import GitIgnoreMatcher
+from chat4code.core.scanner import DirectoryScanner
+from chat4code.utils.parser import create_parser
+
+from .conftest import write_file
+
+
+def test_gitignore_semantics(temp_dir):
+    """测试否定、锚定、目录规则和 ** 的语义"""
+    os.makedirs(os.path.join(temp_dir, '.git', 'info'))
+    write_file(os.path.join(temp_dir, '.git', 'info', 'exclude'), "secret.txt\n")
+    write_file(os.path.join(temp_dir, '.gitignore'),
+               "*.log\n!keep.log\nbuild/\n/root_only.c\ndocs/**/gen\n")
+    write_file(os.path.join(temp_dir, 'sub', '.gitignore'), "!*.log\n")
+
+    matcher = GitIgnoreMatcher.for_path(temp_dir)
+    assert matcher.is_ignored('a.log')
+    assert matcher.is_ignored('deep/dir/a.log')
+    assert not matcher.is_ignored('keep.log')
+    assert not matcher.is_ignored('sub/a.log')
+    assert matcher.is_ignored('build', is_dir=True)
+    assert not matcher.is_ignored('build', is_dir=False)
+    assert matcher.is_ignored('root_only.c')
+    assert not matcher.is_ignored('src/root_only.c')
+    assert matcher.is_ignored('docs/gen', is_dir=True)
+    assert matcher.is_ignored('docs/a/b/gen', is_dir=True)
+    assert matcher.is_ignored('secret.txt')
+    assert matcher.is_ignored('.git', is_dir=True)
+    assert matcher.is_path_ignored('build/out/main.o')
+
+
+def test_scanner_prunes_gitignored_dirs(temp_dir):
+    """测试扫描器跳过被 .gitignore 忽略的目录"""
+    os.makedirs(os.path.join(temp_dir, '.git'))
+    write_file(os.path.join(temp_dir, '.gitignore'), "build/\n*.o\n")
+    write_file(os.path.join(temp_dir, 'src', 'main.cpp'))
+    write_file(os.path.join(temp_dir, 'src', 'main.o'))
+    write_file(os.path.join(temp_dir, 'src', 'build', 'gen.cpp'))
+
+    src_dir = os.path.join(temp_dir, 'src')
+    pruned = []
+
+    def should_prune(rel_dir):
+        pruned.append(rel_dir)
+        return False
+
+    scanner = DirectoryScanner(lambda rel_path: False, should_prune, use_gitignore=True)
+    entries = scanner.scan([src_dir]).entries_for(src_dir)
+    assert {(entry.rel_path, entry.excluded) for entry in entries} == {('main.cpp', False), ('main.o', True)}
+    assert pruned == ['build']
+
+
+def test_gitignore_option_overrides_config_both_ways():
+    """测试 --gitignore / --no-gitignore 在两个方向上覆盖配置，未指定时为 None（使用配置）"""
+    parser = create_parser()
+    assert parser.parse_args(['export', 'src']).gitignore is None
+    assert parser.parse_args(['export', 'src', '--gitignore']).gitignore is True
+    assert parser.parse_args(['export', 'src', '--no-gitignore']).gitignore is False
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+排除模式匹配器测试
+"""
+
+import os
+
+from chat4code.core.matcher import ExcludeMatcher
+from chat4code.core.scanner import DirectoryScanner
+
+PATTERNS = ["*.log", "node_modules/", "*.git/", "tmp*/", "src/gen/", "setup.py"]
+
+
+def test_file_patterns():
+    """测试文件匹配结果与 fnmatch 语义一致"""
+    matcher = ExcludeMatcher(PATTERNS)
+    assert matcher.is_excluded("a.log")
+    assert matcher.is_excluded("deep/dir/a.log")
+    assert matcher.is_excluded("node_modules/x/index.js")
+    assert not matcher.is_excluded("lib/node_modules/index.js")
+    assert matcher.is_excluded("repo.git/HEAD")
+    assert matcher.is_excluded("tmp_build/a/b.cpp")
+    assert matcher.is_excluded("src/gen/api.h")
+    assert not matcher.is_excluded("src/general.h")
+    assert matcher.is_excluded("setup.py")
+    assert not matcher.is_excluded("main.cpp")
+
+
+def test_directory_pruning():
+    """测试目录剪枝判断"""
+    matcher = ExcludeMatcher(PATTERNS)
+    assert matcher.excludes_dir("node_modules")
+    assert matcher.excludes_dir("node_modules/pkg")
+    assert matcher.excludes_dir("tmp1")
+    assert matcher.excludes_dir("x/y.git")
+    assert matcher.excludes_dir("src/gen")
+    assert not matcher.excludes_dir("src")
+    assert not matcher.excludes_dir("lib/node_modules")
+    # *.log 只能排除文件，不能据此跳过名为 x.log 的目录
+    assert not matcher.excludes_dir("x.log")
+
+
+def test_scanner_does_not_enter_pruned_dirs(temp_dir):
+    """测试扫描器不会进入被排除的目录"""
+    for rel_path in ["main.cpp", os.path.join("node_modules", "pkg", "index.js")]:
+        path = os.path.join(temp_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+    matcher = ExcludeMatcher(PATTERNS)
+    visited = []
+
+    def should_prune(rel_dir):
+        visited.append(rel_dir)
+        return matcher.excludes_dir(rel_dir)
+
+    inventory = DirectoryScanner(matcher.is_excluded, should_prune).scan([temp_dir])
+    assert [entry.rel_path for entry in inventory.entries_for(temp_dir)] == ["main.cpp"]
+    assert visited == ["node_modules"]
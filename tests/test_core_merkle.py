@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录 Merkle 树测试
+"""
+
+import os
+
+from chat4code.core.merkle import build_tree, compute_digests, compute_stat_digests, diff_tree, iter_nodes
+from chat4code.core.scanner import DirectoryScanner
+
+from .conftest import write_file
+
+
+def _snapshot(src_dir, record_ns):
+    entries = DirectoryScanner(lambda rel_path: False).scan_dir(src_dir)
+    tree = build_tree(entries)
+    compute_stat_digests(tree, record_ns)
+    hashes = {entry.rel_path: f"h-{entry.size}" for entry in entries}
+    compute_digests(tree, hashes)
+    dirs = {node.rel_dir: (node.stat_digest or "", node.digest) for node in iter_nodes(tree)}
+    return tree, dirs, hashes
+
+
+def test_diff_skips_unchanged_subtrees(temp_dir):
+    """测试只展开 stat 摘要变化的目录，并报告新增、修改和删除"""
+    src = os.path.join(temp_dir, 'src')
+    write_file(os.path.join(src, 'net', 'socket.cpp'), 'a')
+    write_file(os.path.join(src, 'net', 'old.cpp'), 'b')
+    write_file(os.path.join(src, 'ui', 'deep', 'view.cpp'), 'c')
+    write_file(os.path.join(src, 'gone', 'x.cpp'), 'd')
+    _, stored_dirs, stored_files = _snapshot(src, 2 ** 62)
+
+    write_file(os.path.join(src, 'net', 'socket.cpp'), 'aa')
+    os.remove(os.path.join(src, 'net', 'old.cpp'))
+    write_file(os.path.join(src, 'net', 'new.cpp'), 'e')
+    os.remove(os.path.join(src, 'gone', 'x.cpp'))
+    os.rmdir(os.path.join(src, 'gone'))
+
+    tree = build_tree(DirectoryScanner(lambda rel_path: False).scan_dir(src))
+    compute_stat_digests(tree, 2 ** 62)
+    hashed = []
+
+    def current_hash(entry, previous_hash):
+        hashed.append(entry.rel_path)
+        return f"h-{entry.size}"
+
+    diff = diff_tree(tree, stored_dirs, stored_files, current_hash)
+    assert diff.added == [os.path.join('net', 'new.cpp')]
+    assert diff.modified == [os.path.join('net', 'socket.cpp')]
+    assert diff.deleted == sorted([os.path.join('gone', 'x.cpp'), os.path.join('net', 'old.cpp')])
+    # ui 子树未变化，整体跳过，不会计算其中文件的哈希
+    assert hashed == [os.path.join('net', 'socket.cpp')]
+    assert diff.skipped_dirs == 1
+
+
+def test_recent_files_are_not_trusted(temp_dir):
+    """测试修改时间晚于基线记录时间的文件所在目录不会被跳过"""
+    src = os.path.join(temp_dir, 'src')
+    write_file(os.path.join(src, 'a', 'x.cpp'), 'a')
+    _, stored_dirs, stored_files = _snapshot(src, 0)
+    assert all(stat_digest == "" for stat_digest, _ in stored_dirs.values())
+
+    tree = build_tree(DirectoryScanner(lambda rel_path: False).scan_dir(src))
+    compute_stat_digests(tree, 0)
+    diff = diff_tree(tree, stored_dirs, stored_files, lambda entry, previous: f"h-{entry.size}")
+    assert diff.changed == []
+    assert diff.skipped_dirs == 0
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出元数据存储测试
+"""
+
+import json
+import os
+
+from chat4code.core.metadata_store import MetadataStore
+
+
+def test_record_export_updates_only_changed_rows(temp_dir):
+    """测试更新基线时只改动有变化的行，并删除已不存在的文件"""
+    store = MetadataStore(os.path.join(temp_dir, 'meta'))
+    src_dir = os.path.join(temp_dir, 'src')
+    store.record_export('default', {src_dir: {'a.cpp': 'h1', 'b.cpp': 'h2'}}, 'out.md')
+
+    changes = []
+    store._connect().set_trace_callback(changes.append)
+    store.record_export('default', {src_dir: {'a.cpp': 'h1', 'b.cpp': 'h3', 'c.cpp': 'h4'}}, 'out.md')
+    store._connect().set_trace_callback(None)
+
+    writes = [sql for sql in changes if 'INTO files' in sql or 'DELETE FROM files' in sql]
+    assert len(writes) == 2
+    assert store.get_hashes('default', src_dir) == {'a.cpp': 'h1', 'b.cpp': 'h3', 'c.cpp': 'h4'}
+
+    store.record_export('default', {src_dir: {'a.cpp': 'h1'}})
+    assert store.get_hashes('default', src_dir) == {'a.cpp': 'h1'}
+    assert not store.has_dir('other', src_dir)
+    store.close()
+
+
+def test_migrate_legacy_json(temp_dir):
+    """测试旧版 export_metadata.json 迁移为默认基线"""
+    metadata_dir = os.path.join(temp_dir, 'meta')
+    os.makedirs(metadata_dir)
+    src_dir = os.path.join(temp_dir, 'src')
+    with open(os.path.join(metadata_dir, 'export_metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'export_time': '2024-01-01T00:00:00',
+            'source_dirs': [src_dir],
+            'output_file': 'out.md',
+            'file_hashes': {'main.cpp': 'abc'}
+        }, f)
+
+    store = MetadataStore(metadata_dir)
+    assert store.get_hashes('default', src_dir) == {'main.cpp': 'abc'}
+    baselines = store.list_baselines()
+    assert [b['name'] for b in baselines] == ['default']
+    assert baselines[0]['file_count'] == 1
+    store.close()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容对象存储测试
+"""
+
+import os
+
+from chat4code.core.objects import ObjectStore
+
+
+def test_put_get_and_prune(temp_dir):
+    """测试按哈希保存、读取文本，以及清理不再引用的对象"""
+    store = ObjectStore(temp_dir)
+    store.put_text('0123456789abcdef', '第一版\nint a;\n')
+    store.put_text('fedcba9876543210', 'int b;\n')
+    # 重复写入同一对象不会出错
+    store.put_text('0123456789abcdef', '第一版\nint a;\n')
+
+    assert store.has('0123456789abcdef')
+    assert store.get_text('0123456789abcdef') == '第一版\nint a;\n'
+    assert store.get_text('missing') is None
+
+    assert store.prune({'fedcba9876543210'}) == 1
+    assert not store.has('0123456789abcdef')
+    assert store.get_text('fedcba9876543210') == 'int b;\n'
+    assert os.path.isdir(os.path.join(temp_dir, 'objects'))
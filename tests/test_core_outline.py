@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+代码骨架测试
+"""
+
+import os
+
+import pytest
+
+from chat4code.core.outline import extract_line_ranges, outline_c_family, outline_python, parse_expand_specs
+
+
+def test_outline_python_keeps_signatures_and_docstrings():
+    """测试 Python 骨架保留签名、文档字符串和类属性，嵌套函数随外层函数体一起省略"""
+    source = (
+        "class A:\n"
+        "    attr = 1\n"
+        "\n"
+        "    def m(self):\n"
+        "        \"\"\"说明\"\"\"\n"
+        "        def inner():\n"
+        "            pass\n"
+        "        return inner\n"
+        "\n"
+        "    def one(self): return 1\n"
+    )
+    assert outline_python(source) == (
+        "class A:\n"
+        "    attr = 1\n"
+        "\n"
+        "    def m(self):\n"
+        "        \"\"\"说明\"\"\"\n"
+        "        ...  # 省略 L6-8\n"
+        "\n"
+        "    def one(self): return 1\n"
+    )
+    assert outline_python("def broken(:\n") is None
+
+
+def test_outline_c_family_bodies():
+    """测试 C/C++ 骨架：省略函数体和 lambda，保留类、命名空间、枚举和构造函数的初始化列表"""
+    source = (
+        "namespace net {\n"
+        "class Socket : public Base {\n"
+        "public:\n"
+        "    Socket(int fd) : fd_(fd), buf_{1, 2} {\n"
+        "        open(\"}\");  // {\n"
+        "    }\n"
+        "    int fd() const { return fd_; }\n"
+        "private:\n"
+        "    int fd_;\n"
+        "};\n"
+        "enum class E { A, B };\n"
+        "#define BLOCK(x) { x }\n"
+        "auto twice = [](int x) {\n"
+        "    return x * 2;\n"
+        "};\n"
+        "}\n"
+    )
+    assert outline_c_family(source) == (
+        "namespace net {\n"
+        "class Socket : public Base {\n"
+        "public:\n"
+        "    Socket(int fd) : fd_(fd), buf_{1, 2} { /* 省略 L4-6 */ }\n"
+        "    int fd() const { /* 省略 L7-7 */ }\n"
+        "private:\n"
+        "    int fd_;\n"
+        "};\n"
+        "enum class E { A, B };\n"
+        "#define BLOCK(x) { x }\n"
+        "auto twice = [](int x) { /* 省略 L13-15 */ };\n"
+        "}\n"
+    )
+    # 括号不配对时保持原样
+    assert outline_c_family("void f() {\n") == "void f() {\n"
+
+
+def test_parse_expand_specs_and_extract():
+    """测试解析 --expand 参数并取出指定的行"""
+    ranges = parse_expand_specs(['src/a.cpp:3-4', 'src/a.cpp:1', 'b.py:2-2'])
+    assert ranges == {os.path.join('src', 'a.cpp'): [(3, 4), (1, 1)], 'b.py': [(2, 2)]}
+    for spec in ['a.cpp', 'a.cpp:0-3', 'a.cpp:5-2', 'a.cpp:x']:
+        with pytest.raises(ValueError):
+            parse_expand_specs([spec])
+
+    content = "l1\nl2\nl3\nl4\nl5"
+    assert extract_line_ranges(content, ranges[os.path.join('src', 'a.cpp')], '.cpp') == \
+        "// L1-1\nl1\n// L3-4\nl3\nl4"
+    assert extract_line_ranges(content, [(4, 9)], '.py') == "# L4-5\nl4\nl5"
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件读取模块测试
+"""
+
+import os
+
+from chat4code.core.reader import iter_read_files, read_source_file
+
+
+def test_parallel_read_keeps_order(temp_dir):
+    """测试并发读取仍按输入顺序返回内容"""
+    paths = []
+    for i in range(50):
+        path = os.path.join(temp_dir, f"f{i}.cpp")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"// file {i}\n" * (50 - i))
+        paths.append(path)
+
+    serial = [result.content for result in iter_read_files(paths, 1)]
+    parallel = [result.content for result in iter_read_files(paths, 8)]
+    assert parallel == serial
+    assert parallel[3].startswith("// file 3\n")
+
+
+def test_read_source_file_errors(temp_dir):
+    """测试无法解码或不存在的文件返回提示文字"""
+    bad = os.path.join(temp_dir, "bad.cpp")
+    with open(bad, 'wb') as f:
+        f.write(b'\xff\xfe\x00')
+    assert read_source_file(bad).content == "[该文件无法读取，请检查编码或文件类型]"
+    missing = read_source_file(os.path.join(temp_dir, "missing.cpp"))
+    assert missing.content.startswith("[读取文件时发生错误: ")
+    assert missing.digest == ""
+
+
+def test_read_hashes_raw_bytes_and_translates_newlines(temp_dir):
+    """测试读取时用原始字节计算哈希，文本按通用换行符规则转换"""
+    import hashlib
+
+    path = os.path.join(temp_dir, "crlf.cpp")
+    data = "int a;\r\nint b;\rint c;\n".encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    result = read_source_file(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        assert result.content == f.read()
+    assert result.digest == hashlib.md5(data).hexdigest()
+    assert result.stat.st_size == len(data)
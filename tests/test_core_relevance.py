@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相关性索引测试
+"""
+
+import os
+import sqlite3
+
+from chat4code.core.relevance import RELEVANCE_DB_FILENAME, RelevanceIndex, tokenize
+from chat4code.core.scanner import DirectoryScanner
+
+from .conftest import write_file
+
+
+def test_tokenize_identifiers_and_chinese():
+    """测试拆分驼峰和下划线命名、丢弃停用词，中文按相邻两字切分"""
+    assert tokenize("class HTTPServer { int max_conn; } // 用户登录") == \
+        ['httpserver', 'http', 'server', 'max_conn', 'max', 'conn', '用户', '户登', '登录']
+
+
+def test_bm25_search_and_incremental_update(temp_dir):
+    """测试按 BM25 排序，以及只重新索引变化的文件"""
+    src = os.path.join(temp_dir, 'src')
+    write_file(os.path.join(src, 'pool.cpp'), 'class ConnectionPool { Connection acquire(); };\n// 连接池\n')
+    write_file(os.path.join(src, 'conn.cpp'), 'Connection open_connection();\n')
+    write_file(os.path.join(src, 'math.cpp'), 'double square(double x);\n')
+    scanner = DirectoryScanner(lambda path: False)
+
+    index = RelevanceIndex(os.path.join(temp_dir, 'meta'))
+    assert index.update([src], scanner.scan_dir(src)) == 3
+    ranked = [os.path.basename(path) for path, _ in index.search("修复 ConnectionPool 连接池")]
+    assert ranked == ['pool.cpp', 'conn.cpp']
+    assert index.search("square", {os.path.abspath(os.path.join(src, 'pool.cpp'))}) == []
+    index.close()
+
+    index = RelevanceIndex(os.path.join(temp_dir, 'meta'))
+    assert index.update([src], scanner.scan_dir(src)) == 0
+    os.remove(os.path.join(src, 'conn.cpp'))
+    write_file(os.path.join(src, 'math.cpp'), 'double pool_size();\n')
+    assert index.update([src], scanner.scan_dir(src)) == 1
+    assert sorted(os.path.basename(path) for path, _ in index.search("pool")) == ['math.cpp', 'pool.cpp']
+    assert index.search("open") == []
+    index.close()
+
+
+def test_outdated_database_is_rebuilt(temp_dir):
+    """测试旧版本结构的索引数据库被丢弃后重新建立"""
+    src = os.path.join(temp_dir, 'src')
+    write_file(os.path.join(src, 'pool.cpp'), 'class ConnectionPool;\n')
+    meta = os.path.join(temp_dir, 'meta')
+    os.makedirs(meta)
+    conn = sqlite3.connect(os.path.join(meta, RELEVANCE_DB_FILENAME))
+    conn.execute("CREATE TABLE docs (id INTEGER PRIMARY KEY, path TEXT, length INTEGER NOT NULL)")
+    conn.close()
+
+    index = RelevanceIndex(meta)
+    assert index.update([src], DirectoryScanner(lambda path: False).scan_dir(src)) == 1
+    assert [os.path.basename(path) for path, _ in index.search("ConnectionPool")] == ['pool.cpp']
+    index.close()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+仓库索引测试
+"""
+
+import os
+from unittest.mock import patch
+
+from chat4code.core import repo_index
+from chat4code.core.repo_index import RepoIndex
+from chat4code.core.scanner import DirectoryScanner
+
+
+def _scan(src_dir):
+    return DirectoryScanner(lambda rel_path: False).scan([src_dir]).entries_for(src_dir)
+
+
+def test_index_rehashes_only_changed_files(temp_dir):
+    """测试只有签名变化的文件才会重新计算哈希"""
+    src_dir = os.path.join(temp_dir, 'src')
+    os.makedirs(src_dir)
+    for name in ('a.py', 'b.cpp'):
+        with open(os.path.join(src_dir, name), 'w', encoding='utf-8') as f:
+            f.write(name)
+    metadata_dir = os.path.join(temp_dir, '.chat4code')
+    language_map = {'.py': 'python', '.cpp': 'cpp'}
+
+    index = RepoIndex(metadata_dir, language_map)
+    entries = _scan(src_dir)
+    index.sync_dir(src_dir, entries)
+    assert index.ensure_hashes(entries) == 2
+    assert index.get(os.path.join(src_dir, 'a.py')).language == 'python'
+    index.save()
+
+    # 重新加载后没有变化的文件不需要读取
+    index = RepoIndex(metadata_dir, language_map)
+    entries = _scan(src_dir)
+    with patch.object(repo_index, 'hash_file', side_effect=AssertionError("不应重新读取")):
+        assert index.sync_dir(src_dir, entries) == 0
+        assert index.ensure_hashes(entries) == 0
+
+    with open(os.path.join(src_dir, 'b.cpp'), 'w', encoding='utf-8') as f:
+        f.write('changed content')
+    os.remove(os.path.join(src_dir, 'a.py'))
+    entries = _scan(src_dir)
+    assert index.sync_dir(src_dir, entries) == 1
+    assert index.ensure_hashes(entries) == 1
+    assert index.get(os.path.join(src_dir, 'a.py')) is None
+    assert [entry.rel_path for entry in index.find_by_rel_path('b.cpp')] == ['b.cpp']
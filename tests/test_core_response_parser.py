@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应解析测试
+"""
+
+import io
+import mmap
+import os
+
+from chat4code.core.parser import PrefixedLineFinder, ResponseParser, StreamingResponseParser
+from chat4code.core.validator import ResponseValidator
+
+
+def _tuples(files):
+    """把解析结果转换为 (文件路径, 语言, 内容) 元组"""
+    return [tuple(f) for f in files]
+
+
+def test_extract_standard_files_and_delete_marker():
+    """测试标准格式提取、标题与代码块之间的空行、章节标题和删除标记"""
+    content = (
+        "## 1.2 说明\n"
+        "```\n"
+        "不是文件\n"
+        "```\n"
+        "## src/a.py\n"
+        "\n"
+        "```python\n"
+        "print(1)\n"
+        "```\n"
+        "## old.txt\n"
+        "```deleted\n"
+        "```\n"
+    )
+    files = ResponseParser().extract_files_standard(content)
+    assert _tuples(files) == [
+        ('src/a.py', 'python', 'print(1)'),
+        ('old.txt', 'deleted', 'DELETED'),
+    ]
+
+
+def test_longer_and_nested_fences():
+    """测试 ```` 包含 ``` 的内容，以及带语言标识的嵌套代码块"""
+    content = (
+        "## README.md\n"
+        "````markdown\n"
+        "```python\n"
+        "x = 1\n"
+        "```\n"
+        "````\n"
+        "## docs/guide.md\n"
+        "```markdown\n"
+        "示例：\n"
+        "```bash\n"
+        "make\n"
+        "```\n"
+        "```\n"
+        "## b.py\n"
+        "```python\n"
+        "y = 2\n"
+        "```\n"
+    )
+    files = ResponseParser().extract_files_standard(content)
+    assert _tuples(files) == [
+        ('README.md', 'markdown', "```python\nx = 1\n```"),
+        ('docs/guide.md', 'markdown', "示例：\n```bash\nmake\n```"),
+        ('b.py', 'python', 'y = 2'),
+    ]
+
+
+def test_unbalanced_nesting_and_unterminated_fence():
+    """测试嵌套不成对时回退到第一个结束标记，没有结束标记的代码块被忽略"""
+    parser = ResponseParser()
+    content = "## a.py\n```python\ns = '```python'\n```\n## b.py\n```python\ny = 2\n```\n"
+    assert _tuples(parser.extract_files_standard(content)) == [
+        ('a.py', 'python', "s = '```python'"),
+        ('b.py', 'python', 'y = 2'),
+    ]
+    assert parser.extract_files_standard("## a.py\n```python\nx = 1\n") == []
+
+
+def test_tokenize_records_offsets_and_anonymous_blocks():
+    """测试分词结果记录内容的偏移，不在文件标题之后的代码块路径为 None，其中的标题不被识别"""
+    content = "说明\n```\n## fake.py\n```\n## a.py\n~~~py\n内容\n~~~"
+    buffer, records = ResponseParser().tokenize(content)
+    assert [(path, lang) for path, lang, _ in records] == [(None, 'text'), ('a.py', 'py')]
+    start, end = records[1][2]
+    assert buffer[start:end].decode('utf-8') == '内容'
+
+
+def test_flexible_allows_commentary_between_heading_and_fence():
+    """测试灵活格式：## 之后多个空白、标题和代码块之间的说明文字，以及代码中混入的说明"""
+    content = (
+        "##   src/a.py\n"
+        "\n"
+        "下面是修改后的代码：\n"
+        "\n"
+        "```python\n"
+        "x = 1\n"
+        "// 这里的循环是性能瓶颈，需要进一步处理\n"
+        "```\n"
+        "##\tb.txt\n"
+        "```\n"
+        "hi\n"
+        "```\n"
+    )
+    parser = ResponseParser()
+    assert parser.extract_files_standard(content) == []
+    assert _tuples(parser.extract_files_flexible(content)) == [
+        ('src/a.py', 'python', 'x = 1'),
+        ('b.txt', 'text', 'hi'),
+    ]
+
+
+def test_validator_uses_tokenizer():
+    """测试验证器的标准格式结果，以及只有代码块时的警告"""
+    result = ResponseValidator().validate("## a.py\n````python\n```\n````\n")
+    assert result['is_valid']
+    assert result['format_type'] == 'standard'
+    assert result['files'] == ['a.py']
+
+    result = ResponseValidator().validate("说明\n```\nx\n```\n~~~\ny\n~~~\n")
+    assert not result['is_valid']
+    assert result['format_type'] == 'code_blocks_only'
+    assert result['warnings'] == ["发现 2 个代码块，但格式不符合要求"]
+
+
+def test_parsed_files_reference_shared_buffer():
+    """测试解析结果只记录共享缓冲区中去掉首尾空白后的偏移，内容在访问时解码"""
+    parsed = ResponseParser().parse("## a.py\n```python\n\n  x = '中文'\n\n```\n## b.py\n```\ny\n```\n")
+    assert parsed.format_type == 'standard'
+    assert parsed.block_count == 2
+    first, second = parsed.files
+    assert first.buffer is parsed.buffer and second.buffer is parsed.buffer
+    assert parsed.buffer[first.start:first.end] == "x = '中文'".encode('utf-8')
+    assert first.content == "x = '中文'"
+    # 与以前返回的 (文件路径, 语言, 内容) 元组兼容
+    assert (first[0], first[1], first[-1], len(first)) == ('a.py', 'python', "x = '中文'", 3)
+    assert second[:2] == ('b.py', 'text')
+
+    parsed = ResponseParser().parse("##  a.py\n说明\n```\nx\n```\n")
+    assert parsed.format_type == 'flexible'
+    assert _tuples(parsed.files) == [('a.py', 'text', 'x')]
+    assert ResponseParser().parse("##  a.py\n说明\n```\nx\n```\n", flexible=False).format_type == 'none'
+
+
+def test_parse_file_maps_response(temp_dir):
+    """测试磁盘上的响应文件用 mmap 映射后解析，空文件没有结果"""
+    response_file = os.path.join(temp_dir, 'response.md')
+    with open(response_file, 'wb') as f:
+        f.write("## a.py\n```python\nprint('你好')\n```\n## old.txt\n```\nDELETED\n```\n".encode('utf-8'))
+    parsed = ResponseParser().parse_file(response_file)
+    assert isinstance(parsed.buffer, mmap.mmap)
+    assert _tuples(parsed.files) == [('a.py', 'python', "print('你好')"), ('old.txt', 'deleted', 'DELETED')]
+
+    empty_file = os.path.join(temp_dir, 'empty.md')
+    open(empty_file, 'wb').close()
+    assert ResponseParser().parse_file(empty_file).files == []
+
+
+def test_streaming_parser_emits_file_when_closing_fence_arrives():
+    """测试流式解析在结束标记所在的行完整后立即产生文件，多字节字符可以跨越数据块"""
+    streaming = StreamingResponseParser()
+    assert streaming.feed("## a.py\n```python\nprint('你") == []
+    assert streaming.feed("好')\n``") == []
+    assert _tuples(streaming.feed("`\n## b.txt\n```\nb\n```")) == [('a.py', 'python', "print('你好')")]
+    assert _tuples(streaming.close()) == [('b.txt', 'text', 'b')]
+
+    data = "## a.py\n```python\nx = '中文'\n```\n## old.txt\n```\nDELETED\n```\n".encode('utf-8')
+    files = list(StreamingResponseParser().iter_files(io.BytesIO(data), chunk_size=1))
+    assert _tuples(files) == _tuples(ResponseParser().extract_files_standard(data))
+
+
+def test_streaming_parser_flexible_fallback():
+    """测试流式解析的灵活格式：没有标准格式的文件时在输入结束后产生"""
+    content = "##\tsrc/a.py\n说明文字\n```python\nx = 1\n```\n"
+    streaming = StreamingResponseParser(flexible=True)
+    assert streaming.feed(content) == []
+    assert _tuples(streaming.close()) == [('src/a.py', 'python', 'x = 1')]
+    assert list(StreamingResponseParser().iter_files(io.StringIO(content))) == []
+
+
+def test_prefixed_line_finder_across_chunks():
+    """测试在分块输入中查找以指定前缀开头的行"""
+    finder = PrefixedLineFinder("关联特性ID: ")
+    data = "# 标题\n关联特性ID: F-12\r\n".encode('utf-8')
+    for i in range(len(data)):
+        finder.feed(data[i:i + 1])
+    finder.close()
+    assert finder.value == 'F-12'
+
+    finder = PrefixedLineFinder("关联特性ID: ")
+    finder.feed("前缀不在行首 关联特性ID: X\n")
+    finder.close()
+    assert finder.value is None
+
+
+def test_apply_streams_response_into_directory(export_helper, temp_dir):
+    """测试应用响应：写入新文件，删除标记删除已有文件"""
+    dst_dir = os.path.join(temp_dir, 'project')
+    os.makedirs(dst_dir)
+    with open(os.path.join(dst_dir, 'old.txt'), 'w', encoding='utf-8') as f:
+        f.write('old')
+    response_file = os.path.join(temp_dir, 'response.md')
+    with open(response_file, 'w', encoding='utf-8') as f:
+        f.write("## src/a.py\n```python\nprint(1)\n```\n## old.txt\n```deleted\n```\n")
+
+    result = export_helper.apply_markdown_response(response_file, dst_dir, create_backup=False)
+    assert result['parsed_files'] == [os.path.join('src', 'a.py'), 'old.txt']
+    assert result['total'] == 2
+    assert [item['file'] for item in result['deleted']] == [os.path.join(dst_dir, 'old.txt')]
+    assert not os.path.exists(os.path.join(dst_dir, 'old.txt'))
+    with open(os.path.join(dst_dir, 'src', 'a.py'), encoding='utf-8') as f:
+        assert f.read() == 'print(1)'
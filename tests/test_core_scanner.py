@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录扫描器测试
+"""
+
+import os
+
+from chat4code.core.scanner import DirectoryScanner
+
+
+def _touch(path, content=''):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_scan_collects_stat_and_exclusion(temp_dir):
+    """测试扫描结果包含 stat 信息、扩展名和排除结果"""
+    _touch(os.path.join(temp_dir, 'a.cpp'), 'int a;')
+    _touch(os.path.join(temp_dir, 'sub', 'b.log'), 'log')
+
+    scanner = DirectoryScanner(lambda rel_path: rel_path.endswith('.log'))
+    inventory = scanner.scan([temp_dir])
+
+    entries = {entry.rel_path: entry for entry in inventory.entries_for(temp_dir)}
+    assert set(entries) == {'a.cpp', os.path.join('sub', 'b.log')}
+    assert entries['a.cpp'].size == 6
+    assert entries['a.cpp'].ext == '.cpp'
+    assert entries['a.cpp'].mtime_ns > 0
+    assert not entries['a.cpp'].excluded
+    assert entries[os.path.join('sub', 'b.log')].excluded
+
+    included = [entry.rel_path for entry in inventory.iter_entries([temp_dir])]
+    assert included == ['a.cpp']
+
+
+def test_scan_reuses_existing_inventory(temp_dir):
+    """测试已扫描的目录不会被重复扫描"""
+    _touch(os.path.join(temp_dir, 'a.cpp'))
+    calls = []
+
+    def should_exclude(rel_path):
+        calls.append(rel_path)
+        return False
+
+    scanner = DirectoryScanner(should_exclude)
+    inventory = scanner.scan([temp_dir])
+    scanner.scan([temp_dir], inventory)
+    assert calls == ['a.cpp']
+    assert len(inventory) == 1
+
+
+def test_scan_order_matches_os_walk(temp_dir):
+    """测试遍历顺序与 os.walk 一致，被剪枝的目录不会进入"""
+    for rel_path in ['z.cpp', 'a.cpp', 'b/x.cpp', 'b/c/y.cpp', 'a/w.cpp', 'build/o.cpp']:
+        _touch(os.path.join(temp_dir, rel_path))
+
+    expected = []
+    for root, dirs, files in os.walk(temp_dir):
+        dirs[:] = [d for d in dirs if d != 'build']
+        rel_root = os.path.relpath(root, temp_dir)
+        expected.extend(os.path.normpath(os.path.join(rel_root, f)) for f in files)
+
+    scanner = DirectoryScanner(lambda rel_path: False, lambda rel_dir: rel_dir == 'build')
+    entries = scanner.scan_dir(temp_dir)
+    assert [entry.rel_path for entry in entries] == expected
+    assert all(entry.path == os.path.join(temp_dir, entry.rel_path) for entry in entries)
+
+
+def test_scan_symlink_loop(temp_dir):
+    """测试跟随符号链接时不会陷入循环，默认不进入目录链接"""
+    _touch(os.path.join(temp_dir, 'src', 'a.cpp'))
+    try:
+        os.symlink(temp_dir, os.path.join(temp_dir, 'src', 'loop'))
+        os.symlink(os.path.join(temp_dir, 'src'), os.path.join(temp_dir, 'alias'))
+    except (OSError, NotImplementedError):
+        return
+
+    default = DirectoryScanner(lambda rel_path: False).scan_dir(temp_dir)
+    assert [entry.rel_path for entry in default] == [os.path.join('src', 'a.cpp')]
+
+    following = DirectoryScanner(lambda rel_path: False, follow_symlinks=True).scan_dir(temp_dir)
+    assert len(following) == 1
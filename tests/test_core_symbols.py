@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+符号索引测试
+"""
+
+import os
+
+from chat4code.core.scanner import DirectoryScanner
+from chat4code.core.symbols import SymbolIndex, extract_symbols
+
+from .conftest import write_file
+
+
+def test_extract_cpp_and_python_symbols():
+    """测试提取 C++ 的类、函数、宏、类型别名定义（跳过控制语句和注释），以及 Python 的定义和引用"""
+    cpp = ('#define POOL_SIZE 4\n'
+           'class ConnectionPool : public Base {\n'
+           '    Connection *acquire();\n'
+           '};\n'
+           'using Handle = int;\n'
+           '// void commented() {}\n'
+           'Connection *ConnectionPool::acquire() {\n'
+           '    if (ready()) { return nullptr; }\n'
+           '}\n')
+    info = extract_symbols(cpp, '.cpp')
+    assert info.definitions == [('POOL_SIZE', 1, 'macro'), ('ConnectionPool', 2, 'class'),
+                                ('Handle', 5, 'type'), ('acquire', 7, 'function')]
+    assert {'Connection', 'ready', 'Base'} <= info.references
+    assert 'commented' not in info.references
+
+    py = 'LIMIT = 3\nclass Pool:\n    def get(self):\n        return helper(LIMIT)\n'
+    info = extract_symbols(py, '.py')
+    assert info.definitions == [('LIMIT', 1, 'variable'), ('Pool', 2, 'class'), ('get', 3, 'method')]
+    assert {'helper', 'LIMIT'} <= info.references
+
+
+def test_symbol_lookup_and_incremental_update(temp_dir):
+    """测试按符号查找定义和引用的文件，以及只重新索引变化的文件"""
+    src = os.path.join(temp_dir, 'src')
+    write_file(os.path.join(src, 'pool.h'), 'class ConnectionPool {\n};\n')
+    write_file(os.path.join(src, 'server.cpp'), 'void serve() {\n    ConnectionPool pool;\n}\n')
+    write_file(os.path.join(src, 'other.cpp'), 'int other() { return 1; }\n')
+    scanner = DirectoryScanner(lambda path: False)
+
+    index = SymbolIndex(os.path.join(temp_dir, 'meta'))
+    assert index.update([src], scanner.scan_dir(src)) == 3
+    pool_h = os.path.abspath(os.path.join(src, 'pool.h'))
+    assert index.definitions('ConnectionPool') == [(pool_h, 1, 'class')]
+    assert index.references('ConnectionPool') == [os.path.abspath(os.path.join(src, 'server.cpp'))]
+    index.close()
+
+    index = SymbolIndex(os.path.join(temp_dir, 'meta'))
+    assert index.update([src], scanner.scan_dir(src)) == 0
+    write_file(os.path.join(src, 'other.cpp'), 'ConnectionPool *make() { return 0; }\n')
+    assert index.update([src], scanner.scan_dir(src)) == 1
+    assert len(index.references('ConnectionPool')) == 2
+    index.close()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+token 估算测试
+"""
+
+import base64
+import json
+import os
+
+from chat4code.core.tokens import (BpeVocabEstimator, HeuristicEstimator, TokenStats,
+                                   create_token_estimator)
+
+
+def test_heuristic_estimator():
+    """测试启发式估算：ASCII 约 4 字符一个 token，中文约每字一个 token"""
+    estimator = HeuristicEstimator()
+    assert estimator.estimate_text("") == 0
+    assert estimator.estimate_text("abcdefgh") == 2
+    assert estimator.estimate_text("中文注释") == 4
+    assert estimator.estimate_text("ab中文") == 3
+
+
+def test_bpe_estimator_from_vocab_files(temp_dir):
+    """测试从 vocab.json 和 tiktoken 格式词表加载并按最长匹配估算"""
+    vocab_json = os.path.join(temp_dir, 'vocab.json')
+    with open(vocab_json, 'w', encoding='utf-8') as f:
+        # Ġ 为 GPT-2 字节级词表中的空格
+        json.dump({"int": 0, "Ġmain": 1, "(": 2, ")": 3, "m": 4, "a": 5}, f)
+    estimator = BpeVocabEstimator(vocab_json)
+    assert estimator.estimate_text("int main()") == 4
+    # 词表中没有的字节逐个计数
+    assert estimator.estimate_text("xyz") == 3
+
+    tiktoken_file = os.path.join(temp_dir, 'vocab.tiktoken')
+    with open(tiktoken_file, 'wb') as f:
+        for rank, token in enumerate([b"int", b" main", b"()"]):
+            f.write(base64.b64encode(token) + b" " + str(rank).encode() + b"\n")
+    assert BpeVocabEstimator(tiktoken_file).estimate_text("int main()") == 3
+
+    # 词表无法加载时退回启发式估算
+    assert create_token_estimator("bpe", os.path.join(temp_dir, 'missing.json')).name == "heuristic"
+
+
+def test_token_stats_aggregates_directories():
+    """测试按目录汇总（每个文件计入所有上级目录）"""
+    stats = TokenStats("heuristic")
+    stats.add(os.path.join('net', 'socket.cpp'), 400, 100)
+    stats.add(os.path.join('net', 'tls', 'ssl.cpp'), 800, 200)
+    stats.add('main.cpp', 40, 10)
+
+    dirs = stats.directories()
+    assert dirs['.'] == [3, 1240, 310]
+    assert dirs['net'] == [2, 1200, 300]
+    assert dirs['net/tls'] == [1, 800, 200]
+
+    data = stats.to_dict()
+    assert data['total_tokens'] == 310
+    assert data['files'][0]['path'] == 'net/tls/ssl.cpp'
+    assert any(line.strip().startswith('net ') for line in stats.format_table())